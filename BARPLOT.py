@@ -2,12 +2,16 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import streamlit as st
 from itertools import cycle
+from PROFILE import get_profile
+from PREVIEW import preview_dataframe
+from ERRORBARS import bootstrap_errorbar, worker_input, show_timings, show_cache_stats
 
 class BarplotVisualizer:
     def __init__(self, data, saved_plots):
         self.data = data
         self.saved_plots = saved_plots
-        self.columns = self.data.columns.tolist()
+        self.profile = get_profile(self.data)
+        self.columns = self.profile.columns
 
     def display(self):
         self.tab1, self.tab2 = st.tabs(["Plots", "Documents"])
@@ -16,7 +20,7 @@ class BarplotVisualizer:
             st.header("Barplot Generator")
             st.subheader("Core Data and Axes Parameters")
             st.info("The data is already loaded.")
-            st.dataframe(self.data)
+            preview_dataframe(self.data, self.profile)
 
             # Create columns for layout organization
             col1, col2 = st.columns(2,border=True)
@@ -30,15 +34,19 @@ class BarplotVisualizer:
                 self.hue = st.selectbox("Select the column for hue", [None] + self.columns, index=0)
                 self.hue_order = None
                 if self.hue:
-                    self.hue_order = st.multiselect("Select the hue order", self.data[self.hue].unique().tolist())
+                    self.hue_order = st.multiselect("Select the hue order", self.profile.unique_values(self.hue))
 
                 # Estimator
                 self.estimator = st.selectbox("Select Estimator", ["mean", "median", "std"])
 
                 # Errorbar and Bootstrap Settings
-                self.errorbar = st.selectbox("Errorbar", ["ci", "pi", "se", "sd"])
+                self.errorbar = st.selectbox(
+                    "Errorbar", ["analytic", "ci", "pi", "se", "sd"],
+                    help="analytic: t interval of the mean for large groups, bootstrap otherwise"
+                )
                 self.n_boot = st.slider("Number of Bootstrap Samples", min_value=100, max_value=10000, value=1000, step=100)
                 self.seed = st.number_input("Seed", min_value=0, value=42)
+                self.workers = worker_input()
 
                 # Color and Palette selection
                 self.color = st.color_picker("Pick a single color for the plot", "#000000")
@@ -90,15 +98,22 @@ class BarplotVisualizer:
         # Handling 'dodge' if set to 'auto'
         dodge_value = self.dodge if self.dodge != "auto" else True
 
+        # Bootstrap the confidence intervals of every bar in one batched pass
+        value, group = (self.y, self.x) if self.orientation == "v" else (self.x, self.y)
+        data, errorbar = bootstrap_errorbar(
+            self.data, value, [group, self.hue], self.estimator, self.errorbar, self.n_boot, self.seed,
+            workers=self.workers
+        )
+
         # Generate the barplot using seaborn
         sns.barplot(
-            data=self.data,
+            data=data,
             x=self.x,
             y=self.y,
             hue=self.hue,
             hue_order=self.hue_order,
             estimator=self.estimator,
-            errorbar=self.errorbar,
+            errorbar=errorbar,
             n_boot=self.n_boot,
             seed=self.seed,
             color=self.color,
@@ -115,4 +130,6 @@ class BarplotVisualizer:
 
         # Plot the graph only if the button is pressed
         st.pyplot(fig)
+        show_timings(getattr(errorbar, "timings", None))
+        show_cache_stats(errorbar)
         self.saved_plots.append(fig)
@@ -2,12 +2,15 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import streamlit as st
 from itertools import cycle
+from PROFILE import get_profile
+from PREVIEW import preview_dataframe
 
 class BoxenplotVisualizer:
     def __init__(self, data, saved_plots):
         self.data = data
         self.saved_plots = saved_plots
-        self.columns = self.data.columns.tolist()
+        self.profile = get_profile(self.data)
+        self.columns = self.profile.columns
 
     def display(self):
         # Create tabs for Plotting and Documents sections
@@ -18,7 +21,7 @@ class BoxenplotVisualizer:
             st.header("Boxenplot Generator")
             st.subheader("Core Data and Axes Parameters")
             st.info("The data is already loaded.")
-            st.dataframe(self.data)
+            preview_dataframe(self.data, self.profile)
 
             # Create two columns for the plot settings
             col1, col2 = st.columns(2,border=True)
@@ -33,11 +36,11 @@ class BoxenplotVisualizer:
                 hue_norm = None
                 hue_order = None
                 if hue:
-                    if hue in self.data.select_dtypes(include=["int", "float"]).columns.tolist():
+                    if hue in self.profile.numeric_columns:
                         hue_norm = st.text_input("Enter a range to normalize values (e.g., (1, 2))")
                         hue_norm = eval(hue_norm) if hue_norm else None
                     else:
-                        hue_order = st.multiselect("Select the hue order", self.data[hue].unique().tolist())
+                        hue_order = st.multiselect("Select the hue order", self.profile.unique_values(hue))
 
                 # Color and Palette selection
                 color = st.color_picker("Pick a single color for the plot", "#000000")
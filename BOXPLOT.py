@@ -2,15 +2,18 @@ import streamlit as st
 import seaborn as sns
 import matplotlib.pyplot as plt
 from itertools import cycle
+from PROFILE import get_profile
+from PREVIEW import preview_dataframe
 
 class Boxplot:
     def __init__(self, data, saved_plots):
         # Initialize with data and a list of saved plots
         self.data = data
         self.saved_plots = saved_plots
-        self.numeric_columns = self.data.select_dtypes(include=["int", "float"]).columns.tolist()
-        self.categorical_columns = self.data.select_dtypes(exclude=["int", "float"]).columns.tolist()
-        self.columns = self.data.columns.tolist()
+        self.profile = get_profile(self.data)
+        self.numeric_columns = self.profile.numeric_columns
+        self.categorical_columns = self.profile.categorical_columns
+        self.columns = self.profile.columns
 
     def display(self):
         tab1, tab2 = st.tabs(["Plots", "Documents"])
@@ -19,7 +22,7 @@ class Boxplot:
             st.header("Boxplot Generator")
             st.subheader("Core Data and Axes Parameters")
             st.info("The data is already loaded.")
-            st.dataframe(self.data)
+            preview_dataframe(self.data, self.profile)
 
             # Create two columns for parameter layout
             col1, col2 = st.columns(2,border=True)
@@ -40,7 +43,7 @@ class Boxplot:
                         self.hue_norm = st.text_input("Enter a range to normalize values (e.g., (1, 2))")
                         self.hue_norm = eval(self.hue_norm) if self.hue_norm else None
                     else:
-                        self.hue_order = st.multiselect("Select the hue order", self.data[self.hue].unique().tolist())
+                        self.hue_order = st.multiselect("Select the hue order", self.profile.unique_values(self.hue))
 
                 # Palette selection
                 self.palette = st.selectbox(
@@ -1,15 +1,21 @@
 import streamlit as st
 import seaborn as sns
 import matplotlib.pyplot as plt
+from contextlib import nullcontext
 from itertools import cycle
+from PROFILE import get_profile
+from PREVIEW import preview_dataframe
+from ERRORBARS import bootstrap_errorbar
+from SWARM import sweep_beeswarm, show_swarm_report
 
 class Catplot:
     def __init__(self, data, saved_plots):
         self.data = data
         self.saved_plots = saved_plots
-        self.numeric_columns = self.data.select_dtypes(include=["int", "float"]).columns.tolist()
-        self.categorical_columns = self.data.select_dtypes(exclude=["int", "float"]).columns.tolist()
-        self.columns = self.data.columns.tolist()
+        self.profile = get_profile(self.data)
+        self.numeric_columns = self.profile.numeric_columns
+        self.categorical_columns = self.profile.categorical_columns
+        self.columns = self.profile.columns
 
     def display(self):
         tab1, tab2 = st.tabs(["Plots", "Documents"])
@@ -19,7 +25,7 @@ class Catplot:
             st.subheader("Core Data and Axes Parameters")
             st.info("The data is already loaded.")
             with st.expander("data frame is here"):
-                st.dataframe(self.data)
+                preview_dataframe(self.data, self.profile)
 
             # Create two columns for parameters
             col1, col2 = st.columns(2,border=True)
@@ -39,7 +45,7 @@ class Catplot:
                         self.hue_norm = st.text_input("Enter a range to normalize values (e.g., (1, 2))")
                         self.hue_norm = eval(self.hue_norm) if self.hue_norm else None
                     else:
-                        self.hue_order = st.multiselect("Select the hue order", self.data[self.hue].unique().tolist())
+                        self.hue_order = st.multiselect("Select the hue order", self.profile.unique_values(self.hue))
 
                 self.palette = st.selectbox(
                     "Select a color palette",
@@ -52,16 +58,16 @@ class Catplot:
             # Column 2: Statistical and Layout Parameters
             with col2:
                 # Error bar and estimator
-                self.errorbar = st.selectbox("Select error bar method", [None, "ci", "pi", "se", "sd"])
+                self.errorbar = st.selectbox("Select error bar method", [None, "analytic", "ci", "pi", "se", "sd"])
                 self.estimator = st.selectbox("Select estimator", ["mean", "median", "std"])
 
                 # Facet parameters
                 self.row = st.selectbox("Facet by rows", [None] + self.columns, index=0)
                 if self.row:
-                    self.row_order = self.data[self.row].unique().tolist() if self.row else None
+                    self.row_order = self.profile.unique_values(self.row) if self.row else None
                 self.col = st.selectbox("Facet by columns", [None] + self.columns, index=0)
                 if self.col:
-                    self.col_order = self.data[self.col].unique().tolist() if self.col else None
+                    self.col_order = self.profile.unique_values(self.col) if self.col else None
                     self.col_wrap = st.number_input(
                         "Wrap columns at specified width", min_value=1, max_value=5, value=3
                     ) if self.col else None
@@ -81,7 +87,7 @@ class Catplot:
                 self.seed = st.number_input("Random seed", value=None)
                 self.units = st.selectbox("Units", [None] + self.columns, index=0)
                 self.weights = st.selectbox("Weights", [None] + self.columns, index=0)
-                self.order = st.multiselect("Order of categories", self.data[self.x].unique().tolist()) if self.x else None
+                self.order = st.multiselect("Order of categories", self.profile.unique_values(self.x)) if self.x else None
                 self.orient = st.selectbox("Orientation", ["v", "h"])
                 self.color = st.selectbox("Color", [None] + self.columns, index=0)
                 self.shareX = st.checkbox("Share X")
@@ -91,18 +97,32 @@ class Catplot:
             # Generate Plot Button
             if st.button("Generate Plot", use_container_width=True, type='primary'):
                 try:
+                    data, errorbar = self.data, self.errorbar
+                    # Bar and point kinds bootstrap every facet and hue group; batch them in one pass
+                    if self.kind in ("bar", "point"):
+                        value, group = (self.y, self.x) if self.orient == "v" else (self.x, self.y)
+                        data, errorbar = bootstrap_errorbar(
+                            self.data, value, [group, self.hue, self.row, self.col],
+                            self.estimator, self.errorbar, self.n_boot, self.seed,
+                            units=self.units, weights=self.weights
+                        )
+
+                    # Swarms are laid out by the sweep-line engine, with a strip fallback
+                    swarm_report = []
+                    swarm_layout = sweep_beeswarm(swarm_report) if self.kind == "swarm" else nullcontext()
 
                     # Pass row_order and col_order only if not empty
-                    fig = sns.catplot(
-                        data=self.data, x=self.x, y=self.y, hue=self.hue, hue_order=self.hue_order,
-                        palette=self.palette, kind=self.kind, estimator=self.estimator, errorbar=self.errorbar,
-                        n_boot=self.n_boot, seed=self.seed, units=self.units, weights=self.weights,
-                        order=self.order, hue_norm=self.hue_norm, row=self.row, col=self.col,
-                        height=self.height, aspect=self.aspect, log_scale=self.log_scale,
-                        native_scale=self.native_scale, formatter=None, orient=self.orient, color=self.color,
-                        legend=self.legend, legend_out=self.legend_out, sharex=self.shareX, sharey=self.shareY,
-                        margin_titles=self.marginTitles, facet_kws=None
-                    )
+                    with swarm_layout:
+                        fig = sns.catplot(
+                            data=data, x=self.x, y=self.y, hue=self.hue, hue_order=self.hue_order,
+                            palette=self.palette, kind=self.kind, estimator=self.estimator, errorbar=errorbar,
+                            n_boot=self.n_boot, seed=self.seed, units=self.units, weights=self.weights,
+                            order=self.order, hue_norm=self.hue_norm, row=self.row, col=self.col,
+                            height=self.height, aspect=self.aspect, log_scale=self.log_scale,
+                            native_scale=self.native_scale, formatter=None, orient=self.orient, color=self.color,
+                            legend=self.legend, legend_out=self.legend_out, sharex=self.shareX, sharey=self.shareY,
+                            margin_titles=self.marginTitles, facet_kws=None
+                        )
 
                     # Set row_order and col_order if they are valid
                     if self.row_order:
@@ -111,6 +131,7 @@ class Catplot:
                         fig.set_col_order(self.col_order)
                         
                     st.pyplot(fig)
+                    show_swarm_report(swarm_report)
                     self.saved_plots.append(fig)
                 except Exception as e:
                     st.error(f"Error generating plot: {e}")
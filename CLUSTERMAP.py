@@ -2,12 +2,19 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import streamlit as st
 from itertools import cycle
+from PROFILE import get_profile
+from PREVIEW import preview_dataframe
+from LINKAGE import (
+    PRECLUSTER_MODES, TRUNCATE_MODES, LINKAGE_CENTROIDS, LINKAGE_MEMORY_MB, cluster_matrix, truncated_matrix,
+    leaf_order, show_linkage_stats
+)
 
 class ClustermapVisualizer:
     def __init__(self, data, saved_plots):
         self.data = data
         self.saved_plots = saved_plots
-        self.columns = self.data.columns.tolist()
+        self.profile = get_profile(self.data)
+        self.columns = self.profile.columns
 
     def display(self):
         self.tab1, self.tab2 = st.tabs(["Plots", "Documents"])
@@ -16,7 +23,7 @@ class ClustermapVisualizer:
             st.header("Clustermap Generator")
             st.subheader("Core Data and Axes Parameters")
             st.info("The data is already loaded.")
-            st.dataframe(self.data)
+            preview_dataframe(self.data, self.profile)
 
             # Select columns for the clustermap
             self.columns_to_use = st.multiselect("Select columns for the clustermap", self.columns, default=self.columns)
@@ -38,6 +45,23 @@ class ClustermapVisualizer:
             self.cbar_pos = st.text_input("Colorbar Position", "(0.02, 0.8, 0.05, 0.18)")
             self.tree_kws = st.text_input("Tree Keyword Arguments (JSON format)", "{}")
 
+            st.subheader("Large Matrices")
+            self.precluster = st.selectbox(
+                "Pre-cluster Rows into Centroids", PRECLUSTER_MODES,
+                help="auto: only when the exact row linkage would exceed the memory cap"
+            )
+            self.n_centroids = st.number_input("Row Centroids", min_value=2, value=LINKAGE_CENTROIDS)
+            self.memory_mb = st.number_input(
+                "Linkage Memory Cap (MB)", min_value=1, value=LINKAGE_MEMORY_MB,
+                help="Largest condensed distance matrix (with scipy's working copy) an exact linkage may build"
+            )
+            self.truncate = st.selectbox(
+                "Truncate Row Dendrogram", [None] + TRUNCATE_MODES,
+                help="lastp: keep the top p leaves; level: keep p levels below the root. "
+                     "Each truncated leaf is drawn as one band of its rows' mean"
+            )
+            self.truncate_p = st.number_input("Truncate At (p)", min_value=1, value=50)
+
             # Generate Plot Button
             if st.button("Generate Clustermap"):
                 self.generate_plot()
@@ -57,28 +81,64 @@ class ClustermapVisualizer:
                 st.info("No plots saved yet.")
 
     def generate_plot(self):
+        try:
+            # Linkages come from the cache; clustermap only draws them
+            clustered = cluster_matrix(
+                self.data, self.columns_to_use, method=self.method, metric=self.metric, z_score=self.z_score,
+                standard_scale=self.standard_scale, row_cluster=self.row_cluster, col_cluster=self.col_cluster,
+                precluster=self.precluster, n_centroids=self.n_centroids, memory_mb=self.memory_mb
+            )
+        except Exception as e:
+            st.error(f"Error clustering the data: {e}")
+            return
+
+        matrix, row_linkage, bands = clustered["matrix"], clustered["row_linkage"], None
+        if self.truncate and row_linkage is not None:
+            try:
+                matrix, row_linkage, bands = truncated_matrix(clustered, self.truncate, self.truncate_p)
+            except Exception as e:
+                st.error(f"Error truncating the dendrogram: {e}")
+                return
+
+        row_colors = eval(self.row_colors) or None  # Convert string to list/series
+        if len(matrix) != len(self.data) and row_colors is not None:
+            # Colors are given per row, and the rows drawn are centroids or bands
+            st.warning("Row colors are left out when rows are pre-clustered or combined into bands.")
+            row_colors = None
+
         # Prepare the arguments for clustermap
         plot_args = {
-            'data': self.data[self.columns_to_use],
-            'method': self.method,
-            'metric': self.metric,
-            'z_score': self.z_score,
-            'standard_scale': self.standard_scale,
+            'data': matrix,
+            'row_linkage': row_linkage,
+            'col_linkage': clustered["col_linkage"],
             'figsize': (self.figsize, self.figsize),
             'cbar_kws': eval(self.cbar_kws),  # Convert string to dictionary
             'row_cluster': self.row_cluster,
             'col_cluster': self.col_cluster,
-            'row_colors': eval(self.row_colors),  # Convert string to list/series
-            'col_colors': eval(self.col_colors),  # Convert string to list/series
-            'mask': self.mask,
+            'row_colors': row_colors,
+            'col_colors': eval(self.col_colors) or None,  # Convert string to list/series
+            'mask': matrix.isna() if self.mask else None,
             'dendrogram_ratio': self.dendrogram_ratio,
             'colors_ratio': self.colors_ratio,
             'cbar_pos': eval(self.cbar_pos),  # Convert string to tuple
             'tree_kws': eval(self.tree_kws)  # Convert string to dictionary
         }
 
-        fig = sns.clustermap(**plot_args)
+        try:
+            g = sns.clustermap(**plot_args)
+        except Exception as e:
+            st.error(f"Error generating plot: {e}")
+            return
 
-        if st.button("Plot the graph", use_container_width=True):
-            st.pyplot(fig)
-            self.saved_plots.append(fig)
+        st.pyplot(g.figure)
+        show_linkage_stats(clustered)
+        if bands is not None:
+            st.caption(f"Row dendrogram truncated to {len(matrix):,} leaves, each drawn as the mean of its rows")
+        if clustered["row_linkage"] is not None:
+            st.download_button(
+                label="Download Leaf Order (CSV)",
+                data=leaf_order(clustered, self.data.index, bands).to_csv(index=False),
+                file_name="clustermap_leaf_order.csv",
+                mime="text/csv"
+            )
+        self.saved_plots.append(g.figure)
@@ -0,0 +1,235 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scipy import stats
+from PROFILE import data_fingerprint
+
+CORRELATION_METHODS = ["pearson", "spearman", "kendall", "covariance"]
+# Columns per block; every pair of blocks is one task
+CORR_BLOCK = 64
+# Threads computing blocks; the matrix products release the GIL
+CORR_WORKERS = int(os.environ.get("CORR_WORKERS", os.cpu_count() or 1))
+# Correlation matrices kept across reruns and sessions
+CORR_CACHE_SIZE = int(os.environ.get("CORR_CACHE_SIZE", "64"))
+# Relative round-off of a one-pass pair variance, per row summed
+VARIANCE_ROUNDOFF = 4 * np.finfo(float).eps
+
+
+class CorrelationCache:
+    """LRU of correlation and covariance matrices, so restyling a heatmap does not recompute them."""
+
+    def __init__(self, max_entries=CORR_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Streamlit serves every session from its own thread
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            matrix = self.entries[key]
+        # A hit did no work of its own
+        matrix = matrix.copy()
+        matrix.attrs.update(seconds=0.0, cached=True)
+        return matrix
+
+    def put(self, key, matrix):
+        with self.lock:
+            self.entries[key] = matrix
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return matrix
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "limit": self.max_entries,
+            }
+
+
+# Shared by every session served by this process
+corr_cache = CorrelationCache()
+
+
+def _block_pairs(n_columns, block=CORR_BLOCK):
+    starts = range(0, n_columns, block)
+    blocks = [slice(start, min(start + block, n_columns)) for start in starts]
+    return [(rows, cols) for i, rows in enumerate(blocks) for cols in blocks[i:]]
+
+
+def _run_blocks(func, pairs, workers):
+    if workers > 1 and len(pairs) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(lambda pair: func(*pair), pairs))
+    else:
+        for pair in pairs:
+            func(*pair)
+
+
+def _moments(values, present, workers, covariance=False):
+    """Pairwise-complete covariance or Pearson correlation of the columns of `values`.
+
+    Each pair uses the rows where both columns are present, as pandas does. Columns are
+    centred first so the one-pass sums stay accurate; with no missing values the pair
+    sums reduce to a single matrix product. A pair variance within round-off of zero
+    counts as zero, so constant pairs give NaN correlations and zero covariances.
+    """
+    n_columns = values.shape[1]
+    complete = bool(present.all())
+    if complete:
+        centred = values - values.mean(axis=0)
+        sums, square_sums = centred.sum(axis=0), np.einsum("ij,ij->j", centred, centred)
+    else:
+        with np.errstate(invalid="ignore"):
+            centred = np.where(present, values - np.nanmean(values, axis=0), 0)
+        weights, squares = present.astype(float), centred ** 2
+    result = np.full((n_columns, n_columns), np.nan)
+
+    def block(rows, cols):
+        sxy = centred[:, rows].T @ centred[:, cols]
+        if complete:
+            n = np.full(sxy.shape, float(len(values)))
+            sx, sy = np.broadcast_to(sums[rows, None], sxy.shape), np.broadcast_to(sums[None, cols], sxy.shape)
+            sxx = np.broadcast_to(square_sums[rows, None], sxy.shape)
+            syy = np.broadcast_to(square_sums[None, cols], sxy.shape)
+        else:
+            n = weights[:, rows].T @ weights[:, cols]
+            sx = centred[:, rows].T @ weights[:, cols]
+            sy = weights[:, rows].T @ centred[:, cols]
+            sxx = squares[:, rows].T @ weights[:, cols]
+            syy = weights[:, rows].T @ squares[:, cols]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            var_x, var_y = sxx - sx ** 2 / n, syy - sy ** 2 / n
+            # A column constant on the shared rows is left a variance of round-off, not zero
+            flat = (var_x <= VARIANCE_ROUNDOFF * n * sxx) | (var_y <= VARIANCE_ROUNDOFF * n * syy)
+            cov = (sxy - sx * sy / n) / (n - 1)
+            if covariance:
+                value = np.where(flat & (n > 1), 0.0, cov)
+            else:
+                value = np.clip(cov / np.sqrt(var_x * var_y / (n - 1) ** 2), -1, 1)
+                value[flat] = np.nan
+        value[n < (1 if covariance else 2)] = np.nan
+        result[rows, cols] = value
+        result[cols, rows] = value.T
+
+    _run_blocks(block, _block_pairs(n_columns), workers)
+    return result
+
+
+def _rank_columns(values, present, workers):
+    ranks = np.full(values.shape, np.nan)
+
+    def rank(column):
+        ranks[present[:, column], column] = stats.rankdata(values[present[:, column], column])
+
+    _run_blocks(rank, [(column,) for column in range(values.shape[1])], workers)
+    return ranks
+
+
+def _pairwise(values, present, statistic, pairs, result):
+    # Pairs are computed on the rows where both columns are present
+    for a, b in pairs:
+        both = present[:, a] & present[:, b]
+        if both.sum() < 2:
+            continue
+        result[a, b] = result[b, a] = statistic(values[both, a], values[both, b])
+
+
+def _spearman(values, present, workers):
+    """Spearman's rho: Pearson on the ranks, re-ranked per pair where either column has gaps (as pandas)."""
+    result = _moments(_rank_columns(values, present, workers), present, workers)
+    gaps = np.flatnonzero(~present.all(axis=0))
+    pairs = [(a, b) for a in gaps for b in range(values.shape[1]) if a != b and (b not in gaps or b > a)]
+
+    def rho(x, y):
+        # Constant ranks give NaN, as in pandas
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.corrcoef(stats.rankdata(x), stats.rankdata(y))[0, 1]
+
+    _run_blocks(
+        lambda chunk: _pairwise(values, present, rho, chunk, result),
+        [(pairs[start:start + CORR_BLOCK],) for start in range(0, len(pairs), CORR_BLOCK)], workers
+    )
+    return result
+
+
+def _kendall(values, present, workers):
+    """Kendall's tau-b per pair, as pandas computes it with scipy."""
+    n_columns = values.shape[1]
+    result = np.full((n_columns, n_columns), np.nan)
+    pairs = [(a, b) for a in range(n_columns) for b in range(a + 1, n_columns)]
+
+    def tau(x, y):
+        return stats.kendalltau(x, y).statistic
+
+    _run_blocks(
+        lambda chunk: _pairwise(values, present, tau, chunk, result),
+        [(pairs[start:start + CORR_BLOCK],) for start in range(0, len(pairs), CORR_BLOCK)], workers
+    )
+    np.fill_diagonal(result, np.where(present.sum(axis=0) >= 1, 1.0, np.nan))
+    return result
+
+
+def correlation_matrix(data, columns, method="pearson", workers=CORR_WORKERS):
+    """Correlation (or covariance) of `columns`, pairwise-complete like DataFrame.corr/cov.
+
+    Blocks of columns are computed on `workers` threads and the matrix is cached per
+    column contents, columns and method. The result's attrs hold "seconds" and "cached".
+    """
+    columns = list(columns)
+    key = (data_fingerprint(data, columns), method)
+    matrix = corr_cache.get(key)
+    if matrix is not None:
+        return matrix
+
+    start = time.perf_counter()
+    values = data[columns].to_numpy(dtype=float)
+    present = ~np.isnan(values)
+    if method == "kendall":
+        result = _kendall(values, present, workers)
+    elif method == "spearman":
+        result = _spearman(values, present, workers)
+    else:
+        result = _moments(values, present, workers, covariance=method == "covariance")
+    if method in ("pearson", "spearman"):
+        # A column is perfectly correlated with itself wherever it varies
+        np.fill_diagonal(result, np.where(np.isnan(np.diag(result)), np.nan, 1.0))
+    matrix = pd.DataFrame(result, index=columns, columns=columns)
+    matrix.attrs.update(seconds=time.perf_counter() - start, cached=False)
+    return corr_cache.put(key, matrix)
+
+
+def correlation_workers_input(key=None):
+    """Number input for the threads computing correlation blocks."""
+    return st.number_input(
+        "Correlation threads", min_value=1, max_value=max(64, CORR_WORKERS), value=CORR_WORKERS, key=key,
+        help="Threads computing blocks of the correlation matrix"
+    )
+
+
+def show_correlation_stats(matrix):
+    """One-line summary of how the last matrix was obtained, with the cache state."""
+    cache = corr_cache.stats()
+    source = "reused from cache" if matrix.attrs.get("cached") else f"computed in {matrix.attrs.get('seconds', 0):.2f}s"
+    st.caption(
+        f"{matrix.shape[0]}×{matrix.shape[1]} matrix {source} · correlation cache: {cache['entries']}/{cache['limit']} "
+        f"results · {cache['hits']} hits · {cache['misses']} misses"
+    )
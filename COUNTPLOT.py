@@ -2,12 +2,15 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import streamlit as st
 from itertools import cycle
+from PROFILE import get_profile
+from PREVIEW import preview_dataframe
 
 class CountplotVisualizer:
     def __init__(self, data, saved_plots):
         self.data = data
         self.saved_plots = saved_plots
-        self.columns = self.data.columns.tolist()
+        self.profile = get_profile(self.data)
+        self.columns = self.profile.columns
 
     def display(self):
         self.tab1, self.tab2 = st.tabs(["Plots", "Documents"])
@@ -16,7 +19,7 @@ class CountplotVisualizer:
             st.header("Countplot Generator")
             st.subheader("Core Data and Axes Parameters")
             st.info("The data is already loaded.")
-            st.dataframe(self.data)
+            preview_dataframe(self.data, self.profile)
 
             # Create columns for layout organization
             col1, col2 = st.columns(2,border=True)
@@ -29,7 +32,7 @@ class CountplotVisualizer:
                 self.hue = st.selectbox("Select the column for hue", [None] + self.columns, index=0, key="hue_column")
                 self.hue_order = None
                 if self.hue:
-                    self.hue_order = st.multiselect("Select the hue order", self.data[self.hue].unique().tolist(), key="hue_order")
+                    self.hue_order = st.multiselect("Select the hue order", self.profile.unique_values(self.hue), key="hue_order")
 
                 # Statistic Type
                 self.stat = st.selectbox("Statistic to compute", ['count', 'percent', 'proportion', 'probability'], key="stat_compute")
@@ -0,0 +1,199 @@
+import os
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+import pyarrow as pa
+import pyarrow.feather as feather
+
+# Memory cap for parsed datasets kept across reruns and sessions (in megabytes)
+DEFAULT_CACHE_MB = int(os.environ.get("DATASET_CACHE_MB", "1024"))
+
+# Parsed uploads are written here once and memory-mapped by every later session
+SPILL_DIR = os.environ.get("DATASET_SPILL_DIR", os.path.join(tempfile.gettempdir(), "seaborn_app_datasets"))
+SPILL_ENABLED = os.environ.get("DATASET_SPILL", "1") != "0"
+# Disk cap for the spill directory; least recently used files are deleted past it (in megabytes)
+SPILL_MAX_MB = int(os.environ.get("DATASET_SPILL_MAX_MB", "4096"))
+
+
+def content_hash(uploaded_file, options=None, chunk_size=8 * 1024 * 1024):
+    """Hash the uploaded bytes together with the parse options that produced the frame."""
+    digest = hashlib.blake2b(digest_size=16)
+    buffer = uploaded_file.getbuffer()
+    # Hash the buffer in slices so no second copy of the upload is made
+    for start in range(0, len(buffer), chunk_size):
+        digest.update(buffer[start:start + chunk_size])
+    digest.update(repr(sorted((options or {}).items())).encode())
+    return digest.hexdigest()
+
+
+def spill_path(key):
+    return os.path.join(SPILL_DIR, f"{key}.arrow")
+
+
+def spill_to_disk(df, key):
+    """Write the frame once as an uncompressed Arrow IPC (Feather v2) file named by its key."""
+    path = spill_path(key)
+    if os.path.exists(path):
+        return path
+    os.makedirs(SPILL_DIR, exist_ok=True)
+    # Write under a private name first so a concurrent reader never sees a partial file
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    # Compression would force a decode into private memory on every load
+    try:
+        feather.write_feather(df, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+
+def prune_spill_dir(max_bytes=SPILL_MAX_MB * 1024 * 1024, keep=None):
+    """Delete the least recently used spilled files until the directory fits in `max_bytes`.
+
+    Loads touch their file, so modification times order the files by use. `keep` (a key)
+    is never deleted. Sessions that already mapped a deleted file keep reading it; the
+    space is freed once they let go. Returns the number of files deleted.
+    """
+    try:
+        names = [name for name in os.listdir(SPILL_DIR) if name.endswith(".arrow")]
+    except FileNotFoundError:
+        return 0
+    files = []
+    for name in names:
+        try:
+            info = os.stat(os.path.join(SPILL_DIR, name))
+        except FileNotFoundError:
+            continue
+        files.append((info.st_mtime, info.st_size, name))
+    files.sort()
+    total = sum(size for _, size, _ in files)
+    removed = 0
+    for _, size, name in files:
+        if total <= max_bytes:
+            break
+        if keep is not None and name == f"{keep}.arrow":
+            continue
+        try:
+            os.remove(os.path.join(SPILL_DIR, name))
+        except OSError:
+            # Already gone, or still open where open files cannot be deleted
+            continue
+        total -= size
+        removed += 1
+    return removed
+
+
+def load_spilled(key):
+    """Memory-map a spilled frame; numeric columns without nulls stay backed by the shared file."""
+    path = spill_path(key)
+    if not os.path.exists(path):
+        return None
+    try:
+        source = pa.memory_map(path, "r")
+    except FileNotFoundError:
+        # Pruned by another session in the meantime
+        return None
+    # Mark the file as recently used for prune_spill_dir
+    os.utime(path)
+    table = pa.ipc.open_file(source).read_all()
+    # split_blocks lets pandas wrap the mapped buffers column by column instead of consolidating copies
+    return table.to_pandas(split_blocks=True)
+
+
+class DatasetCache:
+    def __init__(self, max_bytes=DEFAULT_CACHE_MB * 1024 * 1024, spill=SPILL_ENABLED,
+                 spill_max_bytes=SPILL_MAX_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.spill = spill
+        self.spill_max_bytes = spill_max_bytes
+        self.disk_loads = 0
+        self.spill_evictions = 0
+        self.entries = OrderedDict()
+        self.sizes = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Streamlit serves every session from its own thread
+        self.lock = threading.Lock()
+
+    @property
+    def total_bytes(self):
+        return sum(self.sizes.values())
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key, df):
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        # Tag the frame so downstream caches can key on the dataset without rehashing it
+        df.attrs["content_hash"] = key
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return df
+            self.entries[key] = df
+            self.sizes[key] = size
+            # Evict least recently used frames, but always keep the one just loaded
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                old_key, _ = self.entries.popitem(last=False)
+                del self.sizes[old_key]
+                self.evictions += 1
+        return df
+
+    def get_or_load(self, key, loader):
+        df = self.get(key)
+        if df is not None:
+            return df
+
+        if self.spill:
+            df = self._load_from_disk(key)
+            if df is not None:
+                return self.put(key, df)
+
+        df = loader()
+        if df is None or isinstance(df, str):
+            return df
+        if self.spill:
+            # Swap the private parsed copy for the memory-mapped one
+            try:
+                spill_to_disk(df, key)
+                removed = prune_spill_dir(self.spill_max_bytes, keep=key)
+                with self.lock:
+                    self.spill_evictions += removed
+                df = self._load_from_disk(key)
+            except (pa.ArrowException, OSError, ValueError, TypeError) as e:
+                # Mixed-type object columns cannot always be written; keep the in-memory frame
+                print(f"Could not spill dataset {key} to disk: {e}")
+        return self.put(key, df)
+
+    def _load_from_disk(self, key):
+        df = load_spilled(key)
+        if df is not None:
+            with self.lock:
+                self.disk_loads += 1
+        return df
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_loads": self.disk_loads,
+                "spill_evictions": self.spill_evictions,
+                "memory_mb": self.total_bytes / (1024 * 1024),
+                "limit_mb": self.max_bytes / (1024 * 1024),
+            }
+
+
+# Shared by every session served by this process
+dataset_cache = DatasetCache()
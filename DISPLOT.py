@@ -3,14 +3,19 @@ import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 from itertools import cycle
+from PROFILE import get_profile
+from PREVIEW import preview_dataframe
+from KDE import BINNED_MIN_ROWS, BIN_WEIGHT, bin_groups
+from HISTOGRAM import HIST_MIN_ROWS, HIST_WEIGHT, histogram_frame
 
 class DisPlot:
     def __init__(self, data, saved_plots):
         self.data = data
         self.saved_plots = saved_plots
-        self.numeric_columns = self.data.select_dtypes(include=["int", "float"]).columns.tolist()
-        self.categorical_columns = self.data.select_dtypes(exclude=["int", "float"]).columns.tolist()
-        self.columns = self.data.columns.tolist()
+        self.profile = get_profile(self.data)
+        self.numeric_columns = self.profile.numeric_columns
+        self.categorical_columns = self.profile.categorical_columns
+        self.columns = self.profile.columns
 
     def display(self):
         tab1, tab2, tab3 = st.tabs(["Plotting", "Plotted Plots Section", "Document Section"])
@@ -20,7 +25,7 @@ class DisPlot:
             st.subheader("Core Data and Axes Parameters")
             st.info("The data is already loaded.")
             with st.expander("Data Frame is inside"):
-                st.dataframe(self.data)
+                preview_dataframe(self.data, self.profile)
 
             col1, col2 = st.columns(2,border=True)
             with col1:
@@ -43,15 +48,15 @@ class DisPlot:
                 self.log_scale=st.checkbox("Select the log scale")
 
             with col2:
-                self.hue_order = st.multiselect("Select the hue order", self.data[self.hue].unique().tolist(), key="hue_order_distplot") if self.hue else None
+                self.hue_order = st.multiselect("Select the hue order", self.profile.unique_values(self.hue), key="hue_order_distplot") if self.hue else None
                 self.hue_norm = None
                 if self.hue:
                     if self.hue in self.numeric_columns:
                         hue_norm_input = st.text_input("Enter a range to normalize values (e.g., 1, 2)", key="hue_norm_distplot")
                         self.hue_norm = tuple(map(float, hue_norm_input.split(','))) if hue_norm_input else None
 
-                self.row_order = self.data[self.row].unique().tolist() if self.row else None
-                self.col_order = self.data[self.col].unique().tolist() if self.col else None
+                self.row_order = self.profile.unique_values(self.row) if self.row else None
+                self.col_order = self.profile.unique_values(self.col) if self.col else None
 
         with tab2:
             st.header("Plotted Plots Section")
@@ -71,12 +76,31 @@ class DisPlot:
         # Plotting the graph based on user input
         if st.button("Generate Distplot", use_container_width=True, type='primary', key="plot_button_distplot"):
             try:
+                data, weights, kde_kws, hist_kws = self.data, self.weights, {}, {}
+                # Large univariate KDEs are fitted on linearly binned data instead of every row
+                if (self.kind == "kde" and not self.y and self.x in self.numeric_columns
+                        and self.profile.n_rows >= BINNED_MIN_ROWS):
+                    data, bandwidth = bin_groups(
+                        self.data, self.x, by=[self.hue, self.row, self.col], weights=self.weights,
+                        log_scale=self.log_scale
+                    )
+                    weights, kde_kws = BIN_WEIGHT, {"bw_method": bandwidth}
+                    st.caption(f"KDE fitted on {len(data):,} binned points standing for {self.profile.n_rows:,} rows")
+                # Large histograms are binned from the cached sorted column; the rug needs the rows
+                elif (self.kind == "hist" and not self.y and self.x in self.numeric_columns
+                        and self.hue not in self.numeric_columns and not self.rug and not self.log_scale
+                        and self.profile.n_rows >= HIST_MIN_ROWS):
+                    data, hist_kws = histogram_frame(
+                        self.data, self.x, by=[self.hue, self.row, self.col], weights=self.weights
+                    )
+                    weights = HIST_WEIGHT
+                    st.caption(f"Histogram of {self.profile.n_rows:,} rows binned from the cached sorted column")
                 fig = sns.displot(
-                    data=self.data, x=self.x, y=self.y, hue=self.hue, weights=self.weights, kind=self.kind,log_scale=self.log_scale if self.log_scale else None,
+                    data=data, x=self.x, y=self.y, hue=self.hue, weights=weights, kind=self.kind,log_scale=self.log_scale if self.log_scale else None,
                     rug=self.rug, legend=self.legend, palette=self.palette, hue_order=self.hue_order,
                     hue_norm=self.hue_norm, col_wrap=self.col_wrap, row=self.row, col=self.col, 
                     row_order=self.row_order, col_order=self.col_order, height=self.height, 
-                    aspect=self.aspect
+                    aspect=self.aspect, **kde_kws, **hist_kws
                 )
                 st.pyplot(fig)
                 self.saved_plots.append(fig)
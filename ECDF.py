@@ -3,12 +3,16 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import pandas as pd
 from itertools import cycle
+from PROFILE import get_profile
+from PREVIEW import preview_dataframe
+from ECDFSTEPS import ECDF_MIN_ROWS, ECDF_WEIGHT, axes_pixels, ecdf_frame, restore_count_edges
 
 class ECDFPlot:
     def __init__(self, data, saved_plots):
         self.data = data
         self.saved_plots = saved_plots
-        self.columns = self.data.columns.tolist()
+        self.profile = get_profile(self.data)
+        self.columns = self.profile.columns
 
     def display(self):
         tab1, tab2 = st.tabs(["Plots", "Documents"])
@@ -18,7 +22,7 @@ class ECDFPlot:
             st.subheader("Core Data and Axes Parameters")
             st.info("The data is already loaded.")
             with st.expander("Data Frame is here"):
-                st.dataframe(self.data)
+                preview_dataframe(self.data, self.profile)
 
             # Create two columns for parameters
             col1, col2 = st.columns(2,border=True)
@@ -41,7 +45,7 @@ class ECDFPlot:
                 self.stat = st.selectbox("Select the statistic", ["proportion", "percent", "count"])
                 self.complementary = st.checkbox("Complementary ECDF")
                 self.log_scale = st.checkbox("Log Scale")
-                self.hue_order = st.multiselect("Select the hue order (if applicable)", self.data[self.hue].unique().tolist()) if self.hue else None
+                self.hue_order = st.multiselect("Select the hue order (if applicable)", self.profile.unique_values(self.hue)) if self.hue else None
                 self.hue_norm = st.text_input("Enter hue normalization range (e.g., (1, 2))")
                 self.legend = st.checkbox("Show legend", value=True)
 
@@ -63,13 +67,26 @@ class ECDFPlot:
                             st.error("Invalid range format for hue normalization. Please enter a tuple like (1, 2).")
                             return
 
+                    # Large columns keep one step per pixel column instead of one per row
+                    data, weights, collapsed = self.data, self.weights, self.use_pixel_steps()
+                    if collapsed:
+                        data = ecdf_frame(
+                            self.data, self.x or self.y, hue=self.hue, weights=self.weights,
+                            pixels=axes_pixels(plt.gca(), vertical=not self.x), log_scale=self.log_scale
+                        )
+                        weights = ECDF_WEIGHT
+
                     # Generate ECDF plot using seaborn.ecdfplot
                     fig = sns.ecdfplot(
-                        data=self.data, x=self.x, y=self.y, hue=self.hue, weights=self.weights,
+                        data=data, x=self.x, y=self.y, hue=self.hue, weights=weights,
                         stat=self.stat, complementary=self.complementary, palette=self.palette,
                         hue_order=self.hue_order, hue_norm=self.hue_norm, log_scale=self.log_scale,
                         legend=self.legend
                     )
+                    if collapsed:
+                        if self.stat == "count":
+                            restore_count_edges(fig, vertical=not self.x)
+                        st.caption(f"ECDF of {self.profile.n_rows:,} rows drawn with {len(data):,} steps (within one pixel)")
 
                     # Display the plot
                     st.pyplot(plt.gcf())
@@ -91,3 +108,11 @@ class ECDFPlot:
                         st.pyplot(saved_plot)
             else:
                 st.info("No plots saved yet.")
+
+    def use_pixel_steps(self):
+        # Exactly one numeric data variable; numeric hues may have a level per row
+        variable = self.x if not self.y else self.y if not self.x else None
+        numeric = self.profile.numeric_columns
+        if variable not in numeric or self.hue in numeric:
+            return False
+        return self.profile.n_rows >= ECDF_MIN_ROWS
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+from HISTOGRAM import sorted_groups
+
+# Columns at least this long are drawn from pixel-collapsed steps instead of one vertex per row
+ECDF_MIN_ROWS = 50_000
+# Resolution st.pyplot renders figures at; steps are collapsed to pixel columns at this DPI
+ECDF_DPI = 200
+# Weight column of collapsed frames, named so it cannot clash with user columns
+ECDF_WEIGHT = "__ecdf_weight__"
+
+
+def axes_pixels(ax, dpi=ECDF_DPI, vertical=False):
+    """Width (or height) of `ax` in pixels once the figure is rendered at `dpi`."""
+    extent = ax.get_window_extent()
+    size = extent.height if vertical else extent.width
+    return max(int(np.ceil(size / ax.figure.dpi * dpi)), 1)
+
+
+def pixel_edges(values, pixels, log_scale=False):
+    """Data-space edges of `pixels` equal columns spanning the sorted `values`."""
+    lo, hi = values[0], values[-1]
+    if log_scale:
+        return 10 ** np.linspace(np.log10(lo), np.log10(hi), pixels + 1)
+    return np.linspace(lo, hi, pixels + 1)
+
+
+def ecdf_frame(data, variable, hue=None, weights=None, pixels=2000, log_scale=False):
+    """Collapse every pixel column of the step function to one weighted observation.
+
+    Each non-empty column keeps its first value carrying the total weight of the column,
+    so seaborn's weighted ECDF jumps by the exact amount at most one pixel early; stat
+    and complementary apply to the result as to the full data. A zero-weight point at
+    each group's maximum keeps the axis limits. Non-positive values are left out on a
+    log scale, as seaborn leaves them out.
+    """
+    column = sorted_groups(data, variable, [hue], weights)
+    all_values = column["values"]
+    if log_scale:
+        all_values = all_values[all_values > 0]
+    if not len(all_values):
+        return data.iloc[:0].assign(**{ECDF_WEIGHT: []})
+    edges = pixel_edges(all_values, pixels, log_scale)
+
+    parts = []
+    for labels, values, cumulative in column["groups"]:
+        start = np.searchsorted(values, 0, side="right") if log_scale else 0
+        values = values[start:]
+        if not len(values):
+            continue
+        totals = np.arange(start, start + len(values) + 1, dtype=float) if cumulative is None else cumulative[start:]
+        # Column starts; the outer edges are implied so round-off cannot drop the end points
+        positions = np.unique(np.r_[0, np.searchsorted(values, edges[1:-1], side="left")])
+        positions = np.append(positions[positions < len(values)], len(values))
+        points = values[positions[:-1]]
+        masses = totals[positions[1:]] - totals[positions[:-1]]
+        if points[-1] < values[-1]:
+            points, masses = np.append(points, values[-1]), np.append(masses, 0)
+        part = pd.DataFrame({variable: points, ECDF_WEIGHT: masses})
+        for col, label in labels.items():
+            part[col] = label
+        parts.append(part)
+
+    collapsed = pd.concat(parts, ignore_index=True)
+    for col in column["by"]:
+        # Keep category order and dtype so hue levels come out the same
+        if isinstance(column["dtypes"][col], pd.CategoricalDtype):
+            collapsed[col] = collapsed[col].astype(column["dtypes"][col])
+    return collapsed
+
+
+def restore_count_edges(ax, vertical=False):
+    """Pin the count axis at the full counts; seaborn pins it at the collapsed row count."""
+    for line in ax.lines:
+        stat = np.asarray(line.get_xdata() if vertical else line.get_ydata(), dtype=float)
+        edges = line.sticky_edges.x if vertical else line.sticky_edges.y
+        edges[:] = 0, np.nanmax(stat)
+    ax.autoscale_view()
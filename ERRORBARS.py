@@ -0,0 +1,400 @@
+import os
+import copy
+import time
+import warnings
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scipy import stats
+from PROFILE import data_fingerprint
+
+# Estimators whose bootstrap can be reduced for all groups at once with segment reductions
+VECTORIZED_ESTIMATORS = {"mean", "sum", "std", "var", "min", "max"}
+# Upper bound on the memory used by one chunk of resampled values
+CHUNK_BYTES = 64 * 1024 * 1024
+# Worker processes used for bootstraps that cannot be vectorized
+BOOTSTRAP_WORKERS = int(os.environ.get("BOOTSTRAP_WORKERS", os.cpu_count() or 1))
+# Below this many resampled values the pool costs more than it saves
+PARALLEL_MIN_DRAWS = 2_000_000
+# Regression resamples per seeded task
+REGRESSION_BLOCK = 50
+# Groups at least this large get a t interval under the "analytic" errorbar; smaller ones are bootstrapped
+ANALYTIC_MIN_SIZE = 30
+# Confidence-interval results kept across reruns and sessions
+CI_CACHE_SIZE = int(os.environ.get("CI_CACHE_SIZE", "32"))
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers):
+    """Process pool shared by every session, rebuilt when the worker count changes."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # Forking a threaded server is unsafe; spawned workers only import this module
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, os.getpid(), time.perf_counter() - start
+
+
+def _run_tasks(func, tasks, workers=1, timings=None):
+    """Run `func(*task)` for every task, in the pool when `workers` > 1; results keep task order.
+
+    Every task carries its own seed, so the results do not depend on where it ran.
+    """
+    if workers > 1 and len(tasks) > 1:
+        futures = [_get_pool(workers).submit(_timed, func, *task) for task in tasks]
+        outcomes = [future.result() for future in futures]
+    else:
+        outcomes = [_timed(func, *task) for task in tasks]
+    if timings is not None:
+        timings.extend({"worker": pid, "tasks": 1, "seconds": seconds} for _, pid, seconds in outcomes)
+    return [result for result, _, _ in outcomes]
+
+
+def _balanced_batches(weights, n_batches):
+    """Split item positions into at most `n_batches` lists of similar total weight."""
+    batches = [[] for _ in range(max(1, n_batches))]
+    loads = np.zeros(len(batches))
+    # Largest first onto the lightest batch
+    for item in np.argsort(weights, kind="stable")[::-1]:
+        target = int(np.argmin(loads))
+        batches[target].append(item)
+        loads[target] += weights[item]
+    return [sorted(batch) for batch in batches if batch]
+
+
+def _bootstrap_segments(segments, seeds, estimator, n_boot, chunk_bytes):
+    """Bootstrap `estimator` over each segment with its own seed; shape (len(segments), n_boot)."""
+    func = getattr(np, f"nan{estimator}", None) or getattr(np, estimator)
+    boots = np.empty((len(segments), n_boot))
+    for row, (segment, seed) in enumerate(zip(segments, seeds)):
+        rng = np.random.default_rng(seed)
+        chunk = max(1, chunk_bytes // (16 * len(segment)))
+        for b0 in range(0, n_boot, chunk):
+            b1 = min(n_boot, b0 + chunk)
+            idx = rng.integers(0, len(segment), size=(b1 - b0, len(segment)))
+            boots[row, b0:b1] = func(segment[idx], axis=1)
+    return boots
+
+
+def _segment_reduce(resampled, starts, sizes, estimator):
+    """Apply `estimator` to every contiguous group along axis 1 of a (chunk, rows) matrix."""
+    if estimator in ("min", "max"):
+        reducer = np.minimum if estimator == "min" else np.maximum
+        return reducer.reduceat(resampled, starts, axis=1)
+
+    sums = np.add.reduceat(resampled, starts, axis=1)
+    if estimator == "sum":
+        return sums
+    means = sums / sizes
+    if estimator == "mean":
+        return means
+    # Same ddof=0 definition as the np.nanstd / np.nanvar seaborn bootstraps with
+    squares = np.add.reduceat(resampled * resampled, starts, axis=1)
+    variances = np.maximum(squares / sizes - means * means, 0)
+    return variances if estimator == "var" else np.sqrt(variances)
+
+
+def bootstrap_groups(values, codes, n_groups=None, estimator="mean", n_boot=1000, seed=None,
+                     chunk_bytes=CHUNK_BYTES, workers=1, timings=None):
+    """Bootstrap distribution of `estimator` for every group, shape (n_groups, n_boot).
+
+    Rows are sorted by group once; each chunk of resamples then draws one index matrix
+    covering all groups, gathers the values and reduces each group's segment. Chunks only
+    bound memory: the random stream is consumed in the same order whatever the chunk size,
+    so a given seed always gives the same result. NaN values are ignored.
+
+    Estimators outside VECTORIZED_ESTIMATORS are bootstrapped group by group, each group
+    with a seed spawned from `seed`, and spread over `workers` processes when the work is
+    large enough. Per-task timings are appended to `timings` when a list is given.
+    """
+    values = np.asarray(values, dtype=float)
+    codes = np.asarray(codes)
+    valid = ~np.isnan(values) & (codes >= 0)
+    values, codes = values[valid], codes[valid]
+    if n_groups is None:
+        n_groups = int(codes.max()) + 1 if len(codes) else 0
+
+    order = np.argsort(codes, kind="stable")
+    values = values[order]
+    sizes = np.bincount(codes, minlength=n_groups)
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+    boots = np.full((n_groups, n_boot), np.nan)
+    present = np.flatnonzero(sizes)
+    if not len(present):
+        return boots
+
+    if estimator not in VECTORIZED_ESTIMATORS:
+        # One child seed per group code: the result is the same for any number of workers
+        seeds = np.random.SeedSequence(seed).spawn(n_groups)
+        if len(values) * n_boot < PARALLEL_MIN_DRAWS:
+            workers = 1
+        batches = _balanced_batches(sizes[present], workers)
+        tasks = [
+            ([values[starts[g]:starts[g] + sizes[g]] for g in present[batch]],
+             [seeds[g] for g in present[batch]], estimator, n_boot, chunk_bytes)
+            for batch in batches
+        ]
+        for batch, result in zip(batches, _run_tasks(_bootstrap_segments, tasks, workers, timings)):
+            boots[present[batch]] = result
+        return boots
+
+    rng = np.random.default_rng(seed)
+    # Every row of the index matrix belongs to a fixed group: offset + uniform draw within that group
+    row_starts = np.repeat(starts[present], sizes[present])
+    row_sizes = np.repeat(sizes[present], sizes[present]).astype(float)
+    segment_starts = np.concatenate([[0], np.cumsum(sizes[present])[:-1]])
+    n_rows = len(values)
+    # An index matrix and the gathered values per resampled row
+    chunk = max(1, chunk_bytes // (16 * n_rows))
+    for b0 in range(0, n_boot, chunk):
+        b1 = min(n_boot, b0 + chunk)
+        draws = rng.random((b1 - b0, n_rows))
+        np.multiply(draws, row_sizes, out=draws)
+        idx = draws.astype(np.intp)
+        idx += row_starts
+        boots[present, b0:b1] = _segment_reduce(values[idx], segment_starts, sizes[present], estimator).T
+    return boots
+
+
+def percentile_interval(boots, level=95):
+    """Percentile confidence interval of each row of a bootstrap matrix, shape (n, 2)."""
+    edge = (100 - level) / 2
+    # Empty groups have all-NaN rows and simply get a NaN interval
+    with np.errstate(all="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return np.nanpercentile(boots, [edge, 100 - edge], axis=1).T
+
+
+def _bootstrap_fits(x, y, grid, order, n_boot, seed):
+    """Polynomial fits on `n_boot` resamples of (x, y), evaluated on `grid`."""
+    rng = np.random.default_rng(seed)
+    fits = np.empty((n_boot, len(grid)))
+    for i in range(n_boot):
+        idx = rng.integers(0, len(x), len(x))
+        fits[i] = np.polyval(np.polyfit(x[idx], y[idx], order), grid)
+    return fits
+
+
+def bootstrap_regression(x, y, grid, order=1, n_boot=1000, seed=None, level=95, workers=1, timings=None):
+    """Percentile band of a polynomial regression on `grid`, shape (len(grid), 2).
+
+    Resamples are split into REGRESSION_BLOCK-sized tasks, each with a seed spawned from
+    `seed`, so the band is the same whatever the number of workers.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    valid = np.isfinite(x) & np.isfinite(y)
+    x, y = x[valid], y[valid]
+    grid = np.asarray(grid, dtype=float)
+
+    blocks = [min(REGRESSION_BLOCK, n_boot - b0) for b0 in range(0, n_boot, REGRESSION_BLOCK)]
+    seeds = np.random.SeedSequence(seed).spawn(len(blocks))
+    if len(x) * n_boot < PARALLEL_MIN_DRAWS:
+        workers = 1
+    tasks = [(x, y, grid, order, block, block_seed) for block, block_seed in zip(blocks, seeds)]
+    fits = np.concatenate(_run_tasks(_bootstrap_fits, tasks, workers, timings))
+    return percentile_interval(fits.T, level)
+
+
+class BootstrapErrorbar:
+    """Seaborn `errorbar` callable backed by intervals bootstrapped for every group up front.
+
+    Seaborn calls the errorbar function once per group with that group's values. The
+    intervals are computed in one batched pass when the object is built and looked up by
+    the row labels seaborn passes in. Groups that cannot be matched (e.g. values that
+    seaborn log-transformed) are bootstrapped on the spot with the same engine.
+    """
+
+    def __init__(self, data, value, groups, estimator="mean", n_boot=1000, seed=None, level=95, workers=1):
+        self.estimator = estimator
+        self.n_boot = n_boot
+        self.seed = seed
+        self.level = level
+        self.timings = []
+        self.cached = False
+
+        codes = data.groupby(groups, sort=False, dropna=False, observed=True).ngroup().to_numpy() \
+            if groups else np.zeros(len(data), dtype=int)
+        values = data[value].to_numpy(dtype=float)
+        n_groups = int(codes.max()) + 1 if len(codes) else 0
+
+        # The smallest integer type keeps cached lookups cheap on long frames
+        self.positions = pd.Series(codes.astype(np.min_scalar_type(max(n_groups, 1))), index=data.index)
+        valid = ~np.isnan(values)
+        self.sizes = np.bincount(codes[valid], minlength=n_groups)
+        self.sums = np.bincount(codes[valid], weights=values[valid], minlength=n_groups)
+        self.intervals = self._intervals(values, codes, n_groups, workers, self.timings)
+
+    def _intervals(self, values, codes, n_groups, workers=1, timings=None):
+        boots = bootstrap_groups(values, codes, n_groups, self.estimator, self.n_boot, self.seed,
+                                 workers=workers, timings=timings)
+        return percentile_interval(boots, self.level)
+
+    def _lookup(self, vals):
+        if not len(vals) or vals.index[0] not in self.positions.index:
+            return None
+        code = self.positions[vals.index[0]]
+        finite = vals.dropna()
+        # Only trust the precomputed interval if seaborn handed over the same numbers
+        if len(finite) != self.sizes[code] or not np.isclose(finite.sum(), self.sums[code]):
+            return None
+        return self.intervals[code]
+
+    def __call__(self, vals):
+        interval = self._lookup(vals)
+        if interval is None:
+            interval = self._intervals(vals.to_numpy(dtype=float), np.zeros(len(vals), dtype=int), 1)[0]
+        return tuple(interval)
+
+
+class AnalyticErrorbar(BootstrapErrorbar):
+    """Student t interval of the mean from one grouped pass; small groups are still bootstrapped."""
+
+    def _intervals(self, values, codes, n_groups, workers=1, timings=None):
+        valid = ~np.isnan(values)
+        moments = pd.Series(values[valid]).groupby(codes[valid]).agg(["count", "mean", "var"])
+        moments = moments.reindex(range(n_groups))
+        count = moments["count"].fillna(0).to_numpy()
+        mean = moments["mean"].to_numpy()
+        with np.errstate(all="ignore"):
+            half = stats.t.ppf((1 + self.level / 100) / 2, count - 1) * np.sqrt(moments["var"].to_numpy() / count)
+        intervals = np.column_stack([mean - half, mean + half])
+
+        small = (count > 0) & (count < ANALYTIC_MIN_SIZE)
+        if small.any():
+            # Only the rows of small groups go through the resampler
+            small_codes = np.where(small[codes], codes, -1)
+            intervals[small] = super()._intervals(values, small_codes, n_groups, workers, timings)[small]
+        return intervals
+
+
+class CICache:
+    """LRU of bootstrapped intervals, so restyling a chart does not redo its resamples."""
+
+    def __init__(self, max_entries=CI_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Streamlit serves every session from its own thread
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            errorbar = self.entries[key]
+        # A hit did no bootstrap work of its own
+        errorbar = copy.copy(errorbar)
+        errorbar.timings = []
+        errorbar.cached = True
+        return errorbar
+
+    def put(self, key, errorbar):
+        with self.lock:
+            self.entries[key] = errorbar
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return errorbar
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "limit": self.max_entries,
+            }
+
+
+# Shared by every session served by this process
+ci_cache = CICache()
+
+
+def bootstrap_errorbar(data, value, groups, estimator="mean", errorbar="ci", n_boot=1000, seed=None, workers=1,
+                       units=None, weights=None):
+    """Swap seaborn's per-group "ci" bootstrap for a batched one when the inputs allow it.
+
+    `errorbar="analytic"` uses t intervals for the mean of large groups (see
+    AnalyticErrorbar) and becomes a plain bootstrap for other estimators. Returns the frame
+    to plot (reindexed if its row labels are not unique) and the `errorbar` argument to
+    pass to seaborn. Seeded results are kept in `ci_cache`, keyed by the grouped columns
+    and every setting that changes the intervals.
+    """
+    if errorbar not in ("ci", "analytic"):
+        return data, errorbar
+    # Seaborn has no analytic mode: anything this engine cannot take goes back to its bootstrap
+    if not isinstance(estimator, str) or value is None or units is not None or weights is not None:
+        return data, "ci"
+    if value not in data or not pd.api.types.is_numeric_dtype(data[value]):
+        return data, "ci"
+    groups = [col for col in dict.fromkeys(groups) if col is not None]
+    if any(col not in data for col in groups):
+        return data, "ci"
+    engine = AnalyticErrorbar if errorbar == "analytic" and estimator == "mean" else BootstrapErrorbar
+
+    if not data.index.is_unique:
+        data = data.reset_index(drop=True)
+    seed = None if seed is None or pd.isna(seed) else int(seed)
+    if seed is None:
+        # Unseeded intervals are meant to vary between runs
+        return data, engine(data, value, groups, estimator, int(n_boot), seed, workers=int(workers))
+
+    key = (data_fingerprint(data, [value] + groups), estimator, engine.__name__, int(n_boot), seed, units)
+    cached = ci_cache.get(key)
+    if cached is not None:
+        return data, cached
+    return data, ci_cache.put(key, engine(data, value, groups, estimator, int(n_boot), seed, workers=int(workers)))
+
+
+def worker_input(key=None):
+    """Number input for the bootstrap worker count."""
+    return st.number_input(
+        "Bootstrap workers", min_value=1, max_value=max(64, BOOTSTRAP_WORKERS), value=BOOTSTRAP_WORKERS, key=key,
+        help="Processes used for bootstraps that cannot be vectorized (e.g. the median)"
+    )
+
+
+def show_cache_stats(errorbar=None):
+    """One-line summary of the confidence-interval cache, noting when `errorbar` came from it."""
+    stats = ci_cache.stats()
+    reused = "Intervals reused from cache · " if getattr(errorbar, "cached", False) else ""
+    st.caption(
+        f"{reused}CI cache: {stats['entries']}/{stats['limit']} results · "
+        f"{stats['hits']} hits · {stats['misses']} misses · {stats['evictions']} evictions"
+    )
+
+
+def show_timings(timings):
+    """Per-worker time spent on the last bootstrap, for tuning the worker count."""
+    if not timings:
+        return
+    table = pd.DataFrame(timings).groupby("worker").sum()
+    with st.expander("Bootstrap worker timings"):
+        st.dataframe(table.style.format({"seconds": "{:.3f}"}))
+        st.caption(f"{len(table)} worker(s), {table['seconds'].sum():.2f}s of bootstrap work, "
+                   f"slowest worker {table['seconds'].max():.2f}s")
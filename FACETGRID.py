@@ -2,12 +2,15 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import streamlit as st
 from itertools import cycle
+from PROFILE import get_profile
+from PREVIEW import preview_dataframe
 
 class FacetGridVisualizer:
     def __init__(self, data, saved_plots):
         self.data = data
         self.saved_plots = saved_plots
-        self.columns = self.data.columns.tolist()
+        self.profile = get_profile(self.data)
+        self.columns = self.profile.columns
 
     def display(self):
         self.tab1, self.tab2 = st.tabs(["Plots", "Documents"])
@@ -16,7 +19,7 @@ class FacetGridVisualizer:
             st.header("FacetGrid Generator")
             st.subheader("Core Data and Axes Parameters")
             st.info("The data is already loaded.")
-            st.dataframe(self.data)
+            preview_dataframe(self.data, self.profile)
 
             # Select columns for the FacetGrid
             self.row = st.selectbox("Select Row Variable", self.columns)
@@ -4,14 +4,20 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 from itertools import cycle
+from PROFILE import get_profile
+from PREVIEW import preview_dataframe
+from ECDFSTEPS import axes_pixels
+from MATRIX import MATRIX_AGGREGATIONS, IMAGE_MIN_CELLS, ANNOT_MAX_CELLS, aggregate_rows, image_heatmap, triangle_mask
+from CORRELATION import CORRELATION_METHODS, correlation_matrix, correlation_workers_input, show_correlation_stats
 
 class HeatmapVisualizer:
     def __init__(self, data, saved_plots):
         self.data = data
         self.saved_plots = saved_plots
+        self.profile = get_profile(self.data)
 
         # Keep only numeric columns for heatmap
-        self.numeric_columns = self.data.select_dtypes(include=[np.number]).columns.tolist()
+        self.numeric_columns = self.profile.numeric_columns
 
     def display(self):
         self.tab1, self.tab2 = st.tabs(["📊 Heatmap Generator", "📂 Saved Plots"])
@@ -19,7 +25,7 @@ class HeatmapVisualizer:
         with self.tab1:
             st.header("📊 Heatmap Generator")
             st.info("✅ Dataset Loaded. Select Parameters to Generate a Heatmap.")
-            st.dataframe(self.data)
+            preview_dataframe(self.data, self.profile)
 
             col1, col2 = st.columns(2)
 
@@ -29,15 +35,20 @@ class HeatmapVisualizer:
                     "📌 Select Numeric Columns for Heatmap", self.numeric_columns, default=self.numeric_columns
                 )
 
-                if self.selected_columns:
-                    min_val = self.data[self.selected_columns].min().min()
-                    max_val = self.data[self.selected_columns].max().max()
-                else:
-                    min_val, max_val = 0, 1  # Defaults in case of no selection
+                # Raw values, or the correlation (covariance) matrix of the selected columns
+                self.matrix_kind = st.selectbox("Heatmap Of", ["values"] + CORRELATION_METHODS)
+
+                if self.matrix_kind == "values":
+                    # Range comes from the cached profile (defaults to 0..1 when nothing is selected)
+                    min_val, max_val = self.profile.value_range(self.selected_columns)
 
-                # Ensure proper numeric values
-                self.vmin = st.number_input("Min Value for Heatmap", value=float(min_val))
-                self.vmax = st.number_input("Max Value for Heatmap", value=float(max_val))
+                    # Ensure proper numeric values
+                    self.vmin = st.number_input("Min Value for Heatmap", value=float(min_val))
+                    self.vmax = st.number_input("Max Value for Heatmap", value=float(max_val))
+                elif self.matrix_kind == "covariance":
+                    self.vmin, self.vmax = None, None
+                else:
+                    self.vmin, self.vmax = -1.0, 1.0
                 
                 # Handle optional center value safely
                 center_val = st.text_input("Center Value (Optional)")
@@ -46,12 +57,14 @@ class HeatmapVisualizer:
                 self.cmap = st.selectbox("Select Colormap", ['coolwarm', 'viridis', 'plasma', 'inferno', 'magma'])
                 self.robust = st.checkbox("Use Robust Color Mapping?", value=False)
                 self.mask = st.checkbox("Mask Upper Triangle?", value=False)
+                self.aggregation = st.selectbox("Combine Rows of Large Matrices By", MATRIX_AGGREGATIONS)
 
             with col2:
                 # Annotation & Appearance
                 self.annot = st.checkbox("Show Annotations?", value=True)
                 self.fmt = st.text_input("Annotation Format", ".2g")
                 self.annot_kws = {"size": st.slider("Annotation Font Size", 8, 16, 12)}
+                self.annot_budget = st.number_input("Annotate Up To (cells)", min_value=0, value=ANNOT_MAX_CELLS, step=100)
                 self.linewidths = st.slider("Cell Line Width", 0, 5, 1)
                 self.linecolor = st.color_picker("Cell Line Color", "#FFFFFF")
 
@@ -61,6 +74,8 @@ class HeatmapVisualizer:
                 self.xticklabels = st.selectbox("X-Axis Labels", ['auto', True, False])
                 self.yticklabels = st.selectbox("Y-Axis Labels", ['auto', True, False])
                 self.square = st.checkbox("Make Cells Square?", value=False)
+                if self.matrix_kind != "values":
+                    self.corr_workers = correlation_workers_input(key="heatmap_corr_workers")
 
             # Generate Plot Button
             if st.button("🚀 Generate Heatmap", use_container_width=True):
@@ -83,15 +98,31 @@ class HeatmapVisualizer:
             st.error("⚠️ Please select at least one numeric column for the heatmap.")
             return
 
+        data = self.data[self.selected_columns]
+        if self.matrix_kind != "values":
+            # Only the p×p matrix is drawn; it is cached per dataset, columns and method
+            data = correlation_matrix(self.data, self.selected_columns, self.matrix_kind, int(self.corr_workers))
+            show_correlation_stats(data)
+        fig, ax = plt.subplots(figsize=(10, 8))
+
+        # More rows than the axes has pixel rows, or too many cells for a mesh: large-matrix mode
+        max_rows = axes_pixels(ax, vertical=True)
+        if len(data) > max_rows or data.size > IMAGE_MIN_CELLS:
+            self.generate_image(fig, ax, data, max_rows)
+            return
+
+        # Every annotation is a Text artist; past the budget they cost more than the heatmap
+        annot = self.annot and data.size <= self.annot_budget
+
         # Prepare Arguments for Heatmap
         plot_args = {
-            'data': self.data[self.selected_columns],
+            'data': data,
             'vmin': self.vmin,
             'vmax': self.vmax,
             'center': self.center,
             'cmap': self.cmap,
             'robust': self.robust,
-            'annot': self.annot,
+            'annot': annot,
             'fmt': self.fmt,
             'annot_kws': self.annot_kws,
             'linewidths': self.linewidths,
@@ -106,16 +137,15 @@ class HeatmapVisualizer:
 
         # Apply mask for upper triangle (if selected)
         if self.mask:
-            mask = np.triu(np.ones_like(self.data[self.selected_columns], dtype=bool))
-            plot_args['mask'] = mask
-
-        fig, ax = plt.subplots(figsize=(10, 8))
+            plot_args['mask'] = triangle_mask(data.shape)
 
         try:
             sns.heatmap(**plot_args, ax=ax)
 
             # Display the figure in Streamlit
             st.pyplot(fig)
+            if self.annot and not annot:
+                st.caption(f"Annotations skipped: {data.size:,} cells exceed the budget of {self.annot_budget:,}")
 
             # Save the figure and properly close it to avoid memory leaks
             self.saved_plots.append(fig)
@@ -123,3 +153,24 @@ class HeatmapVisualizer:
             st.error(f"⚠️ Error generating heatmap: {e}")
         finally:
             plt.close(fig)  # Always close the figure to avoid backend rendering issues
+
+    def generate_image(self, fig, ax, data, max_rows):
+        try:
+            matrix = aggregate_rows(data, max_rows, self.aggregation, mask_upper=self.mask)
+            image_heatmap(
+                matrix, vmin=self.vmin, vmax=self.vmax, center=self.center, cmap=self.cmap,
+                robust=self.robust, fmt=self.fmt, cbar=self.cbar, cbar_kws=self.cbar_kws if self.cbar else None,
+                square=self.square, xticklabels=self.xticklabels, yticklabels=self.yticklabels, ax=ax
+            )
+            st.pyplot(fig)
+            note = f"{len(data):,} × {data.shape[1]} matrix drawn as an image"
+            if len(matrix) < len(data):
+                note += f", rows combined by {self.aggregation} into {len(matrix):,} bands"
+            if self.annot:
+                note += "; annotations and cell lines are left out"
+            st.caption(note)
+            self.saved_plots.append(fig)
+        except Exception as e:
+            st.error(f"⚠️ Error generating heatmap: {e}")
+        finally:
+            plt.close(fig)
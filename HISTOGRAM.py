@@ -0,0 +1,185 @@
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from PROFILE import data_fingerprint
+
+# Columns at least this long are binned from the cached sorted column instead of by seaborn
+HIST_MIN_ROWS = 50_000
+# Weight column of binned frames, named so it cannot clash with user columns
+HIST_WEIGHT = "__hist_weight__"
+# Memory held by sorted columns and discrete counts across reruns
+HIST_CACHE_MB = int(os.environ.get("HIST_CACHE_MB", "512"))
+
+
+class SortedColumnCache:
+    """LRU of sorted columns, bounded by the bytes it holds.
+
+    Sorting is the only O(n log n) step; every later binning of the same column is a
+    searchsorted over the bin edges, so changing bins or binwidth costs microseconds.
+    """
+
+    def __init__(self, max_bytes=HIST_CACHE_MB * 2 ** 20):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Streamlit serves every session from its own thread
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key][0]
+
+    def put(self, key, value, nbytes):
+        with self.lock:
+            if key in self.entries:
+                self.bytes -= self.entries.pop(key)[1]
+            self.entries[key] = (value, nbytes)
+            self.bytes += nbytes
+            while self.bytes > self.max_bytes and len(self.entries) > 1:
+                self.bytes -= self.entries.popitem(last=False)[1][1]
+                self.evictions += 1
+        return value
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "mb": self.bytes / 2 ** 20,
+                "limit_mb": self.max_bytes / 2 ** 20,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# Shared by every session served by this process
+hist_cache = SortedColumnCache()
+
+
+def _groups(frame, by):
+    if not by:
+        return [np.arange(len(frame))]
+    return list(frame.groupby(by, sort=False, dropna=False, observed=True).indices.values())
+
+
+def sorted_groups(data, x, by=(), weights=None):
+    """`x` sorted within every group of `by`, with running weight totals, from hist_cache.
+
+    Rows missing x, a group column or the weight are dropped, as are infinite x values,
+    as seaborn drops them.
+    Returns a dict with "groups" [(labels, sorted values, cumulative weights or None)],
+    the sorted column as a whole ("values") and whether x is an integer column.
+    """
+    by = [col for col in dict.fromkeys(by) if col is not None and col != x]
+    columns = [col for col in dict.fromkeys([x, *by, weights]) if col is not None]
+    key = ("sorted", data_fingerprint(data, columns), x, tuple(by), weights)
+    column = hist_cache.get(key)
+    if column is not None:
+        return column
+
+    frame = data[columns].dropna()
+    frame = frame[np.isfinite(frame[x].to_numpy(dtype=float))]
+    values = frame[x].to_numpy(dtype=float)
+    row_weights = frame[weights].to_numpy(dtype=float) if weights else None
+    groups = []
+    for rows in _groups(frame, by):
+        order = np.argsort(values[rows], kind="stable")
+        cumulative = None
+        if row_weights is not None:
+            cumulative = np.concatenate([[0], np.cumsum(row_weights[rows][order])])
+        labels = {col: frame[col].iloc[rows[0]] for col in by}
+        groups.append((labels, values[rows][order], cumulative))
+    all_values = groups[0][1] if len(groups) == 1 else np.sort(values)
+
+    column = {
+        "groups": groups,
+        "values": all_values,
+        "integer": pd.api.types.is_integer_dtype(data[x].dtype),
+        "by": by,
+        "dtypes": {col: data[col].dtype for col in by},
+    }
+    nbytes = all_values.nbytes + sum(
+        group.nbytes + (0 if cumulative is None else cumulative.nbytes) for _, group, cumulative in groups
+    )
+    if len(groups) == 1:
+        nbytes -= all_values.nbytes
+    return hist_cache.put(key, column, nbytes)
+
+
+def bin_edges(values, bins="auto", binwidth=None, discrete=False):
+    """The edges seaborn's histogram stat would choose for the sorted `values`."""
+    start, stop = values[0], values[-1]
+    if discrete:
+        return np.arange(start - .5, stop + 1.5)
+    if binwidth is not None:
+        # Seaborn rounds binwidth to a whole number of equal bins over the data range
+        bins = int(round((stop - start) / binwidth))
+    return np.histogram_bin_edges(values, bins)
+
+
+def sorted_counts(values, cumulative, edges):
+    """np.histogram of sorted values by searchsorted: bins are half-open, the last one closed."""
+    positions = np.searchsorted(values, edges, side="left")
+    positions[-1] = np.searchsorted(values, edges[-1], side="right")
+    if cumulative is None:
+        return np.diff(positions).astype(float)
+    return np.diff(cumulative[positions])
+
+
+def _discrete_counts(column, index, lo, n_bins):
+    _, values, cumulative = column["groups"][index]
+    weights = None if cumulative is None else np.diff(cumulative)
+    return np.bincount((values - lo).astype(np.intp), weights=weights, minlength=n_bins)
+
+
+def histogram_frame(data, x, by=(), weights=None, bins="auto", binwidth=None, discrete=False):
+    """Bin `x` within every group of `by` from the cached sorted column.
+
+    Returns a compact frame (one row per non-empty bin: bin centre, group columns and a
+    HIST_WEIGHT column) and the histplot keywords that reproduce seaborn's binning of the
+    full data from it. stat, cumulative, shrink and the rest are then plain arithmetic
+    on a few hundred rows. Bins are shared by every group, as with seaborn's common_bins;
+    `discrete` integer columns are counted with bincount.
+    """
+    column = sorted_groups(data, x, by, weights)
+    all_values = column["values"]
+    if not len(all_values):
+        return data.iloc[:0].assign(**{HIST_WEIGHT: []}), {"bins": bins, "binwidth": binwidth, "discrete": discrete}
+
+    if weights and bins == "auto" and binwidth is None and not discrete:
+        # Seaborn's own fallback, since numpy cannot estimate bins for weighted data
+        bins = 10
+    integer = discrete and column["integer"]
+    edges = bin_edges(all_values, bins, binwidth, discrete)
+    centres = (edges[:-1] + edges[1:]) / 2
+
+    parts = []
+    for index, (labels, values, cumulative) in enumerate(column["groups"]):
+        if integer:
+            counts = _discrete_counts(column, index, all_values[0], len(centres))
+        else:
+            counts = sorted_counts(values, cumulative, edges)
+        nonzero = counts != 0
+        part = pd.DataFrame({x: centres[nonzero], HIST_WEIGHT: counts[nonzero]})
+        for col, label in labels.items():
+            part[col] = label
+        parts.append(part)
+
+    binned = pd.concat(parts, ignore_index=True)
+    for col in column["by"]:
+        # Keep category order and dtype so hue levels and facets come out the same
+        if isinstance(column["dtypes"][col], pd.CategoricalDtype):
+            binned[col] = binned[col].astype(column["dtypes"][col])
+    # Seaborn uses `discrete` only to choose edges, so explicit edges reproduce it too; they go
+    # in as a list because histplot compares `bins` with "auto"
+    return binned, {"bins": edges.tolist(), "binwidth": None, "discrete": False}
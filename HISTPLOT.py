@@ -3,14 +3,18 @@ import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 from itertools import cycle
+from PROFILE import get_profile
+from PREVIEW import preview_dataframe
+from HISTOGRAM import HIST_MIN_ROWS, HIST_WEIGHT, histogram_frame
 
 class HistPlot:
     def __init__(self, data, saved_plots):
         self.data = data
         self.saved_plots = saved_plots
-        self.numeric_columns = self.data.select_dtypes(include=["int", "float"]).columns.tolist()
-        self.categorical_columns = self.data.select_dtypes(exclude=["int", "float"]).columns.tolist()
-        self.columns = self.data.columns.tolist()
+        self.profile = get_profile(self.data)
+        self.numeric_columns = self.profile.numeric_columns
+        self.categorical_columns = self.profile.categorical_columns
+        self.columns = self.profile.columns
 
     def display(self):
         tab1, tab2 = st.tabs(["Plots", "Documents"])
@@ -20,7 +24,7 @@ class HistPlot:
             st.subheader("Core Data and Axes Parameters")
             st.info("The data is already loaded.")
             with st.expander("Data Frame is here"):
-                st.dataframe(self.data)
+                preview_dataframe(self.data, self.profile)
 
             # Select columns for x and y axes
             col1, col2 = st.columns(2,border=True)
@@ -49,7 +53,7 @@ class HistPlot:
                         except:
                             st.error("Invalid range format. Please enter a tuple like (1, 2).")
                     else:
-                        self.hue_order = st.multiselect("Select the hue order", self.data[self.hue].unique().tolist())
+                        self.hue_order = st.multiselect("Select the hue order", self.profile.unique_values(self.hue))
 
             # Palette selection
             with col1:
@@ -116,10 +120,17 @@ class HistPlot:
                             legend=True, hue_order=self.hue_order, thresh=self.thresh, pthresh=self.pthresh, pmax=self.pmax
                         )
                     else:
+                        data, weights = self.data, None
+                        bin_kws = dict(bins=self.bins, binwidth=self.binwidth, discrete=self.discrete)
+                        # Large columns are binned from their cached sorted values; seaborn then
+                        # only applies stat, cumulative and shrink to one row per bin
+                        if self.use_sorted_bins():
+                            data, bin_kws = histogram_frame(self.data, self.x, by=[self.hue], **bin_kws)
+                            weights = HIST_WEIGHT
+                            st.caption(f"Histogram of {self.profile.n_rows:,} rows binned from the cached sorted column")
                         fig = sns.histplot(
-                            data=self.data, x=self.x, hue=self.hue,
-                            stat=self.stat, bins=self.bins, binwidth=self.binwidth,
-                            discrete=self.discrete, cumulative=self.cumulative,
+                            data=data, x=self.x, hue=self.hue, weights=weights,
+                            stat=self.stat, cumulative=self.cumulative, **bin_kws,
                             common_bins=self.common_bins, common_norm=self.common_norm,
                             multiple='layer', element='bars', fill=self.fill,
                             shrink=self.shrink, kde=self.kde,
@@ -147,3 +158,11 @@ class HistPlot:
                         st.pyplot(saved_plot)
             else:
                 st.info("No plots saved yet.")
+
+    def use_sorted_bins(self):
+        # Per-level bins, KDE overlays and log bins need seaborn's own pass over the rows
+        if self.x not in self.numeric_columns or self.hue in self.numeric_columns:
+            return False
+        if self.kde or self.log_scale or (self.hue and not self.common_bins):
+            return False
+        return self.profile.n_rows >= HIST_MIN_ROWS
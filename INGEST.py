@@ -0,0 +1,124 @@
+import io
+import codecs
+import time
+import chardet
+import pandas as pd
+
+# Only this many bytes from the start of the upload are used to guess the encoding
+SAMPLE_SIZE = 64 * 1024
+
+# Encoding used when the detected one turns out to be wrong further down the file.
+# latin-1 maps every byte, so the retry can never fail on decoding.
+FALLBACK_ENCODING = "ISO-8859-1"
+
+
+def detect_encoding(sample):
+    """Guess the encoding of a CSV from a bounded prefix of its bytes."""
+    # Drop the (possibly cut) last line so a multi-byte character split by the
+    # sample boundary does not make a valid utf-8 file look invalid
+    cut = sample.rfind(b"\n")
+    if cut > 0:
+        sample = sample[:cut + 1]
+
+    if sample.startswith(b"\xef\xbb\xbf"):
+        return "utf-8-sig"
+    try:
+        sample.decode("utf-8")
+        # Plain ascii is a subset of utf-8, and utf-8 is the safest bet for the rest of the file
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+
+    detected = chardet.detect(sample)["encoding"]
+    try:
+        return codecs.lookup(detected).name
+    except (TypeError, LookupError):
+        return FALLBACK_ENCODING
+
+
+def read_csv_streaming(uploaded_file, sample_size=SAMPLE_SIZE, **read_kws):
+    """Detect the encoding from a prefix sample and parse the file in one streaming pass.
+
+    Returns the parsed frame and a report with the chosen encoding and stage timings.
+    """
+    report = {"encoding": None, "attempts": [], "timings": {}}
+
+    start = time.perf_counter()
+    uploaded_file.seek(0)
+    sample = uploaded_file.read(sample_size)
+    encoding = detect_encoding(sample)
+    report["timings"]["detect"] = time.perf_counter() - start
+
+    for candidate in dict.fromkeys([encoding, FALLBACK_ENCODING]):
+        report["attempts"].append(candidate)
+        start = time.perf_counter()
+        uploaded_file.seek(0)
+        # Decode incrementally while pandas pulls chunks, instead of decoding the whole buffer up front
+        stream = io.TextIOWrapper(uploaded_file, encoding=candidate, newline="")
+        try:
+            df = pd.read_csv(stream, **read_kws)
+        except UnicodeDecodeError:
+            continue
+        finally:
+            report["timings"][f"parse ({candidate})"] = time.perf_counter() - start
+            # Keep the uploaded buffer open for later reruns
+            stream.detach()
+
+        report["encoding"] = candidate
+        return df, report
+
+
+# Strings with at most this share of distinct values become categoricals
+CATEGORY_RATIO = 0.5
+# Leading date shapes considered "obvious" enough to parse without being asked
+DATE_PATTERN = r"^\s*(\d{4}-\d{1,2}-\d{1,2}|\d{1,2}/\d{1,2}/\d{2,4})([ T]\d{1,2}:\d{2}(:\d{2}(\.\d+)?)?)?\s*$"
+
+
+def _frame_bytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _looks_like_dates(column, sample_size=1000):
+    sample = column.dropna().head(sample_size).astype(str)
+    return len(sample) > 0 and bool(sample.str.match(DATE_PATTERN).all())
+
+
+def optimize_dtypes(df, category_ratio=CATEGORY_RATIO, parse_dates=True):
+    """Downcast numerics, turn low-cardinality strings into categoricals and parse obvious dates.
+
+    Floats are only narrowed when no value changes, so plotted statistics stay the same.
+    Returns the converted frame and a report with the before/after memory footprint.
+    """
+    report = {"before_bytes": _frame_bytes(df), "changes": {}}
+    converted = {}
+
+    for name, column in df.items():
+        original = column.dtype
+        if pd.api.types.is_integer_dtype(column) and not pd.api.types.is_bool_dtype(column):
+            column = pd.to_numeric(column, downcast="integer")
+        elif pd.api.types.is_float_dtype(column):
+            narrowed = column.astype("float32")
+            if narrowed.astype(original).equals(column):
+                column = narrowed
+        elif pd.api.types.is_object_dtype(column) or pd.api.types.is_string_dtype(column):
+            if parse_dates and _looks_like_dates(column):
+                parsed = pd.to_datetime(column, errors="coerce")
+                # Only keep the conversion if it did not turn real values into NaT
+                if parsed.isna().sum() == column.isna().sum():
+                    column = parsed
+            if not pd.api.types.is_datetime64_any_dtype(column):
+                n_unique = column.nunique(dropna=True)
+                if n_unique <= max(1, category_ratio * len(column)):
+                    column = column.astype("category")
+
+        if column.dtype != original:
+            report["changes"][name] = f"{original} -> {column.dtype}"
+            converted[name] = column
+
+    if converted:
+        df = df.copy(deep=False)
+        for name, column in converted.items():
+            df[name] = column
+    report["after_bytes"] = _frame_bytes(df)
+    df.attrs["dtype_report"] = report
+    return df, report
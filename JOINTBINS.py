@@ -0,0 +1,271 @@
+import os
+import math
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import matplotlib as mpl
+import seaborn as sns
+from matplotlib import transforms
+from seaborn.distributions import _freedman_diaconis_bins
+from seaborn.palettes import blend_palette
+from seaborn.utils import set_hls_values
+from PROFILE import data_fingerprint
+
+# Joint plots of frames at least this long are drawn from cached bin counts
+JOINT_MIN_ROWS = 50_000
+# Memory held by joint and marginal counts across reruns
+JOINT_CACHE_MB = int(os.environ.get("JOINT_CACHE_MB", "64"))
+# Weight column of binned frames, named so it cannot clash with user columns
+JOINT_WEIGHT = "__joint_weight__"
+
+
+class JointBinCache:
+    """LRU of joint and marginal bin counts, bounded by the bytes it holds.
+
+    Counts depend on the columns, hue and grid only, so changing the layout of the
+    grid (ratio, space, limits, marginal ticks) redraws from here.
+    """
+
+    def __init__(self, max_bytes=JOINT_CACHE_MB * 2 ** 20):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Streamlit serves every session from its own thread
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key][0]
+
+    def put(self, key, value, nbytes):
+        with self.lock:
+            if key in self.entries:
+                self.bytes -= self.entries.pop(key)[1]
+            self.entries[key] = (value, nbytes)
+            self.bytes += nbytes
+            while self.bytes > self.max_bytes and len(self.entries) > 1:
+                self.bytes -= self.entries.popitem(last=False)[1][1]
+                self.evictions += 1
+        return value
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "mb": self.bytes / 2 ** 20,
+                "limit_mb": self.max_bytes / 2 ** 20,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# Shared by every session served by this process
+joint_cache = JointBinCache()
+
+
+def _complete_rows(data, x, y, hue):
+    columns = [col for col in dict.fromkeys([x, y, hue]) if col is not None]
+    frame = data[columns].dropna()
+    return frame, frame[x].to_numpy(dtype=float), frame[y].to_numpy(dtype=float)
+
+
+def _bin_index(values, edges):
+    # np.histogram's bins: half-open, with the last one closed
+    return np.clip(np.searchsorted(edges, values, side="right") - 1, 0, len(edges) - 2)
+
+
+def _nbytes(counts):
+    return sum(value.nbytes for value in counts.values() if isinstance(value, np.ndarray))
+
+
+def joint_hist_counts(data, x, y, hue=None):
+    """Joint counts on seaborn's auto bins for every hue level, with both marginals.
+
+    One bincount over the combined (hue, x bin, y bin) code gives the joint counts; the
+    marginals are its sums, on the same edges seaborn's marginal histograms choose.
+    Rows missing x, y or the hue are left out.
+    """
+    key = ("hist", data_fingerprint(data, [col for col in (x, y, hue) if col is not None]), x, y, hue)
+    counts = joint_cache.get(key)
+    if counts is not None:
+        return counts
+
+    frame, x_values, y_values = _complete_rows(data, x, y, hue)
+    x_edges = np.histogram_bin_edges(x_values, "auto")
+    y_edges = np.histogram_bin_edges(y_values, "auto")
+    nx, ny = len(x_edges) - 1, len(y_edges) - 1
+    if hue is not None:
+        codes, levels = pd.factorize(frame[hue], sort=False)
+    else:
+        codes, levels = np.zeros(len(frame), dtype=np.intp), [None]
+    cells = (codes * nx + _bin_index(x_values, x_edges)) * ny + _bin_index(y_values, y_edges)
+    joint = np.bincount(cells, minlength=len(levels) * nx * ny).reshape(len(levels), nx, ny).astype(float)
+
+    counts = {
+        "kind": "hist",
+        "levels": list(levels),
+        "dtype": data[hue].dtype if hue is not None else None,
+        "x_edges": x_edges,
+        "y_edges": y_edges,
+        "joint": joint,
+        "x_marginal": joint.sum(axis=2),
+        "y_marginal": joint.sum(axis=1),
+    }
+    return joint_cache.put(key, counts, _nbytes(counts))
+
+
+def hex_gridsize(x_values, y_values):
+    """seaborn's default hexbin gridsize for jointplot."""
+    x_bins = min(_freedman_diaconis_bins(x_values), 50)
+    y_bins = min(_freedman_diaconis_bins(y_values), 50)
+    return int(np.mean([x_bins, y_bins]))
+
+
+def joint_hex_counts(data, x, y, gridsize=None):
+    """Hexagon counts as matplotlib's hexbin computes them, with both marginals.
+
+    The cells follow hexbin's own arithmetic (two offset rectangular lattices, each
+    point going to the nearer centre). The marginals are counted in the same pass on
+    the auto bins seaborn's marginal histograms choose. Rows missing x or y are left
+    out, as jointplot drops them for hexbin.
+    """
+    key = ("hex", data_fingerprint(data, [x, y]), x, y, gridsize)
+    counts = joint_cache.get(key)
+    if counts is not None:
+        return counts
+
+    _, x_values, y_values = _complete_rows(data, x, y, None)
+    if gridsize is None:
+        gridsize = hex_gridsize(x_values, y_values)
+    nx = gridsize
+    ny = int(nx / math.sqrt(3))
+    extent = (x_values.min(), x_values.max(), y_values.min(), y_values.max())
+    xmin, xmax = transforms.nonsingular(*extent[:2], expander=0.1)
+    ymin, ymax = transforms.nonsingular(*extent[2:], expander=0.1)
+    padding = 1.e-9 * (xmax - xmin)
+    xmin, xmax = xmin - padding, xmax + padding
+    sx, sy = (xmax - xmin) / nx, (ymax - ymin) / ny
+
+    ix, iy = (x_values - xmin) / sx, (y_values - ymin) / sy
+    ix1, iy1 = np.round(ix).astype(int), np.round(iy).astype(int)
+    ix2, iy2 = np.floor(ix).astype(int), np.floor(iy).astype(int)
+    nearer_first = (ix - ix1) ** 2 + 3.0 * (iy - iy1) ** 2 < (ix - ix2 - 0.5) ** 2 + 3.0 * (iy - iy2 - 0.5) ** 2
+    first = np.bincount(
+        (ix1 * (ny + 1) + iy1)[nearer_first], minlength=(nx + 1) * (ny + 1)
+    )[:(nx + 1) * (ny + 1)]
+    second = np.bincount((ix2 * ny + iy2)[~nearer_first], minlength=nx * ny)[:nx * ny]
+
+    # Cell centres in data space, in hexbin's order
+    gx1, gy1 = np.meshgrid(np.arange(nx + 1), np.arange(ny + 1), indexing="ij")
+    gx2, gy2 = np.meshgrid(np.arange(nx) + .5, np.arange(ny) + .5, indexing="ij")
+    centres_x = xmin + sx * np.concatenate([gx1.ravel(), gx2.ravel()])
+    centres_y = ymin + sy * np.concatenate([gy1.ravel(), gy2.ravel()])
+
+    x_edges = np.histogram_bin_edges(x_values, "auto")
+    y_edges = np.histogram_bin_edges(y_values, "auto")
+    counts = {
+        "kind": "hex",
+        "gridsize": gridsize,
+        "extent": extent,
+        "centres_x": centres_x,
+        "centres_y": centres_y,
+        "cells": np.concatenate([first, second]).astype(float),
+        "x_edges": x_edges,
+        "y_edges": y_edges,
+        "x_marginal": np.bincount(_bin_index(x_values, x_edges), minlength=len(x_edges) - 1)[None].astype(float),
+        "y_marginal": np.bincount(_bin_index(y_values, y_edges), minlength=len(y_edges) - 1)[None].astype(float),
+    }
+    return joint_cache.put(key, counts, _nbytes(counts))
+
+
+def _levels_frame(columns, weights, labels, hue, dtype):
+    # One row per non-empty bin and hue level, carrying its count
+    nonzero = weights != 0
+    frame = pd.DataFrame({col: values[nonzero] for col, values in columns.items()})
+    frame[JOINT_WEIGHT] = weights[nonzero]
+    if hue is not None:
+        frame[hue] = labels[nonzero]
+        if isinstance(dtype, pd.CategoricalDtype):
+            frame[hue] = frame[hue].astype(dtype)
+    return frame
+
+
+def marginal_frame(counts, variable, axis, hue=None):
+    """The `axis` ("x" or "y") marginal as one weighted row per non-empty bin."""
+    edges = counts[f"{axis}_edges"]
+    marginal = counts[f"{axis}_marginal"]
+    centres = np.tile((edges[:-1] + edges[1:]) / 2, len(marginal))
+    labels = np.repeat(np.asarray(counts.get("levels", [None]), dtype=object), marginal.shape[1])
+    return _levels_frame({variable: centres}, marginal.ravel(), labels, hue, counts.get("dtype"))
+
+
+def joint_frame(counts, x, y, hue=None):
+    """The joint histogram as one weighted row per non-empty cell and hue level."""
+    x_centres = (counts["x_edges"][:-1] + counts["x_edges"][1:]) / 2
+    y_centres = (counts["y_edges"][:-1] + counts["y_edges"][1:]) / 2
+    n_levels, nx, ny = counts["joint"].shape
+    grid_x, grid_y = np.meshgrid(x_centres, y_centres, indexing="ij")
+    labels = np.repeat(np.asarray(counts["levels"], dtype=object), nx * ny)
+    columns = {x: np.tile(grid_x.ravel(), n_levels), y: np.tile(grid_y.ravel(), n_levels)}
+    return _levels_frame(columns, counts["joint"].ravel(), labels, hue, counts["dtype"])
+
+
+def hex_cmap(color=None):
+    """The colormap jointplot builds for hexbin from a single color."""
+    color_rgb = mpl.colors.colorConverter.to_rgb(color or "C0")
+    return blend_palette([set_hls_values(color_rgb, l=val) for val in np.linspace(1, 0, 12)], as_cmap=True)
+
+
+def draw_joint_bins(grid, counts, x, y, hue=None, color=None, joint_kws=None):
+    """Draw cached counts on a JointGrid as jointplot's hist or hex kind draws the raw rows.
+
+    Seaborn's histplot receives the bins as explicit edges and the counts as weights, so
+    stat, colours and legend are its own; hexbin receives each cell centre with its count.
+    """
+    joint_kws = dict(joint_kws or {})
+    if counts["kind"] == "hex":
+        grid.ax_joint.hexbin(
+            counts["centres_x"], counts["centres_y"], C=counts["cells"], reduce_C_function=np.sum,
+            gridsize=counts["gridsize"], extent=counts["extent"], cmap=hex_cmap(color)
+        )
+    else:
+        sns.histplot(
+            data=joint_frame(counts, x, y, hue), x=x, y=y, hue=hue, weights=JOINT_WEIGHT,
+            bins=(counts["x_edges"].tolist(), counts["y_edges"].tolist()), color=color or "C0",
+            ax=grid.ax_joint, **joint_kws
+        )
+    # jointplot's marginals are plain histplots, without the joint palette
+    for variable, axis, ax in ((x, "x", grid.ax_marg_x), (y, "y", grid.ax_marg_y)):
+        sns.histplot(
+            data=marginal_frame(counts, variable, axis, hue if counts["kind"] == "hist" else None),
+            hue=hue if counts["kind"] == "hist" else None, weights=JOINT_WEIGHT,
+            bins=counts[f"{axis}_edges"].tolist(), kde=False, color=color or "C0",
+            legend=hue is None, ax=ax, **{axis: variable}
+        )
+
+
+def binned_jointgrid(data, x, y, kind="hist", hue=None, color=None, joint_kws=None, **grid_kws):
+    """A JointGrid with jointplot's hist or hex layers drawn from the cached counts.
+
+    The grid is built on no rows: it only lays out the axes and labels, so ratio, space,
+    limits and marginal ticks never touch the data.
+    """
+    if kind == "hex":
+        if hue is not None:
+            raise ValueError("Use of `hue` with `kind='hex'` is not currently supported.")
+        counts = joint_hex_counts(data, x, y)
+    else:
+        counts = joint_hist_counts(data, x, y, hue)
+    grid = sns.JointGrid(data=data[[x, y]].iloc[:0], x=x, y=y, **grid_kws)
+    draw_joint_bins(grid, counts, x, y, hue=hue, color=color, joint_kws=joint_kws)
+    return grid
@@ -2,12 +2,16 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import streamlit as st
 from itertools import cycle
+from PROFILE import get_profile
+from PREVIEW import preview_dataframe
+from JOINTBINS import binned_jointgrid
 
 class JointGridVisualizer:
     def __init__(self, data, saved_plots):
         self.data = data
         self.saved_plots = saved_plots
-        self.columns = self.data.columns.tolist()
+        self.profile = get_profile(self.data)
+        self.columns = self.profile.columns
 
     def display(self):
         self.tab1, self.tab2 = st.tabs(["Plots", "Documents"])
@@ -16,7 +20,7 @@ class JointGridVisualizer:
             st.header("JointGrid Generator")
             st.subheader("Core Data and Axes Parameters")
             st.info("The data is already loaded.")
-            st.dataframe(self.data)
+            preview_dataframe(self.data, self.profile)
 
             # Select variables for the joint grid
             self.x = st.selectbox("Select X variable", self.columns)
@@ -32,6 +36,8 @@ class JointGridVisualizer:
             self.hue_order = st.text_input("Hue Order (comma-separated)", "")
             self.hue_norm = st.text_input("Hue Normalization", "")
             self.marginal_ticks = st.checkbox("Show Marginal Ticks?", value=False)
+            self.layer = st.selectbox("Joint and marginal layers", [None, "hist", "hex"])
+            self.color = st.text_input("Single Color for Layers", "")
 
             # Generate Plot Button
             if st.button("Generate JointGrid"):
@@ -52,6 +58,10 @@ class JointGridVisualizer:
                 st.info("No plots saved yet.")
 
     def generate_grid(self):
+        if self.layer:
+            self.generate_binned_grid()
+            return
+
         # Prepare the arguments for JointGrid
         grid_args = {
             'data': self.data,
@@ -74,3 +84,26 @@ class JointGridVisualizer:
         g = sns.JointGrid(**grid_args)
         st.pyplot(g.fig)
         self.saved_plots.append(g.fig)
+
+    def generate_binned_grid(self):
+        # Layers are drawn from one binning pass, cached, so layout changes skip the data
+        joint_kws = None
+        if self.hue:
+            joint_kws = {
+                "palette": self.palette,
+                "hue_order": eval(self.hue_order) if self.hue_order else None,
+                "hue_norm": eval(self.hue_norm) if self.hue_norm else None,
+            }
+        try:
+            g = binned_jointgrid(
+                self.data, self.x, self.y, kind=self.layer, hue=self.hue, color=self.color or None,
+                joint_kws=joint_kws, height=self.height, ratio=self.ratio, space=self.space,
+                dropna=self.dropna, xlim=eval(self.xlim) if self.xlim else None,
+                ylim=eval(self.ylim) if self.ylim else None, marginal_ticks=self.marginal_ticks
+            )
+        except Exception as e:
+            st.error(f"Error generating plot: {e}")
+            return
+
+        st.pyplot(g.figure)
+        self.saved_plots.append(g.figure)
@@ -2,12 +2,19 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import streamlit as st
 from itertools import cycle
+from PROFILE import get_profile
+from PREVIEW import preview_dataframe
+from SAMPLING import sampling_controls, sample_frame, annotate_sampling
+from RASTER import raster_controls, rasterize_plot
+from KDE import BIVARIATE_MIN_ROWS, grouped_kde, grouped_kde_2d, draw_kde_curves, draw_bivariate_kde, hue_colors
+from JOINTBINS import JOINT_MIN_ROWS, binned_jointgrid, joint_cache
 
 class JointPlotVisualizer:
     def __init__(self, data, saved_plots):
         self.data = data
         self.saved_plots = saved_plots
-        self.columns = self.data.columns.tolist()
+        self.profile = get_profile(self.data)
+        self.columns = self.profile.columns
 
     def display(self):
         self.tab1, self.tab2 = st.tabs(["Plots", "Documents"])
@@ -16,13 +23,13 @@ class JointPlotVisualizer:
             st.header("JointPlot Generator")
             st.subheader("Core Data and Axes Parameters")
             st.info("The data is already loaded.")
-            st.dataframe(self.data)
+            preview_dataframe(self.data, self.profile)
 
             # Select variables for the joint plot
             self.x = st.selectbox("Select X variable", self.columns)
             self.y = st.selectbox("Select Y variable", self.columns)
             self.hue = st.selectbox("Select Hue Variable", [None] + self.columns)
-            self.kind = st.selectbox("Select Plot Kind", ["scatter", "kde", "hist", "hex", "reg", "resid"])
+            self.kind = st.selectbox("Select Plot Kind", ["scatter", "kde", "hist", "hex", "reg", "resid", "raster"])
             self.height = st.slider("Height of the Plot", min_value=4, max_value=10, value=6)
             self.ratio = st.slider("Ratio of Joint to Marginal Axes", min_value=1, max_value=10, value=5)
             self.space = st.slider("Space Between Joint and Marginal Axes", min_value=0.1, max_value=1.0, value=0.2)
@@ -35,6 +42,12 @@ class JointPlotVisualizer:
             self.hue_norm = st.text_input("Hue Normalization", "")
             self.marginal_ticks = st.checkbox("Show Marginal Ticks?", value=False)
 
+            # Only the scatter kind draws one marker per row; raster bins every row into pixels
+            if self.kind == "raster":
+                self.raster = raster_controls(self.profile, key="jointplot", value_column=self.hue)
+            else:
+                self.sampling = sampling_controls(self.profile.n_rows, key="jointplot")
+
             # Generate Plot Button
             if st.button("Generate JointPlot"):
                 self.generate_plot()
@@ -54,9 +67,23 @@ class JointPlotVisualizer:
                 st.info("No plots saved yet.")
 
     def generate_plot(self):
+        if self.kind == "raster":
+            self.generate_raster()
+            return
+        if self.kind == "kde" and self.use_binned_kde():
+            self.generate_binned_kde()
+            return
+        if self.kind in ("hist", "hex") and self.use_joint_bins():
+            self.generate_joint_bins()
+            return
+
+        plot_data = self.data
+        if self.kind == "scatter":
+            plot_data, _ = sample_frame(self.data, strata=self.hue, columns=[self.x, self.y], **self.sampling)
+
         # Prepare the arguments for JointPlot
         plot_args = {
-            'data': self.data,
+            'data': plot_data,
             'x': self.x,
             'y': self.y,
             'hue': self.hue,
@@ -76,7 +103,108 @@ class JointPlotVisualizer:
 
         # Generate the JointPlot
         g = sns.jointplot(**plot_args)
+        annotate_sampling(g.figure, len(plot_data), len(self.data))
 
         if st.button("Plot the graph", use_container_width=True):
             st.pyplot(g)
             self.saved_plots.append(g.fig)
+
+    def generate_raster(self):
+        # JointGrid only lays out the axes; the joint panel is drawn as a single image
+        g = sns.JointGrid(
+            data=self.data, x=self.x, y=self.y, height=self.height, ratio=self.ratio,
+            space=self.space, dropna=self.dropna,
+            xlim=eval(self.xlim) if self.xlim else None,
+            ylim=eval(self.ylim) if self.ylim else None,
+            marginal_ticks=self.marginal_ticks
+        )
+        try:
+            rasterize_plot(
+                g.ax_joint, self.data, self.x, self.y, colorbar=False,
+                xlim=eval(self.xlim) if self.xlim else None,
+                ylim=eval(self.ylim) if self.ylim else None,
+                **self.raster
+            )
+            g.plot_marginals(sns.histplot, color=self.color or None, element="step")
+        except Exception as e:
+            st.error(f"Error generating plot: {e}")
+            return
+
+        st.pyplot(g.figure)
+        self.saved_plots.append(g.figure)
+
+    def use_binned_kde(self):
+        numeric = self.profile.numeric_columns
+        # Numeric hues are drawn with seaborn's continuous palette
+        return (self.x in numeric and self.y in numeric and self.hue not in numeric
+                and self.profile.n_rows >= BIVARIATE_MIN_ROWS)
+
+    def generate_binned_kde(self):
+        hue_order = eval(self.hue_order) if self.hue_order else None
+        g = sns.JointGrid(
+            data=self.data, x=self.x, y=self.y, height=self.height, ratio=self.ratio,
+            space=self.space, dropna=self.dropna,
+            xlim=eval(self.xlim) if self.xlim else None,
+            ylim=eval(self.ylim) if self.ylim else None,
+            marginal_ticks=self.marginal_ticks
+        )
+        try:
+            colors = hue_colors(self.data[self.hue], hue_order, self.palette) if self.hue else None
+            color = self.color or None
+            draw_bivariate_kde(
+                g.ax_joint, grouped_kde_2d(self.data, self.x, self.y, hue=self.hue, hue_order=hue_order),
+                colors=colors, hue=self.hue, color=color
+            )
+            draw_kde_curves(
+                g.ax_marg_x, grouped_kde(self.data, self.x, hue=self.hue, hue_order=hue_order),
+                colors=colors, hue=self.hue, color=color, legend=False
+            )
+            draw_kde_curves(
+                g.ax_marg_y, grouped_kde(self.data, self.y, hue=self.hue, hue_order=hue_order),
+                colors=colors, hue=self.hue, color=color, vertical=True, legend=False
+            )
+            # The marginal axes keep the joint labels only
+            g.ax_marg_x.set_ylabel("")
+        except Exception as e:
+            st.error(f"Error generating plot: {e}")
+            return
+
+        st.pyplot(g.figure)
+        self.saved_plots.append(g.figure)
+
+    def use_joint_bins(self):
+        numeric = self.profile.numeric_columns
+        if self.x not in numeric or self.y not in numeric or self.hue in numeric:
+            return False
+        # hexbin drops incomplete rows, but the hist marginals are drawn from the unfiltered
+        # data whatever dropna says, so each counts the rows its own column has
+        columns = [col for col in (self.x, self.y, self.hue) if col is not None]
+        complete = self.kind == "hex" or not any(self.profile.null_counts[col] for col in columns)
+        return complete and self.profile.n_rows >= JOINT_MIN_ROWS
+
+    def generate_joint_bins(self):
+        joint_kws = None
+        if self.hue:
+            joint_kws = {
+                "palette": self.palette,
+                "hue_order": eval(self.hue_order) if self.hue_order else None,
+                "hue_norm": eval(self.hue_norm) if self.hue_norm else None,
+            }
+        try:
+            g = binned_jointgrid(
+                self.data, self.x, self.y, kind=self.kind, hue=self.hue, color=self.color or None,
+                joint_kws=joint_kws, height=self.height, ratio=self.ratio, space=self.space,
+                dropna=self.dropna, xlim=eval(self.xlim) if self.xlim else None,
+                ylim=eval(self.ylim) if self.ylim else None, marginal_ticks=self.marginal_ticks
+            )
+        except Exception as e:
+            st.error(f"Error generating plot: {e}")
+            return
+
+        st.pyplot(g.figure)
+        cache = joint_cache.stats()
+        st.caption(
+            f"Joint and marginal counts of {self.profile.n_rows:,} rows binned in one pass "
+            f"(bin cache: {cache['hits']} hits, {cache['misses']} misses)"
+        )
+        self.saved_plots.append(g.figure)
@@ -0,0 +1,768 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+import seaborn as sns
+import streamlit as st
+import matplotlib.pyplot as plt
+from matplotlib.colors import ListedColormap, to_rgba
+from matplotlib.lines import Line2D
+from matplotlib.patches import Patch
+from scipy import stats
+from scipy.ndimage import map_coordinates
+from scipy.signal import fftconvolve
+from seaborn.external import husl
+from PROFILE import data_fingerprint
+
+# Columns at least this long use the binned engine instead of an exact KDE
+BINNED_MIN_ROWS = 50_000
+# Fine-grid points per kernel standard deviation; binning error shrinks with its square
+BINS_PER_BANDWIDTH = 16
+MIN_BINS = 512
+MAX_BINS = 2 ** 16
+# Kernel tails beyond this many standard deviations are negligible
+KERNEL_TAIL = 6
+# Bivariate inputs at least this long use the binned engine; the exact cost is rows x gridsize^2
+BIVARIATE_MIN_ROWS = 2_000
+# Bivariate fine grids: points per kernel standard deviation and cap on each axis
+BINS_PER_BANDWIDTH_2D = 8
+MIN_BINS_2D = 128
+MAX_BINS_2D = 1024
+# Observations kept per group when violin data is compressed to quantiles
+QUANTILE_POINTS = 2048
+# Rows evaluated exactly by the accuracy check
+ACCURACY_SAMPLE = 20_000
+# Weight column of binned frames, named so it cannot clash with user columns
+BIN_WEIGHT = "__bin_weight__"
+# Memory held by binned counts, evaluated curves and compressed frames across reruns
+KDE_CACHE_MB = int(os.environ.get("KDE_CACHE_MB", "256"))
+
+
+class KDECache:
+    """LRU of binned counts and evaluated densities, bounded by the bytes it holds.
+
+    Counts depend only on the data and the bin resolution, so a bandwidth change reuses
+    them and only redoes the convolution; curves are keyed by every estimation setting,
+    so a styling change reuses them outright.
+    """
+
+    def __init__(self, max_bytes=KDE_CACHE_MB * 2 ** 20):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Streamlit serves every session from its own thread
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key][0]
+
+    def put(self, key, value, nbytes):
+        with self.lock:
+            if key in self.entries:
+                self.bytes -= self.entries.pop(key)[1]
+            self.entries[key] = (value, nbytes)
+            self.bytes += nbytes
+            while self.bytes > self.max_bytes and len(self.entries) > 1:
+                self.bytes -= self.entries.popitem(last=False)[1][1]
+                self.evictions += 1
+        return value
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "mb": self.bytes / 2 ** 20,
+                "limit_mb": self.max_bytes / 2 ** 20,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# Shared by every session served by this process
+kde_cache = KDECache()
+
+
+@contextmanager
+def timed_stage(stats, stage):
+    """Add the time spent in the block to `stats["seconds"][stage]` (no-op without stats)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if stats is not None:
+            seconds = stats.setdefault("seconds", {})
+            seconds[stage] = seconds.get(stage, 0) + time.perf_counter() - start
+
+
+def _count(stats, name):
+    if stats is not None:
+        counts = stats.setdefault("counts", {})
+        counts[name] = counts.get(name, 0) + 1
+
+
+def kde_factor(n_eff, bw_method="scott", dims=1):
+    """Bandwidth factor of scipy's gaussian_kde for `dims`-dimensional data."""
+    if bw_method in (None, "scott"):
+        return n_eff ** (-1 / (dims + 4))
+    if bw_method == "silverman":
+        return (n_eff * (dims + 2) / 4) ** (-1 / (dims + 4))
+    return float(bw_method)
+
+
+def _effective_size(weights, n):
+    return n if weights is None else weights.sum() ** 2 / (weights ** 2).sum()
+
+
+def kernel_bandwidth(values, weights=None, bw_method="scott", bw_adjust=1):
+    """Kernel standard deviation seaborn would use: factor * bw_adjust * (weighted) std."""
+    if weights is None:
+        std = values.std(ddof=1)
+    else:
+        std = np.sqrt(np.cov(values, aweights=weights))
+    return kde_factor(_effective_size(weights, len(values)), bw_method) * bw_adjust * std
+
+
+def support_grid(values, bw, cut=3, clip=None, gridsize=200):
+    """Evaluation grid matching seaborn: data range padded by cut bandwidths, then clipped."""
+    clip_lo, clip_hi = clip if clip is not None else (None, None)
+    clip_lo = -np.inf if clip_lo is None else clip_lo
+    clip_hi = np.inf if clip_hi is None else clip_hi
+    gridmin = max(values.min() - bw * cut, clip_lo)
+    gridmax = min(values.max() + bw * cut, clip_hi)
+    return np.linspace(gridmin, gridmax, gridsize)
+
+
+def linear_bin(values, weights, lo, hi, n_bins):
+    """Split every observation between its two nearest grid points, in proportion to distance."""
+    delta = (hi - lo) / (n_bins - 1)
+    position = (values - lo) / delta
+    left = np.clip(np.floor(position).astype(np.intp), 0, n_bins - 2)
+    right_share = position - left
+    weights = np.ones_like(values) if weights is None else weights
+    counts = np.bincount(left, weights=weights * (1 - right_share), minlength=n_bins)
+    counts += np.bincount(left + 1, weights=weights * right_share, minlength=n_bins)
+    return counts
+
+
+def _fine_bins(span, bw):
+    return int(np.clip(np.ceil(span / bw * BINS_PER_BANDWIDTH) + 1, MIN_BINS, MAX_BINS))
+
+
+def bin_resolution(span, bw):
+    """Bins over the data range, rounded up to a power of two so nearby bandwidths share counts."""
+    needed = np.ceil(span / bw * BINS_PER_BANDWIDTH) + 1
+    return int(np.clip(2 ** np.ceil(np.log2(max(needed, 2))), MIN_BINS, MAX_BINS))
+
+
+def _clean(values, weights):
+    values = np.asarray(values, dtype=float)
+    valid = np.isfinite(values)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float)
+        valid &= np.isfinite(weights) & (weights > 0)
+        weights = weights[valid]
+    return values[valid], weights
+
+
+def column_moments(values, weights=None):
+    """The data summaries the bandwidth and support depend on.
+
+    seaborn sizes the support from an unweighted fit, so "support_std" ignores the weights.
+    """
+    support_std = values.std(ddof=1) if len(values) > 1 else np.nan
+    if weights is None:
+        std = support_std
+    else:
+        std = np.sqrt(np.cov(values, aweights=weights)) if len(values) > 1 else np.nan
+    return {
+        "n": len(values),
+        "n_eff": _effective_size(weights, len(values)),
+        "std": std,
+        "support_std": support_std,
+        "lo": values.min() if len(values) else np.nan,
+        "hi": values.max() if len(values) else np.nan,
+    }
+
+
+def smooth_counts(counts, lo, hi, bw, support, cumulative=False):
+    """Convolve counts binned over [lo, hi] with the kernel and read the result on `support`.
+
+    The full linear convolution reaches KERNEL_TAIL bandwidths past the data; beyond that
+    the density is zero, so the counts never need binning again for a wider support.
+    """
+    delta = (hi - lo) / (len(counts) - 1)
+    half = int(np.ceil(KERNEL_TAIL * bw / delta))
+    offsets = np.arange(-half, half + 1) * delta
+    kernel = np.exp(-0.5 * (offsets / bw) ** 2) / (bw * np.sqrt(2 * np.pi))
+    # FFT round-off can leave tiny negative values far in the tails
+    density = np.maximum(fftconvolve(counts, kernel, mode="full"), 0) / counts.sum()
+    grid = lo + (np.arange(len(density)) - half) * delta
+
+    if cumulative:
+        cdf = np.concatenate([[0], np.cumsum((density[1:] + density[:-1]) / 2 * delta)])
+        values = np.interp(support, grid, cdf, left=0, right=cdf[-1])
+        return values - values[0]
+    return np.interp(support, grid, density, left=0, right=0)
+
+
+def fft_kde(values, weights=None, bw_method="scott", bw_adjust=1, cut=3, clip=None, gridsize=200,
+            cumulative=False):
+    """Gaussian KDE by linear binning and FFT convolution, O(n + bins log bins).
+
+    Returns (support, density) on the same grid seaborn's exact estimator would use, or
+    None when the data cannot be smoothed (fewer than two distinct values). With
+    `cumulative`, the density is integrated from the first support point, as in seaborn.
+    """
+    values, weights = _clean(values, weights)
+    moments = column_moments(values, weights)
+    return binned_density(
+        moments, lambda n_bins: linear_bin(values, weights, moments["lo"], moments["hi"], n_bins),
+        bw_method, bw_adjust, cut, clip, gridsize, cumulative
+    )
+
+
+def binned_density(moments, counts_for, bw_method="scott", bw_adjust=1, cut=3, clip=None, gridsize=200,
+                   cumulative=False, stats=None):
+    """fft_kde from column_moments and a `counts_for(n_bins)` callable that may serve cached counts."""
+    bw = kde_factor(moments["n_eff"], bw_method) * bw_adjust * moments["std"]
+    if moments["n"] < 2 or not np.isfinite(bw) or bw <= 0:
+        return None
+    lo, hi = moments["lo"], moments["hi"]
+    # The support comes from the unweighted bandwidth, as seaborn's define_support
+    support_bw = kde_factor(moments["n"], bw_method) * bw_adjust * moments["support_std"]
+    support = support_grid(np.array([lo, hi]), support_bw, cut, clip, gridsize)
+    counts = counts_for(bin_resolution(hi - lo, bw))
+    with timed_stage(stats, "convolve"):
+        return support, smooth_counts(counts, lo, hi, bw, support, cumulative)
+
+
+def exact_kde(values, weights=None, bw_method="scott", bw_adjust=1, cut=3, clip=None, gridsize=200,
+              cumulative=False, support=None):
+    """Reference estimate with scipy's gaussian_kde, the way seaborn computes it."""
+    values, weights = _clean(values, weights)
+    if len(values) < 2:
+        return None
+    kde = stats.gaussian_kde(values, bw_method=bw_method, weights=weights)
+    kde.set_bandwidth(kde.factor * bw_adjust)
+    if support is None:
+        fit = kde
+        if weights is not None:
+            # seaborn fits the support without the weights
+            fit = stats.gaussian_kde(values, bw_method=bw_method)
+            fit.set_bandwidth(fit.factor * bw_adjust)
+        support = support_grid(values, np.sqrt(fit.covariance.squeeze()), cut, clip, gridsize)
+    if cumulative:
+        return support, np.array([kde.integrate_box_1d(support[0], s) for s in support])
+    return support, kde(support)
+
+
+def linear_bin_2d(x, y, weights, xlim, ylim, shape):
+    """Bilinear binning onto a (rows, cols) = (y, x) grid spanning `xlim` and `ylim`."""
+    rows, cols = shape
+    dx = (xlim[1] - xlim[0]) / (cols - 1)
+    dy = (ylim[1] - ylim[0]) / (rows - 1)
+    px = (x - xlim[0]) / dx
+    py = (y - ylim[0]) / dy
+    ix = np.clip(np.floor(px).astype(np.intp), 0, cols - 2)
+    iy = np.clip(np.floor(py).astype(np.intp), 0, rows - 2)
+    fx, fy = px - ix, py - iy
+    weights = np.ones_like(x) if weights is None else weights
+    flat = iy * cols + ix
+    size = rows * cols
+    counts = np.bincount(flat, weights * (1 - fx) * (1 - fy), minlength=size)
+    counts += np.bincount(flat + 1, weights * fx * (1 - fy), minlength=size)
+    counts += np.bincount(flat + cols, weights * (1 - fx) * fy, minlength=size)
+    counts += np.bincount(flat + cols + 1, weights * fx * fy, minlength=size)
+    return counts.reshape(rows, cols)
+
+
+def fft_kde_2d(x, y, weights=None, bw_method="scott", bw_adjust=1, cut=3, clip=None, gridsize=200,
+               cumulative=False):
+    """Bivariate Gaussian KDE by bilinear binning and 2D FFT convolution.
+
+    Uses the full kernel covariance scipy's gaussian_kde would use (the kernel is separable
+    only for uncorrelated data). Returns (density, (xgrid, ygrid)) with density[i, j] at
+    (xgrid[j], ygrid[i]), the layout seaborn contours, or None for singular data.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    valid = np.isfinite(x) & np.isfinite(y)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float)
+        valid &= np.isfinite(weights) & (weights > 0)
+        weights = weights[valid]
+    x, y = x[valid], y[valid]
+    if len(x) < 3:
+        return None
+
+    cov = np.cov(np.vstack([x, y]), aweights=weights)
+    kernel_cov = cov * (kde_factor(_effective_size(weights, len(x)), bw_method, dims=2) * bw_adjust) ** 2
+    if not np.all(np.isfinite(kernel_cov)) or np.linalg.det(kernel_cov) <= 0:
+        return None
+    precision = np.linalg.inv(kernel_cov)
+    bw = np.sqrt(np.diag(kernel_cov))
+
+    if clip is None or clip[0] is None or np.isscalar(clip[0]):
+        clip = (clip, clip)
+    # seaborn sizes the support from an unweighted fit
+    support_bw = bw
+    if weights is not None:
+        support_cov = np.cov(np.vstack([x, y])) * (kde_factor(len(x), bw_method, dims=2) * bw_adjust) ** 2
+        support_bw = np.sqrt(np.diag(support_cov))
+    xgrid = support_grid(x, support_bw[0], cut, clip[0], gridsize)
+    ygrid = support_grid(y, support_bw[1], cut, clip[1], gridsize)
+
+    # Spacing follows the kernel's width along each axis given the other (narrow when correlated)
+    step = 1 / np.sqrt(np.diag(precision))
+    xlim = (min(x.min(), xgrid[0]), max(x.max(), xgrid[-1]))
+    ylim = (min(y.min(), ygrid[0]), max(y.max(), ygrid[-1]))
+    shape = tuple(
+        int(np.clip(np.ceil((hi - lo) / width * BINS_PER_BANDWIDTH_2D) + 1, MIN_BINS_2D, MAX_BINS_2D))
+        for (lo, hi), width in ((ylim, step[1]), (xlim, step[0]))
+    )
+    counts = linear_bin_2d(x, y, weights, xlim, ylim, shape)
+
+    dy = (ylim[1] - ylim[0]) / (shape[0] - 1)
+    dx = (xlim[1] - xlim[0]) / (shape[1] - 1)
+    half_x = min(shape[1] - 1, int(np.ceil(KERNEL_TAIL * bw[0] / dx)))
+    half_y = min(shape[0] - 1, int(np.ceil(KERNEL_TAIL * bw[1] / dy)))
+    ox, oy = np.meshgrid(np.arange(-half_x, half_x + 1) * dx, np.arange(-half_y, half_y + 1) * dy)
+    quad = precision[0, 0] * ox ** 2 + 2 * precision[0, 1] * ox * oy + precision[1, 1] * oy ** 2
+    kernel = np.exp(-0.5 * quad) / (2 * np.pi * np.sqrt(np.linalg.det(kernel_cov)))
+    density = np.maximum(fftconvolve(counts, kernel, mode="same"), 0) / counts.sum()
+
+    if cumulative:
+        # Mass of the box from the first support point, as seaborn integrates it
+        density = np.cumsum(np.cumsum(density, axis=0), axis=1) * dx * dy
+    col_pos = (xgrid - xlim[0]) / dx
+    row_pos = (ygrid - ylim[0]) / dy
+    if cumulative:
+        # A running sum up to cell i covers the mass up to half a cell past grid point i
+        col_pos, row_pos = col_pos - 0.5, row_pos - 0.5
+    rr, cc = np.meshgrid(row_pos, col_pos, indexing="ij")
+    surface = map_coordinates(density, [rr, cc], order=1, mode="nearest")
+    if cumulative:
+        surface = surface - surface[:1, :] - surface[:, :1] + surface[0, 0]
+    return surface, (xgrid, ygrid)
+
+
+def kde_accuracy(values, weights=None, sample_size=ACCURACY_SAMPLE, seed=0, **kde_kws):
+    """Largest gap between the binned and exact estimators on a sample, relative to the peak.
+
+    Both estimators see the same rows, so the result measures only the binning and FFT
+    approximation, not the sampling.
+    """
+    values = np.asarray(values, dtype=float)
+    if len(values) > sample_size:
+        rows = np.random.default_rng(seed).choice(len(values), sample_size, replace=False)
+        values = values[rows]
+        weights = None if weights is None else np.asarray(weights, dtype=float)[rows]
+    binned = fft_kde(values, weights, **kde_kws)
+    if binned is None:
+        return None
+    support, approx = binned
+    _, exact = exact_kde(values, weights, support=support, **kde_kws)
+    return {
+        "rows": len(values),
+        "max_abs_error": float(np.max(np.abs(approx - exact))),
+        "relative_error": float(np.max(np.abs(approx - exact)) / max(np.max(exact), np.finfo(float).tiny)),
+    }
+
+
+def _level_order(values, order=None):
+    if order:
+        return list(order)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return list(values.cat.categories)
+    levels = list(pd.unique(values.dropna()))
+    return sorted(levels) if pd.api.types.is_numeric_dtype(values) else levels
+
+
+def hue_colors(values, hue_order=None, palette=None):
+    """Map every hue level to its color, in seaborn's level order."""
+    levels = _level_order(values, hue_order)
+    return dict(zip(levels, sns.color_palette(palette, len(levels))))
+
+
+def _hue_groups(frame, hue, hue_order, keep):
+    if hue is None:
+        return [(None, keep)]
+    return [(level, keep & (frame[hue] == level).to_numpy()) for level in _level_order(frame[hue], hue_order)]
+
+
+def _split_levels(data, x, hue, hue_order, weights, log_scale):
+    """Values and weights of `x` per hue level, on the log10 scale if asked."""
+    columns = [col for col in dict.fromkeys([x, hue, weights]) if col is not None]
+    frame = data[columns].dropna()
+    values = frame[x].to_numpy(dtype=float)
+    keep = np.ones(len(frame), dtype=bool)
+    if log_scale:
+        keep = values > 0
+        values = np.log10(np.where(keep, values, 1))
+    row_weights = frame[weights].to_numpy(dtype=float) if weights else None
+    return [
+        (level, values[rows], None if row_weights is None else row_weights[rows])
+        for level, rows in _hue_groups(frame, hue, hue_order, keep)
+    ]
+
+
+def grouped_kde(data, x, hue=None, hue_order=None, weights=None, common_norm=True, log_scale=False, stats=None,
+                **kde_kws):
+    """Binned KDE of `x` for every hue level; returns [(level, support, density)].
+
+    With `common_norm` the curves are scaled by each level's share of the total weight, so
+    they integrate to 1 together; with `log_scale` the estimate is made on log10(x) and the
+    support is returned in data units. Counts and curves are kept in kde_cache; pass a
+    dict as `stats` to collect stage timings and cache reuse.
+    """
+    with timed_stage(stats, "fingerprint"):
+        columns = [col for col in dict.fromkeys([x, hue, weights]) if col is not None]
+        base = (data_fingerprint(data, columns), x, hue, tuple(hue_order or ()), weights, bool(log_scale))
+    curve_key = ("curves", base, bool(common_norm and hue is not None), tuple(sorted(kde_kws.items())))
+    curves = kde_cache.get(curve_key)
+    if curves is not None:
+        _count(stats, "curves reused")
+        return curves
+
+    levels = kde_cache.get(("levels", base))
+    split = None
+    if levels is None:
+        with timed_stage(stats, "split levels"):
+            split = _split_levels(data, x, hue, hue_order, weights, log_scale)
+            levels = [
+                (level, column_moments(values, level_weights),
+                 len(values) if level_weights is None else level_weights.sum())
+                for level, values, level_weights in split
+            ]
+        kde_cache.put(("levels", base), levels, 256 * len(levels))
+    total = sum(share for _, _, share in levels)
+
+    curves = []
+    for index, (level, moments, share) in enumerate(levels):
+
+        def counts_for(n_bins, index=index, level=level, moments=moments):
+            nonlocal split
+            key = ("counts", base, level)
+            counts = kde_cache.get(key)
+            # Finer counts serve any wider kernel just as well
+            if counts is not None and len(counts) >= n_bins:
+                _count(stats, "counts reused")
+                return counts
+            _count(stats, "counts binned")
+            with timed_stage(stats, "bin counts"):
+                if split is None:
+                    split = _split_levels(data, x, hue, hue_order, weights, log_scale)
+                _, values, level_weights = split[index]
+                # Headroom so narrowing the bandwidth to half does not bin again
+                n_bins = min(2 * n_bins, MAX_BINS)
+                counts = linear_bin(values, level_weights, moments["lo"], moments["hi"], n_bins)
+            return kde_cache.put(key, counts, counts.nbytes)
+
+        result = binned_density(moments, counts_for, stats=stats, **kde_kws)
+        if result is None:
+            continue
+        support, density = result
+        if common_norm and hue is not None:
+            density = density * share / total
+        curves.append((level, 10 ** support if log_scale else support, density))
+    return kde_cache.put(curve_key, curves, sum(s.nbytes + d.nbytes for _, s, d in curves))
+
+
+def draw_kde_curves(ax, curves, colors=None, fill=False, log_scale=False, hue=None, color=None, vertical=False,
+                    legend=True):
+    """Draw grouped_kde output the way seaborn's univariate kdeplot does.
+
+    `colors` maps hue levels to colors (see hue_colors); `vertical` draws the density
+    along x, as on the y marginal of a joint grid.
+    """
+    for level, support, density in curves:
+        line_color = colors[level] if hue is not None else color or "C0"
+        label = None if level is None else str(level)
+        if vertical:
+            if fill:
+                ax.fill_betweenx(support, 0, density, color=line_color, alpha=.25, linewidth=0)
+            ax.plot(density, support, color=line_color, label=label)
+        else:
+            if fill:
+                ax.fill_between(support, 0, density, color=line_color, alpha=.25, linewidth=0)
+            ax.plot(support, density, color=line_color, label=label)
+    if vertical:
+        ax.set_xlim(left=0)
+        if log_scale:
+            ax.set_yscale("log")
+    else:
+        ax.set_ylim(bottom=0)
+        ax.set_ylabel("Density")
+        if log_scale:
+            ax.set_xscale("log")
+    if legend and hue is not None and curves:
+        ax.legend(title=hue)
+
+
+def grouped_kde_2d(data, x, y, hue=None, hue_order=None, weights=None, common_norm=True, log_scale=False,
+                   stats=None, **kde_kws):
+    """Binned bivariate KDE for every hue level; returns [(level, (xgrid, ygrid), density)].
+
+    As in seaborn, `common_norm` scales each level by its share of the rows, and only
+    applies when there is a hue. Surfaces are kept in kde_cache, so restyling reuses them.
+    """
+    columns = [col for col in dict.fromkeys([x, y, hue, weights]) if col is not None]
+    with timed_stage(stats, "fingerprint"):
+        key = ("surfaces", data_fingerprint(data, columns), x, y, hue, tuple(hue_order or ()), weights,
+               bool(common_norm and hue is not None), bool(log_scale), tuple(sorted(kde_kws.items())))
+    surfaces = kde_cache.get(key)
+    if surfaces is not None:
+        _count(stats, "surfaces reused")
+        return surfaces
+    with timed_stage(stats, "bin and convolve"):
+        surfaces = _estimate_surfaces(data, columns, x, y, hue, hue_order, weights, common_norm, log_scale,
+                                      **kde_kws)
+    nbytes = sum(density.nbytes + xgrid.nbytes + ygrid.nbytes for _, (xgrid, ygrid), density in surfaces)
+    return kde_cache.put(key, surfaces, nbytes)
+
+
+def _estimate_surfaces(data, columns, x, y, hue, hue_order, weights, common_norm, log_scale, **kde_kws):
+    frame = data[columns].dropna()
+    xs = frame[x].to_numpy(dtype=float)
+    ys = frame[y].to_numpy(dtype=float)
+    keep = np.ones(len(frame), dtype=bool)
+    if log_scale:
+        keep = (xs > 0) & (ys > 0)
+        xs = np.log10(np.where(keep, xs, 1))
+        ys = np.log10(np.where(keep, ys, 1))
+    row_weights = frame[weights].to_numpy(dtype=float) if weights else None
+    total = keep.sum()
+
+    surfaces = []
+    for level, rows in _hue_groups(frame, hue, hue_order, keep):
+        result = fft_kde_2d(xs[rows], ys[rows], None if row_weights is None else row_weights[rows], **kde_kws)
+        if result is None:
+            continue
+        density, (xgrid, ygrid) = result
+        if common_norm and hue is not None:
+            density = density * rows.sum() / total
+        if log_scale:
+            xgrid, ygrid = 10 ** xgrid, 10 ** ygrid
+        surfaces.append((level, (xgrid, ygrid), density))
+    return surfaces
+
+
+def quantile_to_level(densities, proportions):
+    """Density values enclosing the given proportions of the mass (seaborn's iso-proportion levels)."""
+    values = np.concatenate([np.ravel(density) for density in densities])
+    sorted_values = np.sort(values)[::-1]
+    normalized = np.cumsum(sorted_values) / values.sum()
+    idx = np.searchsorted(normalized, 1 - np.asarray(proportions))
+    return np.take(sorted_values, idx, mode="clip")
+
+
+def cmap_from_color(color):
+    """Sequential colormap seeded by a color, as seaborn builds for filled contours."""
+    r, g, b, _ = to_rgba(color)
+    h, s, _ = husl.rgb_to_husl(r, g, b)
+    xx = np.linspace(-1, 1, int(1.15 * 256))[:256]
+    ramp = np.zeros((256, 3))
+    ramp[:, 0] = h
+    ramp[:, 1] = s * np.cos(xx)
+    ramp[:, 2] = np.linspace(35, 80, 256)
+    colors = np.clip([husl.husl_to_rgb(*hsl) for hsl in ramp], 0, 1)
+    return ListedColormap(colors[::-1])
+
+
+def draw_bivariate_kde(ax, surfaces, levels=10, thresh=.05, fill=False, common_norm=True, colors=None, hue=None,
+                       color=None, log_scale=False, legend=True):
+    """Draw grouped_kde_2d output with seaborn's contour levels, thresh and hue layering."""
+    proportions = np.linspace(thresh or 0, 1, levels) if np.isscalar(levels) else levels
+    if common_norm and hue is not None and surfaces:
+        shared = quantile_to_level([density for _, _, density in surfaces], proportions)
+
+    for level, (xgrid, ygrid), density in surfaces:
+        draw_levels = shared if common_norm and hue is not None else quantile_to_level([density], proportions)
+        layer_color = colors[level] if hue is not None else color or "C0"
+        if fill:
+            ax.contourf(xgrid, ygrid, density, levels=draw_levels, cmap=cmap_from_color(layer_color))
+        else:
+            ax.contour(xgrid, ygrid, density, levels=draw_levels, colors=[layer_color])
+
+    if log_scale:
+        ax.set_xscale("log")
+        ax.set_yscale("log")
+    if legend and hue is not None and surfaces:
+        handles = [
+            Patch(facecolor=colors[level]) if fill else Line2D([], [], color=colors[level])
+            for level, _, _ in surfaces
+        ]
+        ax.legend(handles, [str(level) for level, _, _ in surfaces], title=hue)
+
+
+def binned_kdeplot(x=None, y=None, hue=None, hue_order=None, palette=None, color=None, **kwargs):
+    """Stand-in for sns.kdeplot in PairGrid.map_lower / map_upper: binned contours on the current axes."""
+    data = pd.DataFrame({"x": np.asarray(x, dtype=float), "y": np.asarray(y, dtype=float)})
+    if hue is not None:
+        data["hue"] = np.asarray(hue)
+    hue = "hue" if hue is not None else None
+    surfaces = grouped_kde_2d(data, "x", "y", hue=hue, hue_order=hue_order)
+    colors = hue_colors(data["hue"], hue_order, palette) if hue else None
+    # PairGrid collects the legend itself
+    draw_bivariate_kde(plt.gca(), surfaces, colors=colors, hue=hue, color=color, legend=False)
+
+
+class BinnedBandwidth:
+    """`bw_method` callable that restores each group's bandwidth factor after data reduction.
+
+    Binned or quantile-compressed groups have far fewer rows than the data they stand for,
+    so scipy's rules would pick too wide a kernel. Each reduced group is recognised by its
+    length and end points and given the factor of its true sample size; anything else gets
+    the usual rule. Seaborn sizes the support grid from a second, unweighted fit of the same
+    points, which gets its own factor (`plain_factor`) so the grid matches the full data.
+    """
+
+    def __init__(self, bw_method="scott"):
+        self.bw_method = bw_method
+        self.factors = {}
+
+    @staticmethod
+    def _key(dataset):
+        dataset = np.asarray(dataset, dtype=float).ravel()
+        return len(dataset), round(float(dataset[0]), 9), round(float(dataset[-1]), 9)
+
+    def register(self, reduced, factor, plain_factor=None):
+        self.factors[self._key(reduced)] = (factor, factor if plain_factor is None else plain_factor)
+
+    def __call__(self, kde):
+        factors = self.factors.get(self._key(kde.dataset))
+        if factors is None:
+            return kde_factor(kde.neff, self.bw_method)
+        weighted = np.ptp(kde.weights) > 0
+        return factors[0] if weighted else factors[1]
+
+
+def _groups(frame, by):
+    if not by:
+        return [np.arange(len(frame))]
+    return list(frame.groupby(by, sort=False, dropna=False, observed=True).indices.values())
+
+
+def bin_groups(data, x, by=(), weights=None, bw_method="scott", bw_adjust=1, log_scale=False):
+    """Linearly bin `x` within every group of `by` for seaborn's weighted KDE.
+
+    Returns a compact frame with one row per non-empty fine-grid point (bin centre, group
+    columns and a BIN_WEIGHT column) and the BinnedBandwidth to pass as `bw_method`.
+    """
+    by = [col for col in dict.fromkeys(by) if col is not None and col != x]
+    columns = [col for col in dict.fromkeys([x, *by, weights]) if col is not None]
+    frame = data[columns].dropna(subset=[x] + ([weights] if weights else []))
+    if log_scale:
+        frame = frame[frame[x] > 0]
+    bandwidth = BinnedBandwidth(bw_method)
+
+    parts = []
+    for rows in _groups(frame, by):
+        group = frame.iloc[rows]
+        values = group[x].to_numpy(dtype=float)
+        if log_scale:
+            values = np.log10(values)
+        row_weights = group[weights].to_numpy(dtype=float) if weights else None
+        if len(values) < 2 or values.min() == values.max():
+            continue
+        bw = kernel_bandwidth(values, row_weights, bw_method, bw_adjust)
+        lo, hi = values.min(), values.max()
+        n_bins = _fine_bins(hi - lo, bw)
+        counts = linear_bin(values, row_weights, lo, hi, n_bins)
+        centres = np.linspace(lo, hi, n_bins)
+        nonzero = counts > 0
+        centres, counts = centres[nonzero], counts[nonzero]
+        # The unweighted fit on the centres must reproduce the unweighted fit on the raw values
+        plain_factor = kde_factor(len(values), bw_method) * values.std(ddof=1) / centres.std(ddof=1)
+        bandwidth.register(centres, kde_factor(_effective_size(row_weights, len(values)), bw_method), plain_factor)
+
+        part = pd.DataFrame({x: 10 ** centres if log_scale else centres, BIN_WEIGHT: counts})
+        for col in by:
+            part[col] = group[col].iloc[0]
+        parts.append(part)
+
+    binned = pd.concat(parts, ignore_index=True) if parts else frame.iloc[:0].assign(**{BIN_WEIGHT: []})
+    for col in by:
+        # Keep category order and dtype so hue levels and facets come out the same
+        if isinstance(data[col].dtype, pd.CategoricalDtype):
+            binned[col] = binned[col].astype(data[col].dtype)
+    return binned, bandwidth
+
+
+def compress_quantiles(data, value, by=(), bw_method="scott", points=QUANTILE_POINTS, log_scale=False,
+                       stats=None):
+    """Replace each group of `value` by `points` evenly spaced quantiles (min and max included).
+
+    For estimators without weights (violinplot). Groups already that small are kept as
+    they are. Group sizes are not preserved, so count-based scaling needs the full data.
+    Returns the compressed frame and the BinnedBandwidth to pass as `bw_method`; both are
+    kept in kde_cache, since neither depends on bw_adjust or styling.
+    """
+    by = [col for col in dict.fromkeys(by) if col is not None and col != value]
+    with timed_stage(stats, "fingerprint"):
+        key = ("quantiles", data_fingerprint(data, [value, *by]), value, tuple(by), bw_method, bool(log_scale),
+               points)
+    cached = kde_cache.get(key)
+    if cached is not None:
+        _count(stats, "quantile frames reused")
+        return cached
+    with timed_stage(stats, "compress quantiles"):
+        compressed, bandwidth = _compress_groups(data, value, by, bw_method, points, log_scale)
+    return kde_cache.put(key, (compressed, bandwidth), int(compressed.memory_usage(deep=True).sum()))
+
+
+def _compress_groups(data, value, by, bw_method, points, log_scale):
+    frame = data[[value, *by]].dropna(subset=[value])
+    bandwidth = BinnedBandwidth(bw_method)
+
+    parts = []
+    for rows in _groups(frame, by):
+        group = frame.iloc[rows]
+        n = len(group)
+        if n <= points:
+            parts.append(group)
+            continue
+        quantiles = np.quantile(group[value].to_numpy(dtype=float), np.linspace(0, 1, points))
+        transformed = np.log10(quantiles) if log_scale and quantiles[0] > 0 else quantiles
+        bandwidth.register(transformed, kde_factor(n, bw_method))
+        part = pd.DataFrame({value: quantiles})
+        for col in by:
+            part[col] = group[col].iloc[0]
+        parts.append(part)
+
+    compressed = pd.concat(parts, ignore_index=True) if parts else frame
+    for col in by:
+        if isinstance(data[col].dtype, pd.CategoricalDtype):
+            compressed[col] = compressed[col].astype(data[col].dtype)
+    return compressed, bandwidth
+
+
+def show_kde_instrumentation(stats):
+    """Where the last rerun spent its time and what it reused from kde_cache."""
+    if not stats:
+        return
+    cache = kde_cache.stats()
+    with st.expander("KDE instrumentation"):
+        seconds = stats.get("seconds", {})
+        if seconds:
+            table = pd.DataFrame({"seconds": seconds}).rename_axis("stage")
+            st.dataframe(table.style.format({"seconds": "{:.3f}"}))
+        for name, count in stats.get("counts", {}).items():
+            st.caption(f"{name}: {count}")
+        st.caption(
+            f"KDE cache: {cache['entries']} entries · {cache['mb']:.1f}/{cache['limit_mb']:.0f} MB · "
+            f"{cache['hits']} hits · {cache['misses']} misses · {cache['evictions']} evictions"
+        )
@@ -1,16 +1,22 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 from itertools import cycle
+from PROFILE import get_profile
+from PREVIEW import preview_dataframe
+from KDE import (BINNED_MIN_ROWS, BIVARIATE_MIN_ROWS, grouped_kde, grouped_kde_2d, draw_kde_curves,
+                 draw_bivariate_kde, hue_colors, kde_accuracy, timed_stage, show_kde_instrumentation)
 
 class KDEPlot:
     def __init__(self, data, saved_plots):
         self.data = data
         self.saved_plots = saved_plots
-        self.numeric_columns = self.data.select_dtypes(include=["int", "float"]).columns.tolist()
-        self.categorical_columns = self.data.select_dtypes(exclude=["int", "float"]).columns.tolist()
-        self.columns = self.data.columns.tolist()
+        self.profile = get_profile(self.data)
+        self.numeric_columns = self.profile.numeric_columns
+        self.categorical_columns = self.profile.categorical_columns
+        self.columns = self.profile.columns
 
     def display(self):
         tab1, tab2 = st.tabs(["Plots", "Documents"])
@@ -20,7 +26,7 @@ class KDEPlot:
             st.subheader("Core Data and Axes Parameters")
             st.info("The data is already loaded.")
             with st.expander("Data Frame is here"):
-                st.dataframe(self.data)
+                preview_dataframe(self.data, self.profile)
 
             # Select columns for x and y axes
             col1, col2 = st.columns(2,border=True)
@@ -47,7 +53,7 @@ class KDEPlot:
                         except:
                             st.error("Invalid range format. Please enter a tuple like (1, 2).")
                     else:
-                        self.hue_order = st.multiselect("Select the hue order", self.data[self.hue].unique().tolist())
+                        self.hue_order = st.multiselect("Select the hue order", self.profile.unique_values(self.hue))
 
             # Palette selection
             with col1:
@@ -67,6 +73,12 @@ class KDEPlot:
                 self.gridsize = st.number_input("Grid Size", min_value=10, max_value=500, value=200)
                 self.cut = st.number_input("Cut", min_value=0, max_value=10, value=3)
                 self.levels = st.selectbox("Contour Levels", ["10", "20", "50", "100"])
+                self.engine = st.selectbox(
+                    "KDE engine", ["auto", "binned", "exact"],
+                    help=f"auto uses the binned FFT estimator from {BINNED_MIN_ROWS:,} rows "
+                         f"({BIVARIATE_MIN_ROWS:,} for bivariate plots)"
+                )
+                self.check_accuracy = st.checkbox("Check binned KDE accuracy")
 
             # Generate Plot
             if st.button("Generate KDE Plot",use_container_width=True,type='primary'):
@@ -79,7 +91,9 @@ class KDEPlot:
                         plt.ylabel(self.y)
 
                     # Generate KDE plot using seaborn.kdeplot
-                    if self.is_bivariate:
+                    if self.use_binned():
+                        self.generate_binned(plt.gca())
+                    elif self.is_bivariate:
                         fig = sns.kdeplot(
                             data=self.data, x=self.x, y=self.y, hue=self.hue,
                             bw_method=self.bw_method, bw_adjust=self.bw_adjust,
@@ -118,3 +132,53 @@ class KDEPlot:
                         st.pyplot(saved_plot)
             else:
                 st.info("No plots saved yet.")
+
+    def use_binned(self):
+        # Numeric hues are drawn with seaborn's continuous palette
+        if self.engine == "exact" or self.x not in self.numeric_columns or self.hue in self.numeric_columns:
+            return False
+        if self.is_bivariate and self.y not in self.numeric_columns:
+            return False
+        min_rows = BIVARIATE_MIN_ROWS if self.is_bivariate else BINNED_MIN_ROWS
+        return self.engine == "binned" or self.profile.n_rows >= min_rows
+
+    def generate_binned(self, ax):
+        kde_kws = dict(
+            bw_method=self.bw_method, bw_adjust=self.bw_adjust, cut=self.cut,
+            gridsize=self.gridsize, cumulative=self.cumulative
+        )
+        colors = hue_colors(self.data[self.hue], self.hue_order, self.palette) if self.hue else None
+        stats = {}
+        if self.is_bivariate:
+            surfaces = grouped_kde_2d(
+                self.data, self.x, self.y, hue=self.hue, hue_order=self.hue_order or None,
+                common_norm=self.common_norm, log_scale=self.log_scale, stats=stats, **kde_kws
+            )
+            with timed_stage(stats, "draw"):
+                draw_bivariate_kde(
+                    ax, surfaces, levels=int(self.levels), fill=self.fill, common_norm=self.common_norm,
+                    colors=colors, hue=self.hue, log_scale=self.log_scale
+                )
+            st.caption(f"Binned 2D FFT KDE over {self.profile.n_rows:,} rows")
+            show_kde_instrumentation(stats)
+            return
+
+        curves = grouped_kde(
+            self.data, self.x, hue=self.hue, hue_order=self.hue_order or None,
+            common_norm=self.common_norm, log_scale=self.log_scale, stats=stats, **kde_kws
+        )
+        with timed_stage(stats, "draw"):
+            draw_kde_curves(ax, curves, colors=colors, fill=self.fill, log_scale=self.log_scale, hue=self.hue)
+        st.caption(f"Binned FFT KDE over {self.profile.n_rows:,} rows")
+        show_kde_instrumentation(stats)
+
+        if self.check_accuracy:
+            values = self.data[self.x].dropna().to_numpy(dtype=float)
+            if self.log_scale:
+                values = np.log10(values[values > 0])
+            report = kde_accuracy(values, **kde_kws)
+            if report:
+                st.caption(
+                    f"Accuracy vs exact KDE on {report['rows']:,} rows: max error "
+                    f"{report['max_abs_error']:.2e} ({report['relative_error']:.3%} of peak)"
+                )
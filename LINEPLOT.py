@@ -3,14 +3,20 @@ import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 from itertools import cycle
+from PROFILE import get_profile
+from PREVIEW import preview_dataframe
+from ERRORBARS import bootstrap_errorbar, worker_input, show_timings
+from ECDFSTEPS import axes_pixels
+from LTTB import LTTB_MIN_ROWS, LTTB_MODES, VERTICES_PER_PIXEL, downsample_lines
 
 class LinePlot:
     def __init__(self, data, saved_plots):
         self.data = data
         self.saved_plots = saved_plots
-        self.numeric_columns = self.data.select_dtypes(include=["int", "float"]).columns.tolist()
-        self.categorical_columns = self.data.select_dtypes(exclude=["int", "float"]).columns.tolist()
-        self.columns = self.data.columns.tolist()
+        self.profile = get_profile(self.data)
+        self.numeric_columns = self.profile.numeric_columns
+        self.categorical_columns = self.profile.categorical_columns
+        self.columns = self.profile.columns
 
     def display(self):
         tab1, tab2, tab3 = st.tabs(["Plotting", "Plotted Plots Section", "Document Section"])
@@ -20,7 +26,7 @@ class LinePlot:
             st.subheader("Core Data and Axes Parameters")
             st.info("The data is already loaded.")
             with st.expander("Data Frame is inside"):
-                st.dataframe(self.data)
+                preview_dataframe(self.data, self.profile)
 
             col1, col2 = st.columns(2)
             with col1:
@@ -34,7 +40,7 @@ class LinePlot:
 
             with col2:
                 self.palette = st.pills("Select color palette", ["deep", "muted", "pastel", "dark", "colorblind", "viridis", "coolwarm"], key='palette')
-                self.hue_order_list = [None] + (self.data[self.hue].unique().tolist() if self.hue and self.hue in self.data else [])
+                self.hue_order_list = [None] + (self.profile.unique_values(self.hue) if self.hue and self.hue in self.data else [])
                 self.hue_order = st.multiselect("Specify hue order", self.hue_order_list, key='hue_order')
 
                 hue_norm_input = st.text_input("Normalization for Hue (e.g., '10,20')", key='hue_norm')
@@ -44,20 +50,24 @@ class LinePlot:
                 size_norm_input = st.text_input("Normalization for Size (e.g., '10,20')", key='size_norm', value='10,20')
                 self.size_norm = tuple(map(int, size_norm_input.split(','))) if size_norm_input else None
 
-                self.size_order_list = [None] + (self.data[self.size].unique().tolist() if self.size and self.size in self.data else [])
+                self.size_order_list = [None] + (self.profile.unique_values(self.size) if self.size and self.size in self.data else [])
                 self.size_order = st.multiselect("Select size order", self.size_order_list, key='size_order')
 
                 self.dashes = st.checkbox("Enable dashes", key='dashes')
                 self.markers = st.checkbox("Enable markers", key='markers')
 
-                self.style_order_list = [None] + (self.data[self.style].unique().tolist() if self.style and self.style in self.data else [])
+                self.style_order_list = [None] + (self.profile.unique_values(self.style) if self.style and self.style in self.data else [])
                 self.style_order = st.multiselect("Specify style order", self.style_order_list, key='style_order')
 
-                self.estimator = st.pills("Select estimator", ['mean', 'sum', 'min', 'max', 'None'], key='estimator')
-                self.errorbar = st.pills("Select error bar type", ['ci', 'pi', 'se', 'sd', 'None'], key='errorbar')
+                self.estimator = st.pills("Select estimator", ['mean', 'median', 'sum', 'min', 'max', 'None'], key='estimator')
+                self.errorbar = st.pills("Select error bar type", ['analytic', 'ci', 'pi', 'se', 'sd', 'None'], key='errorbar')
                 self.n_boot = st.number_input("Number of bootstraps", min_value=100, max_value=5000, value=1000, key='n_boot')
+                self.workers = worker_input(key='workers')
                 self.legend = st.pills("Select legend type", ['auto', 'brief', 'full'], key='legend')
                 self.err_style = st.pills("Select error style", ['band', 'bars'], key='err_style')
+                self.downsampling = st.pills(
+                    "Downsample long raw series (estimator None)", LTTB_MODES, default="lttb", key='downsampling'
+                )
 
             if st.button("Plot the Plots", key='plot_button'):
                 if not self.x or not self.y:
@@ -65,8 +75,24 @@ class LinePlot:
                 else:
                     try:
                         fig, ax = plt.subplots()
+                        estimator = self.estimator if self.estimator != 'None' else None
+                        errorbar = self.errorbar if self.errorbar != 'None' else None
+                        # Units and weights change how seaborn aggregates, so those plots keep its bootstrap
+                        data, errorbar = bootstrap_errorbar(
+                            self.data, self.y, [self.x, self.hue, self.size, self.style],
+                            estimator, errorbar, self.n_boot, workers=self.workers,
+                            units=self.units or None, weights=self.weights or None
+                        )
+                        # Raw series draw every row; keep a few vertices per pixel of each line instead
+                        downsampled = self.use_downsampling(estimator)
+                        if downsampled:
+                            budget = axes_pixels(ax) * VERTICES_PER_PIXEL
+                            data = downsample_lines(
+                                data, self.x, self.y, [self.hue, self.size, self.style, self.units],
+                                budget=budget, mode=self.downsampling
+                            )
                         sns.lineplot(
-                            data=self.data, x=self.x, y=self.y, 
+                            data=data, x=self.x, y=self.y, 
                             hue=self.hue if self.hue and self.hue in self.data else None, 
                             hue_order=self.hue_order if self.hue_order else None, 
                             hue_norm=self.hue_norm,
@@ -80,14 +106,20 @@ class LinePlot:
                             weights=self.weights if self.weights and self.weights in self.data else None,
                             dashes=self.dashes,
                             markers=self.markers,
-                            estimator=self.estimator if self.estimator != 'None' else None,
-                            errorbar=self.errorbar if self.errorbar != 'None' else None,
+                            estimator=estimator,
+                            errorbar=errorbar,
                             n_boot=self.n_boot,
                             err_style=self.err_style,
                             palette=self.palette if self.palette else None,
                             legend=self.legend, ax=ax
                         )
                         st.pyplot(fig)
+                        if downsampled:
+                            st.caption(
+                                f"{self.profile.n_rows:,} rows drawn with {len(data):,} vertices "
+                                f"({self.downsampling}, up to {budget:,} per line)"
+                            )
+                        show_timings(getattr(errorbar, "timings", None))
                         self.saved_plots.append(fig)
                     except Exception as e:
                         st.error(f"Error generating plot: {e}")
@@ -106,3 +138,12 @@ class LinePlot:
         with tab3:
             st.header("Document Section")
             st.code(__file__, language="python")
+
+    def use_downsampling(self, estimator):
+        # Only raw series are drawn vertex by vertex; numeric or datetime x and numeric y
+        if estimator is not None or self.downsampling in (None, "off"):
+            return False
+        x_type = self.data[self.x].dtype
+        if not (pd.api.types.is_numeric_dtype(x_type) or pd.api.types.is_datetime64_any_dtype(x_type)):
+            return False
+        return self.y in self.numeric_columns and self.profile.n_rows >= LTTB_MIN_ROWS
@@ -0,0 +1,312 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scipy.cluster import hierarchy
+from scipy.cluster.vq import kmeans2
+from scipy.spatial.distance import cdist
+from seaborn.matrix import ClusterGrid
+from PROFILE import data_fingerprint
+
+# When rows are pre-clustered into centroids before the linkage
+PRECLUSTER_MODES = ["auto", "always", "off"]
+# Centroids rows are pre-clustered into
+LINKAGE_CENTROIDS = 1000
+# Memory an exact linkage may take: its condensed distances and scipy's working copy
+LINKAGE_MEMORY_MB = int(os.environ.get("LINKAGE_MEMORY_MB", "2048"))
+# Memory of one block of rows while the condensed distances are filled
+LINKAGE_CHUNK_MB = 64
+# Memory held by linkage matrices and centroids across reruns
+LINKAGE_CACHE_MB = int(os.environ.get("LINKAGE_CACHE_MB", "256"))
+# Linkage methods that are only defined on euclidean distances
+EUCLIDEAN_METHODS = ("centroid", "median", "ward")
+# Ways to truncate the row dendrogram, as scipy's dendrogram names them
+TRUNCATE_MODES = ["lastp", "level"]
+
+
+class LinkageCache:
+    """LRU of linkage matrices and row centroids, bounded by the bytes it holds.
+
+    Linkages depend on the values, method, metric and scaling only, so restyling a
+    clustermap (colors, ratios, colorbar) redraws from here.
+    """
+
+    def __init__(self, max_bytes=LINKAGE_CACHE_MB * 2 ** 20):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Streamlit serves every session from its own thread
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key][0]
+
+    def put(self, key, value, nbytes):
+        with self.lock:
+            if key in self.entries:
+                self.bytes -= self.entries.pop(key)[1]
+            self.entries[key] = (value, nbytes)
+            self.bytes += nbytes
+            while self.bytes > self.max_bytes and len(self.entries) > 1:
+                self.bytes -= self.entries.popitem(last=False)[1][1]
+                self.evictions += 1
+        return value
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "mb": self.bytes / 2 ** 20,
+                "limit_mb": self.max_bytes / 2 ** 20,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# Shared by every session served by this process
+linkage_cache = LinkageCache()
+
+
+def scaled_frame(data, columns, z_score=None, standard_scale=None):
+    """The matrix clustermap clusters and draws: `columns` of `data`, z-scored or standard-scaled."""
+    if z_score is not None and standard_scale is not None:
+        raise ValueError("Cannot perform both z-scoring and standard-scaling on data")
+    frame = data[list(columns)]
+    if z_score is not None:
+        frame = ClusterGrid.z_score(frame, z_score)
+    if standard_scale is not None:
+        frame = ClusterGrid.standard_scale(frame, standard_scale)
+    return frame.astype(float)
+
+
+def linkage_mb(n_observations):
+    """Memory an exact linkage of `n_observations` takes: the condensed distances, twice."""
+    return 2 * 8 * (n_observations * (n_observations - 1) // 2) / 2 ** 20
+
+
+def condensed_distances(values, metric="euclidean", chunk_mb=LINKAGE_CHUNK_MB):
+    """pdist of the rows of `values`, filled one block of rows at a time.
+
+    Each block holds the distances of its rows to every later row, at most `chunk_mb`
+    of them, so only the condensed result is ever held in full.
+    """
+    n = len(values)
+    condensed = np.empty(n * (n - 1) // 2)
+    block_rows = max(int(chunk_mb * 2 ** 20 // (8 * max(n, 1))), 1)
+    for start in range(0, n - 1, block_rows):
+        stop = min(start + block_rows, n - 1)
+        block = cdist(values[start:stop], values[start + 1:], metric)
+        for row in range(start, stop):
+            # Pairs (row, j > row) are contiguous in condensed order
+            offset = row * n - row * (row + 1) // 2
+            condensed[offset:offset + n - row - 1] = block[row - start, row - start:]
+    return condensed
+
+
+def exact_linkage(values, method="average", metric="euclidean", chunk_mb=LINKAGE_CHUNK_MB):
+    """hierarchy.linkage of the rows of `values`, on distances filled by condensed_distances."""
+    if method in EUCLIDEAN_METHODS and metric != "euclidean":
+        raise ValueError(f"Method '{method}' requires the distance metric to be Euclidean")
+    return hierarchy.linkage(condensed_distances(values, metric, chunk_mb), method=method)
+
+
+def row_centroids(data, columns, z_score=None, standard_scale=None, n_centroids=LINKAGE_CENTROIDS, seed=0):
+    """k-means centroids of the scaled rows, with the centroid each row belongs to.
+
+    k-means starts from randomly chosen rows (k-means++ seeding is quadratic in the
+    centroids). Centroids are the means of their rows; empty clusters are dropped. Each
+    centroid is labelled by its number and row count.
+    """
+    key = ("centroids", data_fingerprint(data, columns), z_score, standard_scale, n_centroids, seed)
+    found = linkage_cache.get(key)
+    if found is not None:
+        return found
+
+    frame = scaled_frame(data, columns, z_score, standard_scale)
+    values = frame.to_numpy()
+    _, labels = kmeans2(values, min(n_centroids, len(values)), minit="points", seed=seed)
+    _, groups, sizes = np.unique(labels, return_inverse=True, return_counts=True)
+    sums = np.zeros((len(sizes), values.shape[1]))
+    np.add.at(sums, groups, values)
+    index = pd.Index([f"c{i} ({size:,} rows)" for i, size in enumerate(sizes)], name=frame.index.name)
+    centroids = pd.DataFrame(sums / sizes[:, None], index=index, columns=frame.columns)
+    groups = groups.astype(np.intp)
+    return linkage_cache.put(key, (centroids, groups), centroids.to_numpy().nbytes + groups.nbytes)
+
+
+def _cached_linkage(key, values, method, metric):
+    linkage = linkage_cache.get(key)
+    if linkage is None:
+        linkage = exact_linkage(values, method, metric)
+        linkage_cache.put(key, linkage, linkage.nbytes)
+    return linkage
+
+
+def cluster_matrix(data, columns, method="average", metric="euclidean", z_score=None, standard_scale=None,
+                   row_cluster=True, col_cluster=True, precluster="auto", n_centroids=LINKAGE_CENTROIDS,
+                   memory_mb=LINKAGE_MEMORY_MB):
+    """The matrix clustermap draws, with its row and column linkages.
+
+    Linkages are cached per values, columns, axis, method, metric and scaling. Rows are
+    pre-clustered into `n_centroids` k-means centroids "always", or in "auto" mode when
+    their exact linkage would take more than `memory_mb`; the centroids are then the
+    rows drawn and linked, and "groups" gives the centroid of every row. The column
+    linkage is always exact, on every row.
+    """
+    columns = list(columns)
+    start = time.perf_counter()
+    matrix = scaled = scaled_frame(data, columns, z_score, standard_scale)
+    fingerprint = data_fingerprint(data, columns)
+    exact = ("linkage", fingerprint, method, metric, z_score, standard_scale)
+
+    groups, row_linkage, col_linkage = None, None, None
+    if row_cluster:
+        too_large = linkage_mb(len(matrix)) > memory_mb
+        if precluster == "always" or (precluster == "auto" and too_large):
+            matrix, groups = row_centroids(data, columns, z_score, standard_scale, n_centroids)
+            row_key = (*exact, "rows", n_centroids)
+        elif too_large:
+            raise ValueError(
+                f"Linking {len(matrix):,} rows exactly needs about {linkage_mb(len(matrix)):,.0f} MB, over the "
+                f"{memory_mb:,} MB cap; pre-cluster the rows or raise the cap"
+            )
+        else:
+            row_key = (*exact, "rows", None)
+        if linkage_mb(len(matrix)) > memory_mb:
+            raise ValueError(f"Linking {len(matrix):,} centroids needs more than the {memory_mb:,} MB cap")
+        row_linkage = _cached_linkage(row_key, matrix.to_numpy(), method, metric)
+    if col_cluster:
+        col_linkage = _cached_linkage((*exact, "columns"), scaled.to_numpy().T, method, metric)
+
+    return {
+        "matrix": matrix,
+        "row_linkage": row_linkage,
+        "col_linkage": col_linkage,
+        "groups": groups,
+        "n_rows": len(data),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def truncate_linkage(linkage, mode="lastp", p=50):
+    """The top of `linkage`, with the leaf of the truncated tree every original leaf falls in.
+
+    "lastp" keeps the last p - 1 merges (p leaves); "level" keeps the merges at most p
+    levels below the root. Truncated leaves are numbered in the order of their node ids,
+    and heights are kept, so the dendrogram drawn is the top of the full one.
+    """
+    n_leaves = len(linkage) + 1
+    children = linkage[:, :2].astype(np.intp)
+    if mode == "level":
+        depth = np.zeros(2 * n_leaves - 1, dtype=np.intp)
+        # A merge always comes after its children, so walking back visits parents first
+        for merge in range(n_leaves - 2, -1, -1):
+            depth[children[merge]] = depth[n_leaves + merge] + 1
+        kept = depth[n_leaves:] <= p
+    else:
+        kept = np.arange(n_leaves - 1) >= n_leaves - p
+    if not kept.any():
+        raise ValueError("Truncating the dendrogram must leave at least one merge")
+
+    kept_merges = np.flatnonzero(kept)
+    tops = children[kept_merges].ravel()
+    leaves = np.sort(tops[(tops < n_leaves) | ~kept[np.maximum(tops - n_leaves, 0)]])
+    new_ids = np.full(2 * n_leaves - 1, -1, dtype=np.intp)
+    new_ids[leaves] = np.arange(len(leaves))
+    new_ids[n_leaves + kept_merges] = len(leaves) + np.arange(len(kept_merges))
+
+    sizes = np.ones(2 * len(leaves) - 1)
+    truncated = np.empty((len(kept_merges), 4))
+    for row, merge in enumerate(kept_merges):
+        left, right = new_ids[children[merge]]
+        sizes[len(leaves) + row] = sizes[left] + sizes[right]
+        truncated[row] = left, right, linkage[merge, 2], sizes[len(leaves) + row]
+
+    # Nodes below a truncated leaf take its number, parents first
+    groups = new_ids.copy()
+    for merge in np.flatnonzero(~kept)[::-1]:
+        groups[children[merge]] = groups[n_leaves + merge]
+    return truncated, groups[:n_leaves]
+
+
+def group_bands(matrix, groups, weights=None):
+    """The mean row of every group of `matrix` rows, skipping missing values.
+
+    `weights` counts the data rows behind each row of `matrix` (centroids stand for
+    several), so a band is the mean of the data rows it covers. Bands are labelled by
+    their number and row count.
+    """
+    values = matrix.to_numpy(dtype=float)
+    weights = np.ones(len(values)) if weights is None else np.asarray(weights, dtype=float)
+    present = ~np.isnan(values)
+    n_groups = groups.max() + 1
+    sums = np.zeros((n_groups, values.shape[1]))
+    totals = np.zeros((n_groups, values.shape[1]))
+    np.add.at(sums, groups, np.where(present, values, 0) * weights[:, None])
+    np.add.at(totals, groups, present * weights[:, None])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        bands = sums / totals
+    rows = np.bincount(groups, weights=weights, minlength=n_groups).astype(int)
+    index = pd.Index([f"g{i} ({size:,} rows)" for i, size in enumerate(rows)], name=matrix.index.name)
+    return pd.DataFrame(bands, index=index, columns=matrix.columns)
+
+
+def truncated_matrix(clustered, mode="lastp", p=50):
+    """Bands of a clustered matrix under its truncated row dendrogram.
+
+    Returns the band matrix, the truncated row linkage and the band of every row of
+    the clustered matrix.
+    """
+    linkage, bands = truncate_linkage(clustered["row_linkage"], mode, p)
+    groups = clustered["groups"]
+    weights = None if groups is None else np.bincount(groups, minlength=len(clustered["matrix"]))
+    return group_bands(clustered["matrix"], bands, weights), linkage, bands
+
+
+def leaf_order(clustered, index, bands=None):
+    """Every data row in the order of the full row dendrogram.
+
+    Rows of one centroid keep their data order. "centroid" and "band" columns say which
+    centroid and which band of a truncated clustermap each row was drawn in.
+    """
+    groups = clustered["groups"]
+    n_leaves = len(index) if groups is None else groups.max() + 1
+    order = np.arange(n_leaves)
+    if clustered["row_linkage"] is not None:
+        order = hierarchy.leaves_list(clustered["row_linkage"])
+    rank = np.empty(n_leaves, dtype=np.intp)
+    rank[order] = np.arange(n_leaves)
+    leaves = np.arange(len(index)) if groups is None else groups
+    rows = np.argsort(rank[leaves], kind="stable")
+
+    frame = pd.DataFrame({"row": index[rows], "leaf": np.arange(len(rows))})
+    if groups is not None:
+        frame["centroid"] = groups[rows]
+    if bands is not None:
+        frame["band"] = bands[leaves[rows]]
+    return frame
+
+
+def show_linkage_stats(clustered):
+    """One-line summary of the clustering behind a clustermap, with the cache state."""
+    cache = linkage_cache.stats()
+    rows = f"{clustered['n_rows']:,} rows"
+    if clustered["groups"] is not None:
+        rows += f" pre-clustered into {len(clustered['matrix']):,} centroids"
+    st.caption(
+        f"{rows} clustered in {clustered['seconds']:.2f}s · linkage cache: {cache['entries']} entries, "
+        f"{cache['mb']:.1f}/{cache['limit_mb']:.0f} MB · {cache['hits']} hits · {cache['misses']} misses"
+    )
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+# Series at least this long are downsampled before seaborn draws them
+LTTB_MIN_ROWS = 50_000
+# Downsampling methods; minmax keeps every pixel column's extremes, lttb keeps the shape
+LTTB_MODES = ["lttb", "minmax", "off"]
+# Vertices kept per horizontal pixel of the axes, for each line
+VERTICES_PER_PIXEL = 2
+
+
+def _as_float(series):
+    # Datetimes become nanoseconds; the frame itself keeps its dtypes
+    if pd.api.types.is_datetime64_any_dtype(series) or pd.api.types.is_timedelta64_dtype(series):
+        return series.to_numpy(dtype="int64").astype(float)
+    return series.to_numpy(dtype=float)
+
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: positions of the `n_out` vertices that keep the shape.
+
+    `x` is sorted. The first and last points are kept; every bucket of the points between
+    them keeps the point making the largest triangle with the point kept before it and
+    the mean of the next bucket.
+    """
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    bounds = np.append(edges, n)
+    counts = np.diff(bounds)
+    mean_x = np.add.reduceat(x, bounds[:-1]) / counts
+    mean_y = np.add.reduceat(y, bounds[:-1]) / counts
+
+    kept = np.empty(n_out, dtype=np.intp)
+    kept[0], kept[-1], anchor = 0, n - 1, 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Twice the triangle area, up to sign, for every point of the bucket
+        area = np.abs(
+            (x[anchor] - mean_x[i + 1]) * (y[lo:hi] - y[anchor])
+            - (x[anchor] - x[lo:hi]) * (mean_y[i + 1] - y[anchor])
+        )
+        anchor = lo + int(np.argmax(area))
+        kept[i + 1] = anchor
+    return kept
+
+
+def minmax_indices(x, y, n_columns):
+    """Positions of the lowest and highest point of every x column, and of both ends.
+
+    `x` is sorted. Every peak and trough survives, so the line covers the same pixels as
+    the full series at `n_columns` resolution.
+    """
+    n = len(x)
+    if n <= 2 * n_columns:
+        return np.arange(n)
+    edges = np.linspace(x[0], x[-1], n_columns + 1)
+    starts = np.unique(np.r_[0, np.searchsorted(x, edges[1:-1], side="left")])
+    starts = starts[starts < n]
+    counts = np.diff(np.append(starts, n))
+    positions = np.arange(n)
+    lows = np.minimum.reduceat(np.where(y == np.repeat(np.minimum.reduceat(y, starts), counts), positions, n), starts)
+    highs = np.minimum.reduceat(np.where(y == np.repeat(np.maximum.reduceat(y, starts), counts), positions, n), starts)
+    return np.unique(np.concatenate([[0, n - 1], lows, highs]))
+
+
+def downsample_lines(data, x, y, by=(), budget=2000, mode="lttb"):
+    """Reduce every line of `data` (one per combination of `by`) to about `budget` vertices.
+
+    Rows missing x or y are dropped first, as seaborn drops them; the kept rows are
+    returned unchanged, so hue, size, style and units map as before. Each line is sorted
+    by x unless it already is.
+    """
+    by = [col for col in dict.fromkeys(by) if col is not None and col not in (x, y)]
+    frame = data[[x, y, *by]]
+    valid = frame[[x, y]].notna().all(axis=1).to_numpy()
+    x_values, y_values = _as_float(frame[x]), _as_float(frame[y])
+    groups = [np.arange(len(frame))]
+    if by:
+        groups = frame.groupby(by, sort=False, dropna=False, observed=True).indices.values()
+
+    kept = []
+    for rows in groups:
+        rows = rows[valid[rows]]
+        line_x, line_y = x_values[rows], y_values[rows]
+        if len(line_x) > 1 and (np.diff(line_x) < 0).any():
+            order = np.argsort(line_x, kind="stable")
+            rows, line_x, line_y = rows[order], line_x[order], line_y[order]
+        if mode == "minmax":
+            kept.append(rows[minmax_indices(line_x, line_y, max(budget // 2, 1))])
+        else:
+            kept.append(rows[lttb_indices(line_x, line_y, budget)])
+    if not kept:
+        return data.iloc[:0]
+    return data.iloc[np.sort(np.concatenate(kept))]
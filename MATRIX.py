@@ -0,0 +1,85 @@
+from functools import partial
+import numpy as np
+import pandas as pd
+from seaborn.matrix import _HeatMapper
+
+# Ways to combine the rows that share one pixel row of a large heatmap
+MATRIX_AGGREGATIONS = ["mean", "min", "max"]
+# Heatmaps with more cells than this are drawn as one image instead of a mesh
+IMAGE_MIN_CELLS = 10_000
+# Annotations are drawn up to this many cells; each one is a Text artist
+ANNOT_MAX_CELLS = 500
+
+
+def triangle_mask(shape):
+    """The upper-triangle mask (diagonal included) of a matrix of `shape`."""
+    return np.triu(np.ones(shape, dtype=bool))
+
+
+def aggregate_rows(frame, max_rows, agg="mean", mask_upper=False):
+    """Combine consecutive rows of `frame` into at most `max_rows` bands.
+
+    Missing values are skipped, so a band is missing only where all its rows are. With
+    `mask_upper` the upper triangle of the full frame is left out before combining, as
+    the mask would hide it, without building a mask of the full frame. Bands are
+    labelled by their first and last row label.
+    """
+    values = frame.to_numpy(dtype=float, copy=True)
+    n_rows, n_cols = values.shape
+    if mask_upper:
+        corner = min(n_rows, n_cols)
+        values[:corner][triangle_mask((corner, n_cols))] = np.nan
+    if n_rows <= max_rows:
+        return pd.DataFrame(values, index=frame.index, columns=frame.columns)
+
+    starts = np.unique(np.linspace(0, n_rows, max_rows + 1).astype(np.intp)[:-1])
+    ends = np.append(starts[1:], n_rows)
+    present = ~np.isnan(values)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if agg == "min":
+            bands = np.fmin.reduceat(values, starts)
+        elif agg == "max":
+            bands = np.fmax.reduceat(values, starts)
+        else:
+            bands = np.add.reduceat(np.where(present, values, 0), starts) / np.add.reduceat(present, starts)
+    bands[np.add.reduceat(present, starts) == 0] = np.nan
+    labels = [f"{frame.index[start]}–{frame.index[end - 1]}" for start, end in zip(starts, ends)]
+    return pd.DataFrame(bands, index=pd.Index(labels, name=frame.index.name), columns=frame.columns)
+
+
+class ImageHeatMapper(_HeatMapper):
+    """seaborn's heatmap with the cells drawn as one image instead of a QuadMesh.
+
+    Colour mapping, ticks, labels and colorbar are seaborn's; cell lines are left out,
+    as cells of a large matrix are thinner than the lines.
+    """
+
+    def plot(self, ax, cax, kws):
+        # _HeatMapper.plot draws the cells with ax.pcolormesh; shadow it for this call
+        ax.pcolormesh = partial(self._draw_image, ax)
+        try:
+            super().plot(ax, cax, kws)
+        finally:
+            del ax.pcolormesh
+
+    def _draw_image(self, ax, plot_data, cmap=None, vmin=None, vmax=None, norm=None, **_):
+        n_rows, n_cols = plot_data.shape
+        return ax.imshow(
+            plot_data, cmap=cmap, vmin=vmin, vmax=vmax, norm=norm, aspect="auto",
+            interpolation="nearest", extent=(0, n_cols, n_rows, 0)
+        )
+
+
+def image_heatmap(data, vmin=None, vmax=None, cmap=None, center=None, robust=False, fmt=".2g",
+                  cbar=True, cbar_kws=None, square=False, xticklabels="auto", yticklabels="auto",
+                  mask=None, ax=None):
+    """sns.heatmap without annotations or cell lines, drawn with ImageHeatMapper."""
+    plotter = ImageHeatMapper(
+        data, vmin, vmax, cmap, center, robust, False, fmt, None, cbar, cbar_kws,
+        xticklabels, yticklabels, mask
+    )
+    plotter.plot(ax, None, {})
+    if square:
+        # After plotting: the image is drawn with aspect="auto"
+        ax.set_aspect("equal")
+    return ax
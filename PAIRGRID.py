@@ -2,12 +2,16 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import streamlit as st
 from itertools import cycle
+from PROFILE import get_profile
+from PREVIEW import preview_dataframe
+from KDE import BIVARIATE_MIN_ROWS, binned_kdeplot
 
 class PairGridVisualizer:
     def __init__(self, data, saved_plots):
         self.data = data
         self.saved_plots = saved_plots
-        self.columns = self.data.columns.tolist()
+        self.profile = get_profile(self.data)
+        self.columns = self.profile.columns
 
     def display(self):
         self.tab1, self.tab2 = st.tabs(["Plots", "Documents"])
@@ -16,7 +20,7 @@ class PairGridVisualizer:
             st.header("PairGrid Generator")
             st.subheader("Core Data and Axes Parameters")
             st.info("The data is already loaded.")
-            st.dataframe(self.data)
+            preview_dataframe(self.data, self.profile)
 
             # Select columns for the PairGrid
             self.vars = st.multiselect("Select Variables for PairGrid", self.columns)
@@ -70,7 +74,8 @@ class PairGridVisualizer:
 
         # Generate the PairGrid plot
         g = sns.PairGrid(**plot_args)
-        g.map_lower(sns.kdeplot)  # Default plot for lower triangle
+        # Each lower panel is a bivariate KDE; large data uses the binned engine
+        g.map_lower(binned_kdeplot if self.profile.n_rows >= BIVARIATE_MIN_ROWS else sns.kdeplot)
         g.map_diag(sns.histplot)  # Default plot for diagonal
 
         # Display the plot
@@ -2,12 +2,16 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import streamlit as st
 from itertools import cycle
+from PROFILE import get_profile
+from PREVIEW import preview_dataframe
+from SAMPLING import sampling_controls, sample_frame, annotate_sampling
 
 class PairPlotVisualizer:
     def __init__(self, data, saved_plots):
         self.data = data
         self.saved_plots = saved_plots
-        self.columns = self.data.columns.tolist()
+        self.profile = get_profile(self.data)
+        self.columns = self.profile.columns
 
     def display(self):
         self.tab1, self.tab2 = st.tabs(["Plots", "Documents"])
@@ -16,7 +20,7 @@ class PairPlotVisualizer:
             st.header("PairPlot Generator")
             st.subheader("Core Data and Axes Parameters")
             st.info("The data is already loaded.")
-            st.dataframe(self.data)
+            preview_dataframe(self.data, self.profile)
 
             # Select columns for the PairPlot
             self.vars = st.multiselect("Select Variables for PairPlot", self.columns)
@@ -34,6 +38,9 @@ class PairPlotVisualizer:
             self.diag_kws = st.text_input("Diagonal Plot Keyword Arguments (JSON format)", "{}")
             self.grid_kws = st.text_input("Grid Keyword Arguments (JSON format)", "{}")
 
+            # Only the scatter kind draws one marker per row in every off-diagonal panel
+            self.sampling = sampling_controls(self.profile.n_rows, key="pairplot")
+
             # Generate Plot Button
             if st.button("Generate PairPlot"):
                 self.generate_plot()
@@ -53,9 +60,13 @@ class PairPlotVisualizer:
                 st.info("No plots saved yet.")
 
     def generate_plot(self):
+        plot_data = self.data
+        if self.kind == "scatter":
+            plot_data, _ = sample_frame(self.data, strata=self.hue, columns=self.vars or self.profile.numeric_columns, **self.sampling)
+
         # Prepare the arguments for PairPlot
         plot_args = {
-            'data': self.data,
+            'data': plot_data,
             'hue': self.hue,
             'hue_order': eval(self.hue_order) if self.hue_order != "None" else None,
             'palette': self.palette,
@@ -74,5 +85,6 @@ class PairPlotVisualizer:
 
         # Generate the PairPlot
         g = sns.pairplot(**plot_args)
+        annotate_sampling(g.figure, len(plot_data), len(self.data))
         st.pyplot(g)
         self.saved_plots.append(g.fig)
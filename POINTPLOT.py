@@ -2,12 +2,16 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import streamlit as st
 from itertools import cycle
+from PROFILE import get_profile
+from PREVIEW import preview_dataframe
+from ERRORBARS import bootstrap_errorbar, worker_input, show_timings, show_cache_stats
 
 class PointplotVisualizer:
     def __init__(self, data, saved_plots):
         self.data = data
         self.saved_plots = saved_plots
-        self.columns = self.data.columns.tolist()
+        self.profile = get_profile(self.data)
+        self.columns = self.profile.columns
 
     def display(self):
         tab1, tab2 = st.tabs(["Plots", "Documents"])
@@ -16,7 +20,7 @@ class PointplotVisualizer:
             st.header("Pointplot Generator")
             st.subheader("Core Data and Axes Parameters")
             st.info("The data is already loaded.")
-            st.dataframe(self.data)
+            preview_dataframe(self.data, self.profile)
 
             # Use columns to split UI
             col1, col2 = st.columns(2)
@@ -30,16 +34,20 @@ class PointplotVisualizer:
                 self.hue = st.selectbox("Select the column for hue", [None] + self.columns, index=0)
                 self.hue_order = None
                 if self.hue:
-                    self.hue_order = st.multiselect("Select the hue order", self.data[self.hue].unique().tolist())
+                    self.hue_order = st.multiselect("Select the hue order", self.profile.unique_values(self.hue))
 
             with col2:
                 # Estimator
                 self.estimator = st.selectbox("Select Estimator", ["mean", "median", "std"])
 
                 # Errorbar and Bootstrap Settings
-                self.errorbar = st.selectbox("Errorbar", ["ci", "pi", "se", "sd"])
+                self.errorbar = st.selectbox(
+                    "Errorbar", ["analytic", "ci", "pi", "se", "sd"],
+                    help="analytic: t interval of the mean for large groups, bootstrap otherwise"
+                )
                 self.n_boot = st.slider("Number of Bootstrap Samples", min_value=100, max_value=10000, value=1000, step=100)
                 self.seed = st.number_input("Seed", min_value=0, value=42)
+                self.workers = worker_input()
 
                 # Color and Palette selection
                 self.color = st.color_picker("Pick a single color for the plot", "#000000")
@@ -84,19 +92,26 @@ class PointplotVisualizer:
         fig, ax = plt.subplots(figsize=(10, 6))
 
         # Check if hue is selected and has more than one level
-        n_hue_levels = len(self.data[self.hue].unique()) if self.hue else 0
+        n_hue_levels = self.profile.cardinality[self.hue] if self.hue else 0
 
         # Adjust the dodge parameter to avoid ZeroDivisionError
         dodge_value = self.dodge if n_hue_levels > 1 else False
 
+        # Bootstrap the confidence intervals of every point in one batched pass
+        value, group = (self.y, self.x) if self.orientation == "v" else (self.x, self.y)
+        data, errorbar = bootstrap_errorbar(
+            self.data, value, [group, self.hue], self.estimator, self.errorbar, self.n_boot, self.seed,
+            workers=self.workers
+        )
+
         sns.pointplot(
-            data=self.data,
+            data=data,
             x=self.x,
             y=self.y,
             hue=self.hue,
             hue_order=self.hue_order,
             estimator=self.estimator,
-            errorbar=self.errorbar,
+            errorbar=errorbar,
             n_boot=self.n_boot,
             seed=self.seed,
             color=self.color,
@@ -111,5 +126,7 @@ class PointplotVisualizer:
 
         # Show the plot and save it
         st.pyplot(fig)
+        show_timings(getattr(errorbar, "timings", None))
+        show_cache_stats(errorbar)
         self.saved_plots.append(fig)
 
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+PAGE_SIZES = [25, 50, 100, 500]
+
+
+def summary_table(profile):
+    """One row per column with dtype, nulls, distinct count and numeric range."""
+    return pd.DataFrame({
+        "dtype": [str(profile.dtypes[col]) for col in profile.columns],
+        "nulls": [profile.null_counts[col] for col in profile.columns],
+        "distinct": [profile.cardinality[col] for col in profile.columns],
+        "min": [profile.minimums.get(col) for col in profile.columns],
+        "max": [profile.maximums.get(col) for col in profile.columns],
+    }, index=pd.Index(profile.columns, name="column"))
+
+
+def _filter_mask(data, profile, column, query):
+    values = data[column]
+    if column in profile.numeric_columns:
+        # Numeric columns take an inclusive "low,high" range; either end may be left empty
+        low, _, high = query.partition(",")
+        mask = np.ones(len(values), dtype=bool)
+        if low.strip():
+            mask &= (values >= float(low)).to_numpy()
+        if high.strip():
+            mask &= (values <= float(high)).to_numpy()
+        return mask
+    return values.astype(str).str.contains(query, case=False, regex=False).to_numpy()
+
+
+def filtered_positions(data, profile, column, query):
+    # Cached so paging through a filtered view does not rescan the frame
+    return profile.cached(
+        ("filter", column, query),
+        lambda: np.flatnonzero(_filter_mask(data, profile, column, query))
+    )
+
+
+def preview_dataframe(data, profile, key="preview"):
+    """Show one page of `data` plus column summaries; paging, sorting and filtering run server side."""
+    st.caption(f"{profile.n_rows:,} rows × {len(profile.columns)} columns")
+    with st.expander("Column summary"):
+        st.dataframe(summary_table(profile), use_container_width=True)
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        filter_column = st.selectbox("Filter column", [None] + profile.columns, key=f"{key}_filter_column")
+    with col2:
+        query = st.text_input(
+            "Filter value", key=f"{key}_filter_query",
+            help="Text columns match a substring; numeric columns take a range like 10,20"
+        )
+    with col3:
+        sort_column = st.selectbox("Sort by", [None] + profile.columns, key=f"{key}_sort_column")
+        descending = st.checkbox("Descending", key=f"{key}_descending")
+    with col4:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES, key=f"{key}_page_size")
+
+    if sort_column is not None:
+        positions = profile.sort_order(data, sort_column)
+        if descending:
+            # Reverse the non-null part only so nulls stay at the end
+            n_valid = profile.n_rows - profile.null_counts[sort_column]
+            positions = np.concatenate([positions[:n_valid][::-1], positions[n_valid:]])
+    else:
+        positions = None
+
+    if filter_column is not None and query.strip():
+        try:
+            matches = filtered_positions(data, profile, filter_column, query.strip())
+        except ValueError:
+            st.error("Invalid range. Enter numbers like 10,20.")
+            matches = np.arange(profile.n_rows)
+        if positions is None:
+            positions = matches
+        else:
+            keep = np.zeros(profile.n_rows, dtype=bool)
+            keep[matches] = True
+            positions = positions[keep[positions]]
+
+    n_visible = profile.n_rows if positions is None else len(positions)
+    n_pages = max(1, -(-n_visible // page_size))
+    page_key = f"{key}_page"
+    # A narrower filter can leave the remembered page past the end
+    if st.session_state.get(page_key, 1) > n_pages:
+        st.session_state[page_key] = n_pages
+    page = st.number_input("Page", min_value=1, max_value=n_pages, value=1, key=page_key)
+
+    start = (page - 1) * page_size
+    stop = min(start + page_size, n_visible)
+    rows = np.arange(start, stop) if positions is None else positions[start:stop]
+    # Only the visible page is serialized to the browser
+    st.dataframe(data.iloc[rows], use_container_width=True)
+    st.caption(f"Showing rows {start + 1 if n_visible else 0:,}–{stop:,} of {n_visible:,} (page {page} of {n_pages:,})")
@@ -0,0 +1,120 @@
+import hashlib
+import threading
+from collections import OrderedDict
+import pandas as pd
+
+# Distinct values kept per column for hue/order pickers
+UNIQUE_CAP = 1000
+# Number of dataset profiles kept in memory
+PROFILE_CACHE_SIZE = 8
+# Derived arrays kept per profile
+DERIVED_CACHE_SIZE = 16
+
+
+class DatasetProfile:
+    """Column metadata computed once per dataset and shared by every visualizer."""
+
+    def __init__(self, data, unique_cap=UNIQUE_CAP):
+        self.n_rows = len(data)
+        self.columns = data.columns.tolist()
+        self.dtypes = data.dtypes.to_dict()
+        self.numeric_columns = data.select_dtypes(include="number").columns.tolist()
+        self.categorical_columns = data.select_dtypes(exclude="number").columns.tolist()
+        self.null_counts = data.isna().sum().to_dict()
+
+        numeric = data[self.numeric_columns]
+        self.minimums = numeric.min().to_dict()
+        self.maximums = numeric.max().to_dict()
+
+        self.cardinality = {}
+        self.uniques = {}
+        for name, column in data.items():
+            values = column.dropna().unique()
+            self.cardinality[name] = len(values)
+            self.uniques[name] = self._sorted_head(values, unique_cap)
+
+        # Derived arrays (sort orders, filter matches) built on request by the data preview
+        self._derived = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _sorted_head(values, cap):
+        values = values[:cap].tolist()
+        try:
+            return sorted(values)
+        except TypeError:
+            # Mixed types cannot be ordered; keep first-seen order
+            return values
+
+    def unique_values(self, column):
+        return list(self.uniques.get(column, []))
+
+    def value_range(self, columns):
+        columns = [col for col in columns if col in self.minimums]
+        if not columns:
+            return 0, 1
+        low = pd.Series([self.minimums[col] for col in columns]).min()
+        high = pd.Series([self.maximums[col] for col in columns]).max()
+        if pd.isna(low) or pd.isna(high):
+            return 0, 1
+        return low, high
+
+    def cached(self, key, build):
+        """Return a derived value for this dataset, building it once and keeping the most recent few."""
+        with self._lock:
+            if key in self._derived:
+                self._derived.move_to_end(key)
+                return self._derived[key]
+
+        value = build()
+        with self._lock:
+            self._derived[key] = value
+            while len(self._derived) > DERIVED_CACHE_SIZE:
+                self._derived.popitem(last=False)
+        return value
+
+    def sort_order(self, data, column):
+        """Row positions that sort `data` by `column` with nulls last."""
+        def build():
+            values = data[column].reset_index(drop=True)
+            return values.sort_values(kind="stable", na_position="last").index.to_numpy()
+        return self.cached(("sort", column), build)
+
+
+def data_fingerprint(data, columns):
+    """Identify the values of `columns` (and the row labels) without keeping the data."""
+    content_hash = data.attrs.get("content_hash")
+    if content_hash is not None:
+        return (content_hash, len(data), tuple(columns))
+    # Frames that did not come through the dataset cache are hashed column by column
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(pd.util.hash_pandas_object(data[list(columns)], index=True).to_numpy().tobytes())
+    return (digest.hexdigest(), len(data), tuple(columns))
+
+
+_profiles = OrderedDict()
+_profiles_lock = threading.Lock()
+
+
+def _profile_key(data):
+    content_hash = data.attrs.get("content_hash")
+    if content_hash is not None:
+        return content_hash
+    # Frames that did not come through the dataset cache are keyed by identity and shape
+    return (id(data), data.shape, tuple(data.columns))
+
+
+def get_profile(data):
+    """Return the cached profile for `data`, building it on first use."""
+    key = _profile_key(data)
+    with _profiles_lock:
+        if key in _profiles:
+            _profiles.move_to_end(key)
+            return _profiles[key]
+
+    profile = DatasetProfile(data)
+    with _profiles_lock:
+        _profiles[key] = profile
+        while len(_profiles) > PROFILE_CACHE_SIZE:
+            _profiles.popitem(last=False)
+    return profile
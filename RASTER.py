@@ -0,0 +1,110 @@
+import numpy as np
+import streamlit as st
+from matplotlib.colors import LogNorm
+
+RASTER_AGGREGATIONS = ["count", "mean", "max"]
+
+
+def raster_shape(ax):
+    """Pixel rows and columns covered by the axes at the figure's dpi."""
+    bbox = ax.get_window_extent()
+    return max(1, int(round(bbox.height))), max(1, int(round(bbox.width)))
+
+
+def rasterize_points(x, y, values=None, agg="count", shape=(400, 600), extent=None):
+    """Bin points into a pixel grid in one vectorized pass.
+
+    `agg` is "count" (points per pixel), "mean" or "max" of `values` per pixel.
+    Returns the (rows, cols) grid, with NaN for empty pixels under mean/max, and the
+    (xmin, xmax, ymin, ymax) extent it covers.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    valid = np.isfinite(x) & np.isfinite(y)
+    if agg != "count":
+        values = np.asarray(values, dtype=float)
+        valid &= np.isfinite(values)
+        values = values[valid]
+    x, y = x[valid], y[valid]
+
+    rows, cols = shape
+    if extent is None:
+        extent = (x.min(), x.max(), y.min(), y.max()) if len(x) else (0, 1, 0, 1)
+    xmin, xmax, ymin, ymax = extent
+    # Degenerate ranges still get a one-pixel-wide span
+    xspan = (xmax - xmin) or 1
+    yspan = (ymax - ymin) or 1
+
+    ix = np.clip(((x - xmin) / xspan * cols).astype(np.intp), 0, cols - 1)
+    iy = np.clip(((y - ymin) / yspan * rows).astype(np.intp), 0, rows - 1)
+    flat = iy * cols + ix
+
+    counts = np.bincount(flat, minlength=rows * cols)
+    if agg == "count":
+        grid = counts.astype(float)
+    elif agg == "mean":
+        sums = np.bincount(flat, weights=values, minlength=rows * cols)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            grid = sums / counts
+    elif agg == "max":
+        grid = np.full(rows * cols, -np.inf)
+        np.maximum.at(grid, flat, values)
+        grid[counts == 0] = np.nan
+    else:
+        raise ValueError(f"Unknown raster aggregation: {agg}")
+
+    return grid.reshape(rows, cols), (xmin, xmax, ymin, ymax)
+
+
+def draw_raster(ax, grid, extent, agg="count", cmap="viridis", log=True, colorbar=True, label=None):
+    """Draw a rasterized grid as a single image artist."""
+    grid = np.ma.masked_invalid(grid)
+    if agg == "count":
+        # Empty pixels stay transparent instead of taking the lowest color
+        grid = np.ma.masked_equal(grid, 0)
+    norm = LogNorm() if log and agg == "count" and grid.count() else None
+    image = ax.imshow(
+        grid, origin="lower", extent=extent, aspect="auto",
+        cmap=cmap, norm=norm, interpolation="nearest"
+    )
+    ax.set_xlim(extent[0], extent[1])
+    ax.set_ylim(extent[2], extent[3])
+    if colorbar:
+        ax.figure.colorbar(image, ax=ax, label=label or agg)
+    return image
+
+
+def raster_controls(profile, key, value_column=None):
+    """Widgets for raster aggregation; returns keyword arguments used by rasterize_plot."""
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        agg = st.selectbox("Raster aggregation", RASTER_AGGREGATIONS, key=f"{key}_raster_agg")
+    with col2:
+        numeric = profile.numeric_columns
+        index = numeric.index(value_column) + 1 if value_column in numeric else 0
+        values = st.selectbox(
+            "Raster value column", [None] + numeric, index=index, key=f"{key}_raster_values",
+            help="Column averaged or maximized per pixel (mean / max only)"
+        )
+    with col3:
+        log = st.checkbox("Log color scale", value=True, key=f"{key}_raster_log")
+    return {"agg": agg, "values": values, "log": log}
+
+
+def rasterize_plot(ax, data, x, y, agg="count", values=None, log=True, cmap="viridis", colorbar=True,
+                   xlim=None, ylim=None):
+    """Rasterize the x/y columns of `data` at the resolution of `ax` and draw the result."""
+    if agg != "count" and values is None:
+        raise ValueError("Mean and max rasters need a numeric value column.")
+    # Spend the pixels on the requested limits rather than on the full data range
+    xlim = xlim or (data[x].min(), data[x].max())
+    ylim = ylim or (data[y].min(), data[y].max())
+    grid, extent = rasterize_points(
+        data[x], data[y], data[values] if values is not None else None,
+        agg=agg, shape=raster_shape(ax), extent=(*xlim, *ylim)
+    )
+    draw_raster(ax, grid, extent, agg=agg, cmap=cmap, log=log, colorbar=colorbar,
+                label=agg if agg == "count" else f"{agg} of {values}")
+    ax.set_xlabel(x)
+    ax.set_ylabel(y)
+    return grid
@@ -2,12 +2,16 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import streamlit as st
 from itertools import cycle
+from PROFILE import get_profile
+from PREVIEW import preview_dataframe
+from ERRORBARS import bootstrap_regression, worker_input, show_timings
 
 class RegplotVisualizer:
     def __init__(self, data, saved_plots):
         self.data = data
         self.saved_plots = saved_plots
-        self.columns = self.data.columns.tolist()
+        self.profile = get_profile(self.data)
+        self.columns = self.profile.columns
 
     def display(self):
         self.tab1, self.tab2 = st.tabs(["Plots", "Saved Plots"])
@@ -16,7 +20,7 @@ class RegplotVisualizer:
             st.header("📊 Regression Plot Generator")
             st.info("✅ Dataset Loaded. Select Parameters to Generate a Regression Plot.")
 
-            st.dataframe(self.data)
+            preview_dataframe(self.data, self.profile)
 
             col1, col2 = st.columns(2)
             with col1:
@@ -52,6 +56,7 @@ class RegplotVisualizer:
                 self.x_estimator = st.selectbox("X Estimator", [None, "mean", "median", "sum"])
                 self.units = st.selectbox("Units (Grouping Factor)", [None] + self.columns, index=0)
                 self.seed = st.number_input("Random Seed", value=None, step=1, format="%d")
+                self.workers = worker_input()
 
             # Customization
             with st.expander("🎨 Customize Plot Style"):
@@ -120,15 +125,38 @@ class RegplotVisualizer:
             'line_kws': line_kws
         }
 
+        # Plain polynomial fits get their confidence band bootstrapped across the worker pool
+        parallel_band = (
+            self.fit_reg and self.ci and plot_args['units'] is None
+            and not (self.logistic or self.lowess or self.robust or self.logx)
+        )
+        if parallel_band:
+            plot_args['ci'] = None
+
         # Create the plot
         fig, ax = plt.subplots(figsize=(8, 6))
         try:
             sns.regplot(ax=ax, **plot_args)
+            timings = []
+            if parallel_band:
+                self.draw_band(ax, timings)
             st.pyplot(fig)
+            show_timings(timings)
             self.saved_plots.append(fig)  # Save the plot
         except Exception as e:
             st.error(f"⚠️ An error occurred while generating the plot: {e}")
 
+    def draw_band(self, ax, timings):
+        """Shade the bootstrapped confidence band under the regression line seaborn just drew"""
+        line = ax.lines[-1]
+        grid = line.get_xdata()
+        data = self.data[[self.x, self.y]].dropna()
+        band = bootstrap_regression(
+            data[self.x], data[self.y], grid, self.order, self.n_boot,
+            int(self.seed) if self.seed is not None else None, self.ci, self.workers, timings
+        )
+        ax.fill_between(grid, band[:, 0], band[:, 1], color=line.get_color(), alpha=.15, linewidth=0)
+
     def get_estimator(self):
         """Helper function to return the appropriate x_estimator function"""
         estimator_map = {"mean": lambda x: x.mean(), "median": lambda x: x.median(), "sum": lambda x: x.sum()}
@@ -1,14 +1,17 @@
 import seaborn as sns
 import streamlit as st
 import matplotlib.pyplot as plt
+from PROFILE import get_profile
+from PREVIEW import preview_dataframe
 
 class Distplot:
     def __init__(self, data, saved_plots):
         self.data = data
         self.saved_plots = saved_plots
-        self.numeric_columns = self.data.select_dtypes(include=["int", "float"]).columns.tolist()
-        self.categorical_columns = self.data.select_dtypes(exclude=["int", "float"]).columns.tolist()
-        self.columns = self.data.columns.tolist()
+        self.profile = get_profile(self.data)
+        self.numeric_columns = self.profile.numeric_columns
+        self.categorical_columns = self.profile.categorical_columns
+        self.columns = self.profile.columns
 
     def display(self):
         tab1, tab2, tab3 = st.tabs(["Plotting", "Plotted Plots Section", "Document Section"])
@@ -18,7 +21,7 @@ class Distplot:
             st.subheader("Core Data and Axes Parameters")
             st.info("The data is already loaded.")
             with st.expander("Data Frame is inside"):
-                st.dataframe(self.data)
+                preview_dataframe(self.data, self.profile)
 
             col1, col2 = st.columns(2)
             with col1:
@@ -37,15 +40,15 @@ class Distplot:
                 self.col_wrap = st.number_input("Wrap columns at specified width", min_value=1, max_value=5, value=3, key="col_wrap_distplot")
 
             with col2:
-                self.hue_order = st.multiselect("Select the hue order", self.data[self.hue].unique().tolist(), key="hue_order_distplot") if self.hue else None
+                self.hue_order = st.multiselect("Select the hue order", self.profile.unique_values(self.hue), key="hue_order_distplot") if self.hue else None
                 self.hue_norm = None
                 if self.hue:
                     if self.hue in self.numeric_columns:
                         hue_norm_input = st.text_input("Enter a range to normalize values (e.g., 1, 2)", key="hue_norm_distplot")
                         self.hue_norm = tuple(map(float, hue_norm_input.split(','))) if hue_norm_input else None
 
-                self.row_order = self.data[self.row].unique().tolist() if self.row else None
-                self.col_order = self.data[self.col].unique().tolist() if self.col else None
+                self.row_order = self.profile.unique_values(self.row) if self.row else None
+                self.col_order = self.profile.unique_values(self.col) if self.col else None
 
         with tab2:
             st.header("Plotted Plots Section")
@@ -2,12 +2,15 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import streamlit as st
 from itertools import cycle
+from PROFILE import get_profile
+from PREVIEW import preview_dataframe
 
 class ResidplotVisualizer:
     def __init__(self, data, saved_plots):
         self.data = data
         self.saved_plots = saved_plots
-        self.columns = self.data.columns.tolist()
+        self.profile = get_profile(self.data)
+        self.columns = self.profile.columns
 
     def display(self):
         self.tab1, self.tab2 = st.tabs(["Plots", "Saved Plots"])
@@ -15,7 +18,7 @@ class ResidplotVisualizer:
         with self.tab1:
             st.header("📊 Residual Plot Generator")
             st.info("✅ Dataset Loaded. Select Parameters to Generate a Residual Plot.")
-            st.dataframe(self.data)
+            preview_dataframe(self.data, self.profile)
 
             col1, col2 = st.columns(2)
             with col1:
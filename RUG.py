@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+from HISTOGRAM import sorted_groups
+from ECDFSTEPS import pixel_edges
+
+# Columns at least this long are drawn as one tick per pixel column instead of one per row
+RUG_MIN_ROWS = 50_000
+# Hard cap on the tick segments of one rug, across every hue level and both axes
+RUG_MAX_SEGMENTS = 5_000
+# How the number of rows behind a tick is shown
+RUG_ENCODINGS = ["alpha", "linewidth"]
+# Count column of collapsed frames, named so it cannot clash with user columns
+RUG_COUNT = "__rug_count__"
+# Faintest alpha and widest line (in multiples of the base width) of the scale
+MIN_ALPHA = 0.15
+MAX_WIDTH = 4
+
+
+def rug_frame(data, variable, hue=None, pixels=2000, max_segments=RUG_MAX_SEGMENTS, n_axes=1):
+    """One tick per pixel column of `variable` within every hue level, with its row count.
+
+    Each non-empty column becomes a tick at the mean of its values, so the rug looks the
+    same at `pixels` resolution; ticks come heaviest first. Columns are merged further when the hue levels (and the
+    `n_axes` rugs drawn) would need more than `max_segments` ticks; with more levels than
+    that, the lightest ticks are dropped and attrs["dropped_rows"] counts their rows.
+    Rows are the ones that have `variable` and the hue, as cached by HISTOGRAM.sorted_groups.
+    """
+    column = sorted_groups(data, variable, [hue])
+    all_values = column["values"]
+    if not len(all_values):
+        return data.iloc[:0].assign(**{RUG_COUNT: []})
+    per_group = max(max_segments // (len(column["groups"]) * n_axes), 1)
+    edges = pixel_edges(all_values, min(pixels, per_group))
+
+    parts = []
+    for labels, values, _ in column["groups"]:
+        # Column starts; the outer edges are implied so round-off cannot drop the end points
+        starts = np.unique(np.r_[0, np.searchsorted(values, edges[1:-1], side="left")])
+        starts = starts[starts < len(values)]
+        counts = np.diff(np.append(starts, len(values)))
+        part = pd.DataFrame({variable: np.add.reduceat(values, starts) / counts, RUG_COUNT: counts})
+        for col, label in labels.items():
+            part[col] = label
+        parts.append(part)
+
+    # Heaviest ticks first, so the lighter ones of other hue levels are drawn over them
+    collapsed = pd.concat(parts, ignore_index=True).sort_values(RUG_COUNT, ascending=False, kind="stable")
+    # Every level keeps a tick, so many levels can still exceed the budget: the lightest go
+    limit = max(max_segments // n_axes, 1)
+    dropped = int(collapsed[RUG_COUNT].iloc[limit:].sum())
+    collapsed = collapsed.iloc[:limit].reset_index(drop=True)
+    for col in column["by"]:
+        # Keep category order and dtype so hue levels come out the same
+        if isinstance(column["dtypes"][col], pd.CategoricalDtype):
+            collapsed[col] = collapsed[col].astype(column["dtypes"][col])
+    collapsed.attrs["dropped_rows"] = dropped
+    return collapsed
+
+
+def _aligned_counts(ticks, positions, counts):
+    # Ticks are drawn in frame order, minus rows seaborn leaves out (levels outside
+    # hue_order), so they match the frame as an ordered subsequence
+    aligned, row = np.empty(len(ticks)), 0
+    for i, tick in enumerate(ticks):
+        while row < len(positions) and positions[row] != tick:
+            row += 1
+        if row == len(positions):
+            return None
+        aligned[i] = counts[row]
+        row += 1
+    return aligned
+
+
+def encode_counts(collections, frame, variable, axis="x", encoding="alpha", max_count=None):
+    """Scale each tick of seaborn's rug `collections` by the rows behind it, on a log scale."""
+    positions = frame[variable].to_numpy(dtype=float)
+    counts = frame[RUG_COUNT].to_numpy(dtype=float)
+    max_count = max_count or counts.max()
+
+    index = 0 if axis == "x" else 1
+    for collection in collections:
+        segments = collection.get_segments()
+        if not segments:
+            continue
+        ticks = np.asarray([segment[0, index] for segment in segments], dtype=float)
+        tick_counts = _aligned_counts(ticks, positions, counts)
+        if tick_counts is None:
+            continue
+        share = np.log1p(tick_counts) / np.log1p(max_count)
+        if encoding == "linewidth":
+            collection.set_linewidth(collection.get_linewidth()[0] * (1 + (MAX_WIDTH - 1) * share))
+        else:
+            collection.set_alpha(MIN_ALPHA + (1 - MIN_ALPHA) * share)
@@ -3,12 +3,18 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import pandas as pd
 from itertools import cycle
+from PROFILE import get_profile
+from PREVIEW import preview_dataframe
+from SAMPLING import sampling_controls, sample_frame, annotate_sampling
+from ECDFSTEPS import axes_pixels
+from RUG import RUG_MIN_ROWS, RUG_MAX_SEGMENTS, RUG_ENCODINGS, RUG_COUNT, rug_frame, encode_counts
 
 class RugPlot:
     def __init__(self, data, saved_plots):
         self.data = data
         self.saved_plots = saved_plots
-        self.columns = self.data.columns.tolist()
+        self.profile = get_profile(self.data)
+        self.columns = self.profile.columns
         self.hue_norm = None  # Ensure hue_norm is initialized
 
     def display(self):
@@ -19,7 +25,7 @@ class RugPlot:
             st.subheader("Core Data and Axes Parameters")
             st.info("The data is already loaded.")
             with st.expander("Data Frame is here"):
-                st.dataframe(self.data)
+                preview_dataframe(self.data, self.profile)
 
             # Create two columns for parameters
             col1, col2 = st.columns(2,border=True)
@@ -31,7 +37,7 @@ class RugPlot:
                 self.hue = st.selectbox("Select the column for hue (optional)", [None] + self.columns, index=0)
                 self.hue_order = None
                 if self.hue:
-                    self.hue_order = st.multiselect("Select the hue order", self.data[self.hue].unique().tolist())
+                    self.hue_order = st.multiselect("Select the hue order", self.profile.unique_values(self.hue))
                     self.hue_norm_input = st.text_input("Enter hue normalization range. Example: (10,20)", value="(10,20)")
                     # Check if hue_norm_input is provided and is valid
                     if self.hue_norm_input:
@@ -53,6 +59,10 @@ class RugPlot:
                 self.height = st.number_input("Height of the rug", value=0.025, step=0.001)
                 self.expand_margins = st.checkbox("Expand Margins", value=True)
                 self.legend = st.checkbox("Show Legend", value=True)
+                self.encoding = st.selectbox("Show tick multiplicity by", RUG_ENCODINGS)
+                self.max_segments = st.number_input("Tick budget", min_value=100, value=RUG_MAX_SEGMENTS, step=1000)
+
+            self.sampling = sampling_controls(self.profile.n_rows, key="rugplot")
 
             # Generate Plot Button
             if st.button("Generate Rug Plot"):
@@ -65,13 +75,52 @@ class RugPlot:
                         plt.ylabel(self.y)
 
                     # Generate Rug plot using seaborn.rugplot
-                    if self.y or self.x:
+                    if (self.y or self.x) and self.use_pixel_ticks():
+                        # Large columns keep one tick per pixel column, shaded by its row count
+                        ax = plt.gca()
+                        axes = [(axis, column) for axis, column in (("x", self.x), ("y", self.y)) if column]
+                        hue = self.hue
+                        if hue and self.profile.cardinality[hue] * len(axes) > self.max_segments:
+                            # Each level needs a tick of its own, so the budget cannot hold them all
+                            st.warning(
+                                f"'{hue}' has {self.profile.cardinality[hue]:,} levels, more than the tick "
+                                f"budget holds; the rug is drawn without hue."
+                            )
+                            hue = None
+                        frames = [
+                            rug_frame(
+                                self.data, column, hue=hue, pixels=axes_pixels(ax, vertical=axis == "y"),
+                                max_segments=int(self.max_segments), n_axes=len(axes)
+                            ) for axis, column in axes
+                        ]
+                        max_count = max((frame[RUG_COUNT].max() for frame in frames if len(frame)), default=1)
+                        ticks = 0
+                        for i, ((axis, column), frame) in enumerate(zip(axes, frames)):
+                            drawn = len(ax.collections)
+                            fig = sns.rugplot(
+                                data=frame, hue=hue, height=self.height, expand_margins=self.expand_margins,
+                                palette=self.palette, hue_order=self.hue_order, hue_norm=self.hue_norm,
+                                legend=self.legend and i == 0, **{axis: column}
+                            )
+                            encode_counts(ax.collections[drawn:], frame, column, axis, self.encoding, max_count)
+                            ticks += sum(len(collection.get_segments()) for collection in ax.collections[drawn:])
+                        note = (
+                            f"Rug of {self.profile.n_rows:,} rows drawn with {ticks:,} ticks "
+                            f"(one per pixel column, {self.encoding} shows the row count)"
+                        )
+                        dropped = sum(frame.attrs.get("dropped_rows", 0) for frame in frames)
+                        if dropped:
+                            note += f"; the lightest ticks, {dropped:,} rows, are left out to stay within the budget"
+                        st.caption(note)
+                    elif self.y or self.x:
+                        plot_data, _ = sample_frame(self.data, strata=self.hue, columns=[self.x, self.y], **self.sampling)
                         fig = sns.rugplot(
-                            data=self.data,y=self.y, x=self.x, hue=self.hue,
+                            data=plot_data,y=self.y, x=self.x, hue=self.hue,
                             height=self.height, expand_margins=self.expand_margins,
                             palette=self.palette, hue_order=self.hue_order,
                             hue_norm=self.hue_norm, legend=self.legend
                         )
+                        annotate_sampling(plt.gca(), len(plot_data), len(self.data))
 
                     # Display the plot
                     st.pyplot(plt.gcf())
@@ -93,3 +142,10 @@ class RugPlot:
                         st.pyplot(saved_plot)
             else:
                 st.info("No plots saved yet.")
+
+    def use_pixel_ticks(self):
+        # Numeric rug columns only; numeric hues may have a level per row
+        numeric = self.profile.numeric_columns
+        if any(column and column not in numeric for column in (self.x, self.y)) or self.hue in numeric:
+            return False
+        return self.profile.n_rows >= RUG_MIN_ROWS
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+SAMPLING_MODES = ["uniform", "stratified", "outliers", "off"]
+# Points drawn by default; matplotlib renders this many markers well under a second
+DEFAULT_BUDGET = 20_000
+# Every hue level keeps at least this many points under stratified sampling
+MIN_PER_STRATUM = 50
+# Share of the budget reserved for the most extreme rows in outlier-preserving mode
+OUTLIER_SHARE = 0.1
+
+
+def _uniform(n, budget, rng):
+    return rng.choice(n, size=budget, replace=False)
+
+
+def _stratified(codes, budget, rng):
+    counts = np.bincount(codes)
+    # A floor so rare levels stay visible, the rest of the budget in proportion
+    floors = np.minimum(counts, MIN_PER_STRATUM)
+    if floors.sum() > budget:
+        # The floors alone do not fit: every level gets an even share
+        alloc = np.minimum(counts, budget // len(counts))
+    else:
+        extra = counts - floors
+        alloc = floors + np.floor((budget - floors.sum()) * extra / max(extra.sum(), 1)).astype(int)
+
+    # Shuffle, then stable-sort by stratum and keep the first alloc[code] rows of each
+    shuffled = rng.permutation(len(codes))
+    order = shuffled[np.argsort(codes[shuffled], kind="stable")]
+    sorted_codes = codes[order]
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    rank = np.arange(len(codes)) - starts[sorted_codes]
+    return order[rank < alloc[sorted_codes]]
+
+
+def _is_categorical(series):
+    # A numeric hue is continuous: every distinct value would become a stratum
+    return not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series)
+
+
+def _outlier_preserving(data, columns, budget, rng):
+    numeric = [col for col in columns if col is not None and pd.api.types.is_numeric_dtype(data[col])]
+    if not numeric:
+        return _uniform(len(data), budget, rng)
+
+    # Robust z-score per column; a row's score is its most extreme coordinate
+    values = data[numeric].to_numpy(dtype=float)
+    median = np.nanmedian(values, axis=0)
+    spread = np.nanpercentile(values, 75, axis=0) - np.nanpercentile(values, 25, axis=0)
+    spread[spread == 0] = 1
+    score = np.nan_to_num(np.abs(values - median) / spread, nan=0).max(axis=1)
+
+    n_extreme = max(1, int(budget * OUTLIER_SHARE))
+    extreme = np.argpartition(score, len(score) - n_extreme)[len(score) - n_extreme:]
+    rest = np.setdiff1d(np.arange(len(data)), extreme, assume_unique=True)
+    fill = rng.choice(rest, size=budget - n_extreme, replace=False)
+    return np.concatenate([extreme, fill])
+
+
+def sample_frame(data, budget=DEFAULT_BUDGET, mode="uniform", strata=None, columns=(), seed=0):
+    """Reduce `data` to about `budget` rows; returns the sample and the kept ratio.
+
+    uniform picks rows at random, stratified keeps every level of `strata` in proportion
+    (with a floor for rare levels, never past the budget), outliers keeps the most extreme rows of the numeric
+    `columns` before filling the rest uniformly. The same seed gives the same sample.
+    """
+    n = len(data)
+    if mode == "off" or n <= budget:
+        return data, 1.0
+
+    rng = np.random.default_rng(seed)
+    codes = None
+    if mode == "stratified" and strata is not None and _is_categorical(data[strata]):
+        codes, levels = pd.factorize(data[strata], use_na_sentinel=False)
+        if len(levels) > budget // MIN_PER_STRATUM:
+            # Too many levels to give each a floor; they would only be thinned evenly
+            codes = None
+    if codes is not None:
+        positions = _stratified(codes, budget, rng)
+    elif mode == "outliers":
+        positions = _outlier_preserving(data, columns, budget, rng)
+    else:
+        positions = _uniform(n, budget, rng)
+
+    # Keep the original row order so line-like artists and legends behave the same
+    positions = np.sort(positions)
+    return data.iloc[positions], len(positions) / n
+
+
+def sampling_controls(n_rows, key, default_budget=DEFAULT_BUDGET):
+    """Widgets for the point budget; returns keyword arguments for sample_frame."""
+    with st.expander("Large data sampling", expanded=n_rows > default_budget):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            mode = st.selectbox("Sampling mode", SAMPLING_MODES, key=f"{key}_sampling_mode")
+        with col2:
+            budget = st.number_input(
+                "Point budget", min_value=100, value=default_budget, step=1000, key=f"{key}_sampling_budget"
+            )
+        with col3:
+            seed = st.number_input("Sampling seed", min_value=0, value=0, key=f"{key}_sampling_seed")
+    return {"mode": mode, "budget": int(budget), "seed": int(seed)}
+
+
+def annotate_sampling(target, n_shown, n_total):
+    """Write the sampling ratio in the corner of an Axes or Figure when rows were dropped."""
+    if n_shown >= n_total:
+        return
+    note = f"Showing {n_shown:,} of {n_total:,} points ({n_shown / n_total:.1%} sample)"
+    transform = target.transAxes if hasattr(target, "transAxes") else target.transFigure
+    target.text(0.99, 0.01, note, transform=transform, ha="right", va="bottom", fontsize=8, alpha=0.7)
@@ -3,14 +3,19 @@ import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 from itertools import cycle
+from PROFILE import get_profile
+from PREVIEW import preview_dataframe
+from SAMPLING import sampling_controls, sample_frame, annotate_sampling
+from RASTER import raster_controls, rasterize_plot
 
 class ScatterPlot:
     def __init__(self, data, saved_plots):
         self.data = data
         self.saved_plots = saved_plots
-        self.numeric_columns = self.data.select_dtypes(include=["int", "float"]).columns.tolist()
-        self.categorical_columns = self.data.select_dtypes(exclude=["int", "float"]).columns.tolist()
-        self.columns = self.data.columns.tolist()
+        self.profile = get_profile(self.data)
+        self.numeric_columns = self.profile.numeric_columns
+        self.categorical_columns = self.profile.categorical_columns
+        self.columns = self.profile.columns
 
     def display(self):
         tab1, tab2, tab3 = st.tabs(["Plotting", "Plotted Plots Section", "Document Section"])
@@ -20,7 +25,7 @@ class ScatterPlot:
             st.subheader("Core Data and Axes Parameters")
             st.info("The data is already loaded.")
             with st.expander("Data Frame is inside"):
-                st.dataframe(self.data)
+                preview_dataframe(self.data, self.profile)
 
             col1, col2 = st.columns(2,border=True)
             with col1:
@@ -32,7 +37,7 @@ class ScatterPlot:
 
             with col2:
                 self.palette = st.pills("Select color palette", ["deep", "muted", "pastel", "dark", "colorblind", "viridis", "coolwarm"], key='palette')
-                self.hue_order_list = [None] + (self.data[self.hue].unique().tolist() if self.hue and self.hue in self.data else [])
+                self.hue_order_list = [None] + (self.profile.unique_values(self.hue) if self.hue and self.hue in self.data else [])
                 self.hue_order = st.multiselect("Specify hue order", self.hue_order_list, key='hue_order')
 
                 hue_norm_input = st.text_input("Normalization for Hue (e.g., '10,20')", key='hue_norm')
@@ -43,23 +48,39 @@ class ScatterPlot:
                 size_norm_input = st.text_input("Normalization for Size (e.g., '10,20')", key='size_norm', value='10,20')
                 self.size_norm = tuple(map(int, size_norm_input.split(','))) if size_norm_input else None
 
-                self.size_order_list = [None] + (self.data[self.size].unique().tolist() if self.size and self.size in self.data else [])
+                self.size_order_list = [None] + (self.profile.unique_values(self.size) if self.size and self.size in self.data else [])
                 self.size_order = st.multiselect("Select size order", self.size_order_list, key='size_order')
 
                 self.markers = st.checkbox("Enable markers", key='markers')
 
-                self.style_order_list = [None] + (self.data[self.style].unique().tolist() if self.style and self.style in self.data else [])
+                self.style_order_list = [None] + (self.profile.unique_values(self.style) if self.style and self.style in self.data else [])
                 self.style_order = st.multiselect("Specify style order", self.style_order_list, key='style_order')
 
                 self.legend = st.pills("Select legend type", ['auto', 'brief', 'full'], key='legend')
-            
+
+            # Raster mode bins every row into pixels instead of drawing one marker per row
+            self.render_mode = st.pills("Select render mode", ["points", "density raster"], key='render_mode', default="points")
+            if self.render_mode == "density raster":
+                self.raster = raster_controls(self.profile, key='scatter', value_column=self.hue)
+            else:
+                self.sampling = sampling_controls(self.profile.n_rows, key='scatter')
+
             if st.button("Plot the Plots", key='plot_button',use_container_width=True,type='primary'):
                 if not self.x or not self.y:
                     st.error("Both X and Y axes must be selected!")
+                elif self.render_mode == "density raster":
+                    fig, ax = plt.subplots()
+                    try:
+                        rasterize_plot(ax, self.data, self.x, self.y, **self.raster)
+                        st.pyplot(fig)
+                        self.saved_plots.append(fig)
+                    except Exception as e:
+                        st.error(f"Error generating plot: {e}")
                 else:
                     fig, ax = plt.subplots()
+                    plot_data, _ = sample_frame(self.data, strata=self.hue, columns=[self.x, self.y], **self.sampling)
                     sns.scatterplot(
-                        data=self.data,
+                        data=plot_data,
                         x=self.x,
                         y=self.y, 
                         hue=self.hue if self.hue and self.hue in self.data else None, 
@@ -75,6 +96,7 @@ class ScatterPlot:
                         palette=self.palette if self.palette else None,
                         legend=self.legend, ax=ax
                     )
+                    annotate_sampling(ax, len(plot_data), len(self.data))
                     st.pyplot(fig)
                     self.saved_plots.append(fig)
                 
@@ -2,14 +2,18 @@ import streamlit as st
 import seaborn as sns
 import matplotlib.pyplot as plt
 from itertools import cycle
+from PROFILE import get_profile
+from PREVIEW import preview_dataframe
+from SAMPLING import sampling_controls, sample_frame, annotate_sampling
 
 class Stripplot:
     def __init__(self, data, saved_plots):
         self.data = data
         self.saved_plots = saved_plots
-        self.numeric_columns = self.data.select_dtypes(include=["int", "float"]).columns.tolist()
-        self.categorical_columns = self.data.select_dtypes(exclude=["int", "float"]).columns.tolist()
-        self.columns = self.data.columns.tolist()
+        self.profile = get_profile(self.data)
+        self.numeric_columns = self.profile.numeric_columns
+        self.categorical_columns = self.profile.categorical_columns
+        self.columns = self.profile.columns
 
     def display(self):
         tab1, tab2 = st.tabs(["Plots", "Documents"])
@@ -18,7 +22,7 @@ class Stripplot:
             st.header("Stripplot Generator")
             st.subheader("Core Data and Axes Parameters")
             st.info("The data is already loaded.")
-            st.dataframe(self.data)
+            preview_dataframe(self.data, self.profile)
 
             # Create two columns for parameters
             col1, col2 = st.columns(2, border=True)
@@ -39,7 +43,7 @@ class Stripplot:
                         self.hue_norm = st.text_input("Enter a range to normalize values (e.g., (1, 2))")
                         self.hue_norm = eval(self.hue_norm) if self.hue_norm else None
                     else:
-                        self.hue_order = st.multiselect("Select the hue order", self.data[self.hue].unique().tolist())
+                        self.hue_order = st.multiselect("Select the hue order", self.profile.unique_values(self.hue))
 
                 self.palette = st.selectbox(
                     "Select a color palette",
@@ -74,20 +78,24 @@ class Stripplot:
                 self.width = st.number_input("Width of the strips", min_value=0.0, value=0.8)
                 self.color = st.selectbox("Color", [None] + self.columns, index=0)
 
+            self.sampling = sampling_controls(self.profile.n_rows, key="stripplot")
+
             # Generate Plot Button
             if st.button("Generate Plot"):
                 try:
                     # Create a figure before generating the stripplot
                     fig, ax = plt.subplots()
+                    plot_data, _ = sample_frame(self.data, strata=self.hue, columns=[self.x, self.y], **self.sampling)
 
                     # Generate the stripplot and assign it to the ax object
                     sns.stripplot(
-                        data=self.data, x=self.x, y=self.y, hue=self.hue, hue_order=self.hue_order,
+                        data=plot_data, x=self.x, y=self.y, hue=self.hue, hue_order=self.hue_order,
                         palette=self.palette, jitter=self.jitter, dodge=self.dodge, orient=self.orient,
                         size=self.size, edgecolor=self.edgecolor, linewidth=self.linewidth, 
                         log_scale=self.log_scale, native_scale=self.native_scale, legend=self.legend,
                         color=self.color, ax=ax
                     )
+                    annotate_sampling(ax, len(plot_data), len(self.data))
 
                     st.pyplot(fig)  # Display the plot
                     self.saved_plots.append(fig)  # Save the figure (not the axes)
@@ -2,14 +2,19 @@ import streamlit as st
 import seaborn as sns
 import matplotlib.pyplot as plt
 from itertools import cycle
+from PROFILE import get_profile
+from PREVIEW import preview_dataframe
+from SAMPLING import sampling_controls, sample_frame, annotate_sampling
+from SWARM import SWARM_MAX_POINTS, sweep_beeswarm, show_swarm_report
 
 class Swarmplot:
     def __init__(self, data, saved_plots):
         self.data = data
         self.saved_plots = saved_plots
-        self.numeric_columns = self.data.select_dtypes(include=["int", "float"]).columns.tolist()
-        self.categorical_columns = self.data.select_dtypes(exclude=["int", "float"]).columns.tolist()
-        self.columns = self.data.columns.tolist()
+        self.profile = get_profile(self.data)
+        self.numeric_columns = self.profile.numeric_columns
+        self.categorical_columns = self.profile.categorical_columns
+        self.columns = self.profile.columns
 
     def display(self):
         # Create tabs for Plot generation and Document section
@@ -19,7 +24,7 @@ class Swarmplot:
             st.header("Swarmplot Generator")
             st.subheader("Core Data and Axes Parameters")
             st.info("The data is already loaded.")
-            st.dataframe(self.data)
+            preview_dataframe(self.data, self.profile)
 
             # Create two columns for parameters layout
             col1, col2 = st.columns(2)
@@ -40,7 +45,7 @@ class Swarmplot:
                         self.hue_norm = st.text_input("Enter a range to normalize values (e.g., (1, 2))")
                         self.hue_norm = eval(self.hue_norm) if self.hue_norm else None
                     else:
-                        self.hue_order = st.multiselect("Select the hue order", self.data[self.hue].unique().tolist())
+                        self.hue_order = st.multiselect("Select the hue order", self.profile.unique_values(self.hue))
 
                 # Palette selection
                 self.palette = st.selectbox(
@@ -55,7 +60,7 @@ class Swarmplot:
             # Column 2: Additional Plot Parameters
             with col2:
                 # Order of categories
-                self.order = st.multiselect("Order of categories", self.data[self.x].unique().tolist()) if self.x else None
+                self.order = st.multiselect("Order of categories", self.profile.unique_values(self.x)) if self.x else None
 
                 # Additional Parameters
                 st.subheader("Additional Parameters")
@@ -74,11 +79,15 @@ class Swarmplot:
                 self.orient = st.selectbox("Select orientation", [None, "v", "h"], index=0)
                 self.ax = st.selectbox("Select axes (optional)", [None, "ax1", "ax2"], index=0)  # for later customization
 
+            # Denser categories are drawn as strips anyway, so the default budget stops there
+            self.sampling = sampling_controls(self.profile.n_rows, key="swarmplot", default_budget=SWARM_MAX_POINTS)
+
             # Button to generate plot
             if st.button("Generate Plot"):
                 try:
                     # Create a figure for the plot
                     fig, ax = plt.subplots()
+                    plot_data, _ = sample_frame(self.data, strata=self.hue, columns=[self.x, self.y], **self.sampling)
 
                     # Ensure hue is a string if provided
                     if self.hue is None:
@@ -86,18 +95,22 @@ class Swarmplot:
                     if self.color is None:
                         self.color = ""
 
-                    # Generate the swarmplot
-                    sns.swarmplot(
-                        data=self.data, x=self.x, y=self.y, hue=self.hue, hue_order=self.hue_order,
-                        palette=self.palette, dodge=self.dodge, order=self.order, hue_norm=self.hue_norm,
-                        log_scale=self.log_scale, native_scale=self.native_scale, color=self.color,
-                        size=self.size, edgecolor=self.edgecolor, linewidth=self.linewidth,
-                        legend=self.legend, warn_thresh=self.warn_thresh, ax=ax, formatter=self.formatter,
-                        orient=self.orient
-                    )
+                    # Generate the swarmplot with the sweep-line layout engine
+                    swarm_report = []
+                    with sweep_beeswarm(swarm_report):
+                        sns.swarmplot(
+                            data=plot_data, x=self.x, y=self.y, hue=self.hue, hue_order=self.hue_order,
+                            palette=self.palette, dodge=self.dodge, order=self.order, hue_norm=self.hue_norm,
+                            log_scale=self.log_scale, native_scale=self.native_scale, color=self.color,
+                            size=self.size, edgecolor=self.edgecolor, linewidth=self.linewidth,
+                            legend=self.legend, warn_thresh=self.warn_thresh, ax=ax, formatter=self.formatter,
+                            orient=self.orient
+                        )
+                    annotate_sampling(ax, len(plot_data), len(self.data))
 
                     # Display the plot
                     st.pyplot(fig)
+                    show_swarm_report(swarm_report)
                     self.saved_plots.append(fig)  # Save the plot for later reference
 
                 except Exception as e:
@@ -2,12 +2,16 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import streamlit as st
 import os
+from PROFILE import get_profile
+from PREVIEW import preview_dataframe
+from KDE import BINNED_MIN_ROWS, QUANTILE_POINTS, compress_quantiles, timed_stage, show_kde_instrumentation
 
 class ViolinPlotVisualizer:
     def __init__(self, data, saved_plots):
         self.data = data
         self.saved_plots = saved_plots
-        self.columns = self.data.columns.tolist()
+        self.profile = get_profile(self.data)
+        self.columns = self.profile.columns
 
     def display(self):
         # Creating tabs for plots and documents sections
@@ -17,7 +21,7 @@ class ViolinPlotVisualizer:
             st.header("Violin Plot Generator")
             st.subheader("Core Data and Axes Parameters")
             st.info("The data is already loaded.")
-            st.dataframe(self.data)
+            preview_dataframe(self.data, self.profile)
 
             # Create two columns for layout
             col1, col2 = st.columns(2,border=True)
@@ -32,11 +36,11 @@ class ViolinPlotVisualizer:
                 self.hue_norm = None
                 self.hue_order = None
                 if self.hue:
-                    if self.hue in self.data.select_dtypes(include=["int", "float"]).columns.tolist():
+                    if self.hue in self.profile.numeric_columns:
                         self.hue_norm = st.text_input("Enter a range to normalize values (e.g., (1, 2))")
                         self.hue_norm = eval(self.hue_norm) if self.hue_norm else None
                     else:
-                        self.hue_order = st.multiselect("Select the hue order", self.data[self.hue].unique().tolist())
+                        self.hue_order = st.multiselect("Select the hue order", self.profile.unique_values(self.hue))
 
                 # Color and Palette selection
                 self.color = st.color_picker("Pick a single color for the plot", "#000000")
@@ -108,40 +112,57 @@ class ViolinPlotVisualizer:
         fig, ax = plt.subplots(figsize=(10, 6))
 
         try:
+            data, bw_method, stats = self.data, self.bw_method, None
+            # Large groups are smoothed from their quantiles; count scaling needs every row
+            if (self.y in self.profile.numeric_columns and self.density_norm != "count"
+                    and self.profile.n_rows >= BINNED_MIN_ROWS):
+                stats = {}
+                data, bw_method = compress_quantiles(
+                    self.data, self.y, by=[self.x, self.hue], bw_method=self.bw_method, log_scale=self.log_scale,
+                    stats=stats
+                )
+                note = f"Violins drawn from {QUANTILE_POINTS:,} quantiles per group of {self.profile.n_rows:,} rows"
+                if self.inner in ("stick", "point"):
+                    # Inner marks are drawn from the same frame, so they mark quantiles too
+                    note += f"; the inner {self.inner}s mark those quantiles, not individual observations"
+                st.caption(note)
+
             # Use sns.violinplot correctly
-            sns.violinplot(
-                data=self.data,
-                x=self.x,
-                y=self.y,
-                hue=self.hue,
-                order=self.hue_order,
-                orient="v",  # Orientation can be controlled based on data type
-                color=self.color,
-                palette=self.palette,
-                saturation=self.saturation,
-                fill=self.fill,
-                inner=self.inner,
-                split=self.split,
-                width=self.width,
-                dodge=self.dodge,
-                gap=self.gap,
-                linewidth=self.linewidth,
-                linecolor=self.linecolor,
-                cut=self.cut,
-                gridsize=self.gridsize,
-                bw_method=self.bw_method,
-                bw_adjust=self.bw_adjust,
-                density_norm=self.density_norm,
-                common_norm=self.common_norm,
-                hue_norm=self.hue_norm,
-                log_scale=self.log_scale,
-                native_scale=self.native_scale,
-                legend=self.legend,
-                ax=ax
-            )
+            with timed_stage(stats, "fit and draw"):
+                sns.violinplot(
+                    data=data,
+                    x=self.x,
+                    y=self.y,
+                    hue=self.hue,
+                    order=self.hue_order,
+                    orient="v",  # Orientation can be controlled based on data type
+                    color=self.color,
+                    palette=self.palette,
+                    saturation=self.saturation,
+                    fill=self.fill,
+                    inner=self.inner,
+                    split=self.split,
+                    width=self.width,
+                    dodge=self.dodge,
+                    gap=self.gap,
+                    linewidth=self.linewidth,
+                    linecolor=self.linecolor,
+                    cut=self.cut,
+                    gridsize=self.gridsize,
+                    bw_method=bw_method,
+                    bw_adjust=self.bw_adjust,
+                    density_norm=self.density_norm,
+                    common_norm=self.common_norm,
+                    hue_norm=self.hue_norm,
+                    log_scale=self.log_scale,
+                    native_scale=self.native_scale,
+                    legend=self.legend,
+                    ax=ax
+                )
 
             # Show the plot using Streamlit
             st.pyplot(fig)
+            show_kde_instrumentation(stats)
 
             # Save the plot if needed
             plot_name = f"violin_plot_{self.x}_{self.y}.png"
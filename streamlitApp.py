@@ -1,4 +1,3 @@
-import chardet
 import streamlit as st
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -32,6 +31,8 @@ from PAIRGRID import *
 from JOINTPLOT import *       
 from JOINTGRID import *      
 from fpdf import FPDF
+from INGEST import read_csv_streaming, optimize_dtypes
+from DATACACHE import dataset_cache, content_hash
 
 def download_pdf(selected_graph_plots):
     if selected_graph_plots:
@@ -62,27 +63,23 @@ def download_pdf(selected_graph_plots):
         st.error("No images to download.")
 
 def readCSV(uploaded_file):
-    raw_data = uploaded_file.getvalue()
-    detected_encoding = chardet.detect(raw_data)
-    encoding = detected_encoding['encoding']   
     try:
-        df = pd.read_csv(uploaded_file, encoding=encoding)
-        return df
-    except UnicodeDecodeError:
-        try:
-            print(f"Encoding {encoding} failed. Trying with 'utf-8' encoding...")
-            uploaded_file.seek(0)
-            df = pd.read_csv(uploaded_file, encoding='utf-8')
-            return df
-        except UnicodeDecodeError:
-            try:
-                print(f"Encoding 'utf-8' failed. Trying with 'ISO-8859-1' encoding...")
-                uploaded_file.seek(0)
-                df = pd.read_csv(uploaded_file, encoding='ISO-8859-1')
-                return df
-            except Exception as e:
-                print(f"Error reading the file: {e}")
-                return "None"
+        df, report = read_csv_streaming(uploaded_file)
+    except Exception as e:
+        print(f"Error reading the file: {e}")
+        return "None"
+
+    if len(report["attempts"]) > 1:
+        print(f"Encoding {report['attempts'][0]} failed. Parsed with '{report['encoding']}' instead.")
+    # Kept with the frame, so cache hits (and the spilled copy) still show it
+    df.attrs["ingest_report"] = report
+    return df
+
+def loadDataset(uploaded_file, parse_options):
+    df = readCSV(uploaded_file)
+    if isinstance(df, pd.DataFrame) and parse_options.get("optimize_dtypes"):
+        df, _ = optimize_dtypes(df)
+    return df
 
 # Listing all the lists available in session states
 listVariables = ["rugplot","ecdf","kdeplot","histplot","displot","relplot","scatterplot","lineplot","catplot", "stripplot", "swarmplot",
@@ -102,7 +99,38 @@ selectedPlot =st.sidebar.pills("Select the plot", listVariables)
 
 
 if file is not None:
-    df = readCSV(file)
+    # Options that change the parsed frame are part of the cache key
+    parse_options = {
+        "optimize_dtypes": st.sidebar.checkbox(
+            "Optimize column types", value=False,
+            help="Downcast numbers, store repeated text as categories and parse date columns"
+        )
+    }
+
+    # Every widget change reruns this script, so the upload is hashed once and the parsed frame reused
+    hash_key = f"dataset_key_{file.file_id}_{sorted(parse_options.items())}"
+    if hash_key not in st.session_state:
+        st.session_state[hash_key] = content_hash(file, parse_options)
+    df = dataset_cache.get_or_load(st.session_state[hash_key], lambda: loadDataset(file, parse_options))
+
+    if isinstance(df, pd.DataFrame) and "ingest_report" in df.attrs:
+        report = df.attrs["ingest_report"]
+        timings = ", ".join(f"{stage}: {seconds:.2f}s" for stage, seconds in report["timings"].items())
+        st.sidebar.caption(f"Encoding: {report['encoding']} ({timings})")
+
+    if isinstance(df, pd.DataFrame) and "dtype_report" in df.attrs:
+        report = df.attrs["dtype_report"]
+        st.sidebar.caption(
+            f"Memory: {report['before_bytes'] / 1024 ** 2:.1f} MB -> {report['after_bytes'] / 1024 ** 2:.1f} MB "
+            f"({len(report['changes'])} columns converted)"
+        )
+
+    stats = dataset_cache.stats()
+    st.sidebar.caption(
+        f"Dataset cache: {stats['hits']} hits, {stats['misses']} misses, "
+        f"{stats['disk_loads']} memory-mapped loads, {stats['spill_evictions']} spilled files deleted, "
+        f"{stats['memory_mb']:.0f} / {stats['limit_mb']:.0f} MB"
+    )
     
     # Check if df is a DataFrame and not "None" string
     if isinstance(df, pd.DataFrame):